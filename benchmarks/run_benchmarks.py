@@ -0,0 +1,205 @@
+# Built-in Modules
+import argparse
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+# Internal Modules
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "test"))
+from mock_docket_alarm import MockDocketAlarm
+
+# Benchmarks for the bulk download functions, run against a local mock of the Docket Alarm API.
+# Every scenario runs in its own process so that its peak memory use is measured on its own.
+# For each scenario we report the throughput, the 50th and 99th percentile latency of the HTTP requests it made,
+# and the peak resident memory of the process.
+#
+# Usage:
+#     python benchmarks/run_benchmarks.py
+#     python benchmarks/run_benchmarks.py --dockets 200 --entries 20 --latency 0.05 --output results.json
+#     python benchmarks/run_benchmarks.py --compare results.json
+# With --compare, the run fails (exit code 1) if any scenario is slower or uses more memory than the saved
+# results by more than --tolerance.
+
+SCENARIOS = ["thread_download_json", "thread_download_pdfs", "query_to_tables"]
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the fraction specified of the values fall (nearest rank).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+def peak_rss_mb():
+    """
+    Returns the peak resident memory of this process in megabytes, or None where it can't be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_scenario(scenario, api_url, dockets, workdir):
+    """
+    Runs one scenario in this process against the mock server at api_url, and returns its measurements.
+    """
+    import requests
+    import global_variables, login
+
+    # Every HTTP request the program makes goes through requests.Session.request, so we time them there.
+    # For streamed PDF downloads this is the time until the response headers arrive.
+    latencies = []
+    original_request = requests.Session.request
+    def timed_request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_request(self, method, url, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    requests.Session.request = timed_request
+
+    # The program is pointed at the mock server, and at folders and login information that only this run uses.
+    global_variables.API_URL = api_url
+    global_variables.JSON_INPUT_OUTPUT_PATH = os.path.join(workdir, "json-output")
+    global_variables.PDF_OUTPUT_PATH = os.path.join(workdir, "pdf-output")
+    global_variables.CSV_INPUT_PATH = os.path.join(workdir, "input.csv")
+    global_variables.LOG_PATH = os.path.join(workdir, "log")
+    os.makedirs(global_variables.JSON_INPUT_OUTPUT_PATH)
+    os.makedirs(global_variables.PDF_OUTPUT_PATH)
+    os.makedirs(global_variables.LOG_PATH)
+    login.CREDENTIALS_PATH = os.path.join(workdir, "credentials.pickle")
+    login.store_user_info_locally("benchmark@example.com", "benchmark")
+    with open(global_variables.CSV_INPUT_PATH, "w", newline="") as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(["Name", "DocketNumber", "Court"])
+        for number in range(dockets):
+            writer.writerow([f"Case {number}", f"BM-{number}", "Mock Court"])
+
+    import get_json, get_pdfs, generate_spreadsheets
+
+    if scenario == "thread_download_pdfs":
+        # The PDFs are downloaded from the links in the JSON files, so those are downloaded first, outside the measurement.
+        get_json.thread_download_json()
+        latencies.clear()
+
+    start = time.perf_counter()
+    if scenario == "thread_download_json":
+        get_json.thread_download_json()
+        items = len([name for name in os.listdir(global_variables.JSON_INPUT_OUTPUT_PATH) if name.endswith(".json")])
+    elif scenario == "thread_download_pdfs":
+        link_list = get_pdfs.get_urls(global_variables.JSON_INPUT_OUTPUT_PATH)
+        get_pdfs.thread_download_pdfs(link_list)
+        items = len(link_list)
+    elif scenario == "query_to_tables":
+        # query_to_tables() asks the user to confirm before it starts, so we answer for them.
+        sys.stdin = io.StringIO("y\n")
+        generate_spreadsheets.query_to_tables("benchmark", dockets, os.path.join(workdir, "tables"))
+        items = dockets
+    seconds = time.perf_counter() - start
+
+    return {
+        "scenario": scenario,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+        "requests": len(latencies),
+        "p50_latency_ms": None if not latencies else round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_latency_ms": None if not latencies else round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results to a baseline saved by an earlier run. Returns a list of the regressions found, as strings.
+    """
+    regressions = []
+    baseline = {result["scenario"]: result for result in baseline}
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if not previous:
+            continue
+        checks = [
+            ("items_per_second", lambda new, old: new < old * (1 - tolerance)),
+            ("p99_latency_ms", lambda new, old: new > old * (1 + tolerance)),
+            ("peak_rss_mb", lambda new, old: new > old * (1 + tolerance)),
+        ]
+        for key, regressed in checks:
+            new, old = result.get(key), previous.get(key)
+            if new is not None and old is not None and regressed(new, old):
+                regressions.append(f"{result['scenario']}: {key} went from {old} to {new}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk download functions against a local mock Docket Alarm API.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS, help="Which scenarios to run.")
+    parser.add_argument("--dockets", type=int, default=50, help="How many dockets are in the input csv, or returned by the search.")
+    parser.add_argument("--entries", type=int, default=10, help="How many entries (each with a PDF) are in every docket.")
+    parser.add_argument("--exhibits", type=int, default=0, help="How many exhibits (each with a PDF) are attached to every entry.")
+    parser.add_argument("--pdf-bytes", type=int, default=50000, help="The size of every PDF.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the mock server waits before answering every request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, up to this amount, added to the latency.")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="The share of PDF downloads (0 to 1) the mock server cuts off halfway. They are resumed.")
+    parser.add_argument("--html-rate", type=float, default=0.0, help="The share of PDF downloads (0 to 1) the mock server answers with an HTML error page. They are downloaded again.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="The share of requests (0 to 1) the mock server fails. Failed PDF downloads are written to log/.")
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare the results to a JSON file saved by an earlier run, and fail on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="How much worse (as a fraction) a result may be than the compared one.")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the program while it runs.")
+    # These are used when a scenario is run in its own process.
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run_scenario(args.run_scenario, args.api_url, args.dockets, workdir)
+        with open(args.result_file, "w") as resultFile:
+            json.dump(result, resultFile)
+        return 0
+
+    mock = MockDocketAlarm(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, drop_rate=args.drop_rate,
+                           html_rate=args.html_rate,
+                           entries=args.entries, exhibits=args.exhibits, pdf_bytes=args.pdf_bytes,
+                           search_results=args.dockets)
+    results = []
+    with mock, tempfile.TemporaryDirectory() as resultsdir:
+        for scenario in args.scenarios:
+            result_file = os.path.join(resultsdir, f"{scenario}.json")
+            output = None if args.verbose else subprocess.DEVNULL
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run-scenario", scenario, "--api-url", mock.api_url,
+                            "--dockets", str(args.dockets), "--result-file", result_file],
+                           check=True, stdout=output, stderr=output)
+            with open(result_file) as resultFile:
+                results.append(json.load(resultFile))
+
+    columns = ["scenario", "items", "seconds", "items_per_second", "requests", "p50_latency_ms", "p99_latency_ms", "peak_rss_mb"]
+    print(" | ".join(columns))
+    for result in results:
+        print(" | ".join(str(result[column]) for column in columns))
+
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            json.dump(results, outputFile, indent=3)
+
+    if args.compare:
+        with open(args.compare) as baselineFile:
+            regressions = compare(results, json.load(baselineFile), args.tolerance)
+        if regressions:
+            print("\n[REGRESSION] " + "\n[REGRESSION] ".join(regressions))
+            return 1
+        print("\nNo regressions found.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
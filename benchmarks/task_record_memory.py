@@ -0,0 +1,98 @@
+# Built-in Modules
+import argparse
+import collections
+import gc
+import json
+import os
+import sys
+import tracemalloc
+# Internal Modules
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "docket_alarm_api_bulk_download"))
+
+# Measures the memory each waiting download task takes, with the tuples tasks used to be and with the records in
+# task_records.py. The tasks are made the way a run makes them: PDF links from parsed docket JSON, and dockets from
+# rows of a csv, so every task starts with its own copy of strings like the court and the entry date.
+# Only the tasks are measured (with tracemalloc), not the JSON or csv they were read from.
+#
+# Usage:
+#     python benchmarks/task_record_memory.py
+#     python benchmarks/task_record_memory.py --tasks 1000000
+
+# How PDF links and dockets were kept before task_records.py.
+OldPdfLink = collections.namedtuple("OldPdfLink", ["link", "fileName", "folderName", "outputPath", "clientMatter",
+                                                   "entryDate", "entryNumber", "exhibit", "court"])
+
+def synthetic_dockets(count, entries=20):
+    """
+    Returns the JSON text of enough dockets for count PDF links, each with entries docket entries.
+    """
+    dockets = []
+    for number in range(count // entries):
+        docket_report = [{"number": entry, "entry_date": f"2020-01-{entry % 28 + 1:02d}", "contents": f"Entry {entry}",
+                          "link": f"https://www.docketalarm.com/cgi-bin/show_doc/{number}/{entry}.pdf"}
+                         for entry in range(entries)]
+        dockets.append((f"Case {number} BM-{number}", json.dumps({"info": {"court": "U.S. District Court, Northern District of California"},
+                                                                  "docket_report": docket_report})))
+    return dockets
+
+def make_pdf_tasks(dockets, new):
+    import task_records
+    tasks = []
+    for folderName, jsonText in dockets:
+        jsonObject = json.loads(jsonText)
+        court = jsonObject["info"]["court"]
+        context = task_records.run_context("/tmp/pdf-output", "benchmark")
+        for item in jsonObject["docket_report"]:
+            fileName = f"{item['number']} - {item['contents']}"
+            if new:
+                tasks.append(task_records.PdfLink(item["link"], fileName, folderName, "/tmp/pdf-output", "benchmark",
+                                                  item["entry_date"], item["number"], None, court, context=context))
+            else:
+                tasks.append(OldPdfLink(item["link"], fileName, folderName, "/tmp/pdf-output", "benchmark",
+                                        item["entry_date"], item["number"], None, court))
+    return tasks
+
+def csv_rows(count):
+    """
+    Yields count (case name, case number, court) rows, with every value its own string, as they are read from a csv.
+    """
+    for number in range(count):
+        yield ("".join(["Case ", str(number)]), "".join(["BM-", str(number)]), "".join(["District of ", "Columbia"]))
+
+def make_json_tasks(rows, new):
+    import task_records
+    context = task_records.run_context("/tmp/json-output", "benchmark", True)
+    if new:
+        return [task_records.JsonTask(caseName, caseNo, caseCourt, "/tmp/json-output", "benchmark", True, context=context)
+                for caseName, caseNo, caseCourt in rows]
+    return [(caseName, caseNo, caseCourt, "/tmp/json-output", "benchmark", True) for caseName, caseNo, caseCourt in rows]
+
+def measure(make, source, new):
+    """
+    Returns the bytes per task that make(source(), new) leaves allocated.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = make(source(), new)
+    # The rows and parsed dockets the tasks were made from are gone by now, so this is what the tasks keep.
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(tasks)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory each waiting download task takes.")
+    parser.add_argument("--tasks", type=int, default=100000, help="The number of tasks of each kind to make.")
+    args = parser.parse_args()
+
+    print("task | before (bytes/task) | after (bytes/task) | reduction")
+    rows = lambda: csv_rows(args.tasks)
+    old, new = measure(make_json_tasks, rows, False), measure(make_json_tasks, rows, True)
+    print(f"json | {old:.0f} | {new:.0f} | {1 - new / old:.0%}")
+    dockets = synthetic_dockets(args.tasks)
+    old, new = measure(make_pdf_tasks, lambda: dockets, False), measure(make_pdf_tasks, lambda: dockets, True)
+    print(f"pdf | {old:.0f} | {new:.0f} | {1 - new / old:.0%}")
+
+if __name__ == "__main__":
+    main()
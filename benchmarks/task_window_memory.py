@@ -0,0 +1,72 @@
+# Built-in Modules
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+# Internal Modules
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_benchmarks import peak_rss_mb
+
+# Measures how the memory used to run PDF download tasks grows with the number of tasks.
+# Synthetic PDF links are run through the download runner with a download function that does nothing, so only the
+# cost of holding and scheduling the tasks is measured. Each run is a separate process, so its peak memory is its own.
+#
+# Modes:
+#     window - links are made one at a time and run with host_queue.run_by_host(), which reads taskWindow ahead.
+#     list - every link is made up front and handed to executor.map(), which makes a future for each one.
+#
+# Usage:
+#     python benchmarks/task_window_memory.py
+#     python benchmarks/task_window_memory.py --links 10000 100000 1000000 --modes window
+
+def synthetic_links(count):
+    """
+    Yields count PdfLinks spread over a few hosts and dockets, like the ones get_pdfs.iter_urls() reads.
+    """
+    from get_pdfs import PdfLink
+    for number in range(count):
+        docket = number // 20
+        yield PdfLink(f"https://host{number % 4}.example.com/cgi-bin/show_doc/{docket}/{number}.pdf", f"{number % 20} - Entry",
+                      f"Case {docket} BM-{docket}", "/tmp/pdf-output", "benchmark", "2020-01-02", number % 20, None, "Mock Court")
+
+def run(mode, count):
+    import host_queue
+
+    def download(link_tuple):
+        return True
+
+    start = time.perf_counter()
+    if mode == "window":
+        host_queue.run_by_host(download, synthetic_links(count))
+    else:
+        link_list = list(synthetic_links(count))
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            results = list(executor.map(download, link_list))
+    seconds = time.perf_counter() - start
+    return {"mode": mode, "links": count, "seconds": round(seconds, 2), "peak_rss_mb": peak_rss_mb()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory used to run PDF download tasks, by number of tasks.")
+    parser.add_argument("--links", type=int, nargs="+", default=[10000, 100000, 1000000], help="The numbers of links to run.")
+    parser.add_argument("--modes", nargs="+", choices=["window", "list"], default=["window", "list"], help="Which ways of running the tasks to measure.")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "LINKS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run[0], int(args.run[1]))))
+        return
+
+    print("mode | links | seconds | peak_rss_mb")
+    for mode in args.modes:
+        for count in args.links:
+            output = subprocess.run([sys.executable, __file__, "--run", mode, str(count)], capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{result['mode']} | {result['links']} | {result['seconds']} | {result['peak_rss_mb']}")
+
+if __name__ == "__main__":
+    main()
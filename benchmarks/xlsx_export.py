@@ -0,0 +1,70 @@
+# Built-in Modules
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+# Internal Modules
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run_benchmarks import peak_rss_mb
+
+# Measures how long saving a large error table as an .xlsx file takes, and the memory it needs.
+# Each run is a separate process, so its peak memory is its own.
+#
+# Modes:
+#     stream - ErrorTable.error_excel_save(), which writes one row at a time (see xlsx_export.py).
+#     to_excel - the whole table as a DataFrame, saved with DataFrame.to_excel(), which builds the workbook in memory.
+#
+# Usage:
+#     python benchmarks/xlsx_export.py
+#     python benchmarks/xlsx_export.py --rows 10000 100000 --modes stream
+
+def synthetic_table(count):
+    """
+    Returns an ErrorTable with count rows, like the ones a large PDF download with many failures leaves.
+    """
+    from log_errors_to_table import ErrorTable
+    table = ErrorTable()
+    for number in range(count):
+        docket = number // 20
+        table.append_error_table(f"404 Client Error: Not Found for url: https://host{number % 4}.example.com/{number}.pdf",
+                                 f"Case {docket} BM-{docket}", f"{number % 20} - Motion number {number % 20}")
+    return table
+
+def run(mode, count):
+    table = synthetic_table(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "errors.xlsx")
+        start = time.perf_counter()
+        if mode == "stream":
+            table.error_excel_save(path)
+        else:
+            table.df.to_excel(path, index=False)
+        seconds = time.perf_counter() - start
+        megabytes = os.path.getsize(path) / 1000000
+    return {"mode": mode, "rows": count, "seconds": round(seconds, 2), "file_mb": round(megabytes, 1), "peak_rss_mb": peak_rss_mb()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time and memory it takes to save a large error table as xlsx.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000], help="The numbers of rows to save.")
+    parser.add_argument("--modes", nargs="+", choices=["stream", "to_excel"], default=["stream", "to_excel"], help="Which ways of saving to measure.")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run[0], int(args.run[1]))))
+        return
+
+    print("mode | rows | seconds | file_mb | peak_rss_mb")
+    for mode in args.modes:
+        for count in args.rows:
+            output = subprocess.run([sys.executable, __file__, "--run", mode, str(count)], capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{result['mode']} | {result['rows']} | {result['seconds']} | {result['file_mb']} | {result['peak_rss_mb']}")
+
+if __name__ == "__main__":
+    main()
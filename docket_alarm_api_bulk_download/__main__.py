@@ -4,15 +4,23 @@ file_dir = os.path.dirname(__file__)
 sys.path.append(file_dir)
 import menus
 import config
+import commands
 
 def run():
+    # If the program was started with arguments, like 'worker queue.sqlite3', we run that command instead of the menus.
+    if len(sys.argv) > 1:
+        commands.main(sys.argv[1:])
+        return
     menus.welcome()
 
 
 if __name__ == '__main__':
-    if config.isGUI == False:
+    if len(sys.argv) > 1:
+        # Commands given as arguments always run in the command line.
+        run()
+    elif config.isGUI == False:
         # If isGUI is set to False in config/config.py, then the program will run in the command line when this file is executed.
         run()
-    if config.isGUI == True:
+    elif config.isGUI == True:
         # If isGUI is set to True in config/config.py, Then the program will open with an experimental GUI. (This is not reccomended as of yet.)
         menus.gui_run()
@@ -0,0 +1,150 @@
+# Built-in Modules
+import threading
+import time
+# Third-party Modules
+import requests
+from requests.adapters import HTTPAdapter
+# Internal Modules
+import config
+import global_variables
+import metrics
+import profiling
+
+# Every request the program makes to Docket Alarm goes through the one ApiSession returned by shared(), however many
+# downloads or jobs (see jobs.py) are running at once. It keeps:
+#   one pool of connections, so connections are reused instead of opened for every docket and PDF,
+#   one login token for each user, so the program logs in once rather than before every download,
+#   one rate limit (maxRequestsPerSecond in config.py) for all of the requests together.
+
+# The most connections kept open to any one server. Enough for the download threads of a few jobs running at once.
+POOL_SIZE = 64
+
+class RateLimiter:
+    """
+    Spaces requests out so no more than per_second are started each second, across every thread that shares it.
+    With per_second set to None, maxRequestsPerSecond in config.py is used, and if that is None too, requests aren't limited.
+    """
+
+    def __init__(self, per_second=None):
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """
+        Waits until the next request may start.
+        """
+        per_second = self.per_second or config.maxRequestsPerSecond
+        if not per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + 1 / per_second
+        if start > now:
+            time.sleep(start - now)
+
+class ApiSession:
+    """
+    Makes HTTP requests over a shared pool of connections, within a shared rate limit, and logs in for them.
+    Its methods can be called from any number of threads at once.
+    """
+
+    def __init__(self, requests_per_second=None, pool_size=POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.limiter = RateLimiter(requests_per_second)
+        # The login token for each (API address, username), with the time it was made.
+        self._tokens = {}
+        # The username and password each token was made with, so a token the API turns down can be renewed.
+        self._owners = {}
+        self._tokens_lock = threading.RLock()
+
+    def request(self, method, url, **kwargs):
+        self.limiter.wait()
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+    def login_token(self, username, password):
+        """
+        Returns a login token for the user, logging in only if there isn't one yet or it's older than
+        loginTokenMinutes in config.py. Threads that ask at the same time wait for the same login.
+        """
+        key = (global_variables.API_URL, username)
+        with self._tokens_lock:
+            token, made = self._tokens.get(key, (None, 0.0))
+            if token is None or time.monotonic() - made > config.loginTokenMinutes * 60:
+                token = self._login(username, password)
+                self._tokens[key] = (token, time.monotonic())
+                self._owners[token] = (username, password)
+            return token
+
+    def renew_token(self, token):
+        """
+        Takes in a login token the API turned down (see is_token_error()). Forgets it, logs in again, and returns the
+        new token. If another thread already renewed it, the new token is returned without logging in again.
+        Returns None if the token wasn't made by this session.
+        """
+        with self._tokens_lock:
+            if token not in self._owners:
+                return None
+            username, password = self._owners[token]
+            current, _ = self._tokens.get((global_variables.API_URL, username), (None, 0.0))
+            if current is None or current == token:
+                self.forget_token(username)
+            return self.login_token(username, password)
+
+    def forget_token(self, username):
+        """
+        Drops the user's login token, so the next request logs in again.
+        """
+        with self._tokens_lock:
+            self._tokens.pop((global_variables.API_URL, username), None)
+
+    def _login(self, username, password):
+        data = {
+            'username': username,
+            'password': password,
+            }
+        with metrics.timed_request("login"), profiling.stage("auth"):
+            result = self.post(global_variables.API_URL + "login/", data=data, timeout=60)
+            result.raise_for_status()
+        return result.json()['login_token']
+
+def is_token_error(response):
+    """
+    Returns True if the API turned a request down because its login token isn't valid any more (for example, because
+    Docket Alarm logged the user out before loginTokenMinutes in config.py were up).
+    """
+    if response.status_code == 401:
+        return True
+    if "json" not in response.headers.get("Content-Type", ""):
+        return False
+    try:
+        result = response.json()
+    except ValueError:
+        return False
+    if not isinstance(result, dict) or result.get("success") is not False:
+        return False
+    error = str(result.get("error") or "").lower()
+    return any(word in error for word in ("token", "login", "log in", "logged in"))
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """
+    Returns the ApiSession every download in the program uses, making it the first time it's asked for.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ApiSession()
+        return _shared
@@ -0,0 +1,257 @@
+# Built-in Modules
+import os
+import csv
+import json
+import gzip
+import tarfile
+import zipfile
+import threading
+import collections
+# Internal Modules
+import config
+
+# This module saves downloads into a few large files instead of one file per docket and per PDF, for when outputMode in
+# config.py is "archive". Hundreds of thousands of small files are slow to write to network storage, and can use up
+# the number of files the storage allows.
+# Dockets are written as lines of compressed JSON ('dockets-00001.jsonl.gz'), jsonShardSize dockets to a shard.
+# PDFs are downloaded to a staging folder as usual (so they can be resumed and checked), then added to a ZIP or tar
+# archive, one per docket or one per archiveBatchSize PDFs, and the staged file is deleted.
+# Each output folder gets an index.csv saying which shard or archive every docket and PDF went into.
+
+INDEX_NAME = "index.csv"
+JSON_INDEX_COLUMNS = ["docket", "shard", "line"]
+PDF_INDEX_COLUMNS = ["docket", "file", "archive", "member", "bytes", "link"]
+
+# PDFs wait in this folder, inside the PDF folder, between being downloaded and being added to an archive.
+STAGING_FOLDER = ".staging"
+
+SHARD_PATTERN = "dockets-{:05d}.jsonl.gz"
+BATCH_PATTERN = "pdfs-{:05d}"
+
+def archive_mode():
+    """
+    Returns True if downloads are saved into archives, rather than as separate files.
+    Archives are only written to the output folders on this computer, so uploads to S3 are always separate files.
+    """
+    return config.outputMode == "archive" and config.storageBackend == "local"
+
+def _next_number(directory, prefix):
+    """
+    Returns the number after the highest numbered file in directory whose name starts with prefix, so a new run adds
+    new shards or batches instead of writing over the ones already there.
+    """
+    numbers = [int(name[len(prefix):len(prefix) + 5]) for name in os.listdir(directory)
+               if name.startswith(prefix) and name[len(prefix):len(prefix) + 5].isdigit()]
+    return max(numbers, default=0) + 1
+
+class _Index:
+    """
+    The index.csv of an output folder. Rows are added as each docket or PDF is saved.
+    """
+
+    def __init__(self, directory, columns):
+        path = os.path.join(directory, INDEX_NAME)
+        is_new = not os.path.exists(path)
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        if is_new:
+            self._writer.writeheader()
+
+    def add(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+class JsonShardWriter:
+    """
+    Writes dockets as lines of compressed JSON, starting a new shard every shard_size dockets.
+    Each line is {"docket": <the name the .json file would have had>, "json": <the docket>}.
+    Safe to use from many threads at once.
+    """
+
+    def __init__(self, directory, shard_size=None):
+        self.directory = directory
+        self.shard_size = shard_size or config.jsonShardSize
+        self._lock = threading.Lock()
+        self._number = _next_number(directory, "dockets-") - 1
+        self._shard = None
+        self._lines = 0
+        self._index = _Index(directory, JSON_INDEX_COLUMNS)
+
+    def write(self, name, json_text):
+        """
+        Takes in the name of the docket and the docket as JSON text without line breaks.
+        Returns the number of bytes written, before compression.
+        """
+        line = '{"docket": ' + json.dumps(name) + ', "json": ' + json_text + '}\n'
+        with self._lock:
+            if self._shard is None or self._lines >= self.shard_size:
+                if self._shard is not None:
+                    self._shard.close()
+                self._number += 1
+                self._shard = gzip.open(os.path.join(self.directory, SHARD_PATTERN.format(self._number)), 'wt', encoding='utf-8')
+                self._lines = 0
+            self._shard.write(line)
+            self._index.add({"docket": name, "shard": SHARD_PATTERN.format(self._number), "line": self._lines})
+            self._lines += 1
+        return len(line)
+
+    def close(self):
+        with self._lock:
+            if self._shard is not None:
+                self._shard.close()
+                self._shard = None
+            self._index.close()
+
+class PdfArchiveWriter:
+    """
+    Adds downloaded PDFs to ZIP or tar archives in the PDF folder, one archive per docket, or one per batch_size PDFs.
+    Safe to use from many threads at once. Only one PDF is added at a time, so the archives are written in order.
+    """
+
+    def __init__(self, directory, archive_format=None, batch_size=None, max_open=None):
+        self.directory = directory
+        self.archive_format = archive_format or config.archiveFormat
+        self.batch_size = batch_size or config.archiveBatchSize
+        self.max_open = max_open or config.maxOpenArchives
+        self._lock = threading.Lock()
+        # The archives that are open, least recently used first. The oldest is closed when too many are open,
+        # and opened again to add to it if it's needed later.
+        self._open = collections.OrderedDict()
+        self._batch_number = _next_number(directory, "pdfs-") - 1
+        self._batch_count = 0
+        self._index = _Index(directory, PDF_INDEX_COLUMNS)
+
+    def _archive_name(self, folderName):
+        if not self.batch_size:
+            return f"{folderName}.{self.archive_format}"
+        if self._batch_count % self.batch_size == 0:
+            self._batch_number += 1
+        self._batch_count += 1
+        return BATCH_PATTERN.format(self._batch_number) + f".{self.archive_format}"
+
+    def _archive(self, name):
+        archive = self._open.pop(name, None)
+        if archive is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            path = os.path.join(self.directory, name)
+            if self.archive_format == "zip":
+                # PDFs are already compressed, so they are stored as they are.
+                archive = zipfile.ZipFile(path, 'a', compression=zipfile.ZIP_STORED)
+            else:
+                archive = tarfile.open(path, 'a')
+        self._open[name] = archive
+        return archive
+
+    def add(self, path, link_tuple):
+        """
+        Takes in the path of a downloaded PDF and the tuple it was downloaded from (see get_pdfs.get_urls()).
+        Adds the PDF to its archive, deletes the downloaded file, and records it in the index.
+        """
+        link, fileName, folderName = link_tuple[:3]
+        size = os.path.getsize(path)
+        with self._lock:
+            name = self._archive_name(folderName)
+            member = f"{fileName}.pdf" if not self.batch_size else f"{folderName}/{fileName}.pdf"
+            archive = self._archive(name)
+            if self.archive_format == "zip":
+                archive.write(path, member)
+            else:
+                archive.add(path, member)
+            self._index.add({"docket": folderName, "file": f"{fileName}.pdf", "archive": name, "member": member,
+                             "bytes": size, "link": link})
+        os.remove(path)
+
+    def close(self):
+        with self._lock:
+            while self._open:
+                _, archive = self._open.popitem()
+                archive.close()
+            self._index.close()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def json_writer(directory):
+    """
+    Returns the JsonShardWriter for the folder specified, starting one if there isn't one yet.
+    """
+    with _writers_lock:
+        key = ("json", os.path.abspath(directory))
+        if key not in _writers:
+            _writers[key] = JsonShardWriter(directory)
+        return _writers[key]
+
+def pdf_writer(directory):
+    """
+    Returns the PdfArchiveWriter for the PDF folder specified, starting one if there isn't one yet.
+    """
+    with _writers_lock:
+        key = ("pdf", os.path.abspath(directory))
+        if key not in _writers:
+            _writers[key] = PdfArchiveWriter(directory)
+        return _writers[key]
+
+def close_all(directory=None):
+    """
+    Finishes every shard and archive that was written to. Called once a download is done.
+    Optionally takes in a folder, to only finish the ones in that folder, so the ones other jobs (see jobs.py) are
+    still writing to stay open.
+    """
+    with _writers_lock:
+        for key in list(_writers):
+            if directory is None or key[1] == os.path.abspath(directory):
+                _writers.pop(key).close()
+
+def count_shard_dockets(directory):
+    """
+    Returns the number of dockets saved in the .jsonl.gz shards in the folder specified, from its index.csv.
+    A docket saved more than once is counted once.
+    """
+    path = os.path.join(directory, INDEX_NAME)
+    if not os.path.exists(path):
+        return 0
+    with open(path, newline='', encoding='utf-8') as indexFile:
+        return len({row["docket"] for row in csv.DictReader(indexFile) if row.get("shard")})
+
+# Every line of a shard starts with this, followed by the docket's name (see JsonShardWriter.write()).
+_LINE_START = '{"docket": '
+_decoder = json.JSONDecoder()
+
+def _shard_lines(directory):
+    """
+    Yields the shard name, line number and text of every complete line in the .jsonl.gz shards in the folder specified.
+    """
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".jsonl.gz"):
+            continue
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as shard:
+            for number, line in enumerate(shard):
+                # A shard that was being written when the program stopped can end with part of a line.
+                if line.startswith(_LINE_START) and line.endswith("}\n"):
+                    yield name, number, line
+
+def iter_shard_dockets(directory):
+    """
+    Takes in a folder that dockets were saved to.
+    Yields the name and the data of every docket saved in the .jsonl.gz shards in the folder, one docket at a time.
+    A docket that was saved again (when it was polled again, or pulled again uncached) has a copy in the shards for
+    each time, and only the copy saved last is yielded. The shards are read twice for this: first for just the name
+    on each line, and then for the dockets.
+    """
+    latest = {}
+    for shard, number, line in _shard_lines(directory):
+        try:
+            latest[_decoder.raw_decode(line, len(_LINE_START))[0]] = (shard, number)
+        except ValueError:
+            continue
+    for shard, number, line in _shard_lines(directory):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if latest.get(record["docket"]) == (shard, number):
+            yield record["docket"], record["json"]
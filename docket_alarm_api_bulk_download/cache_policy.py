@@ -0,0 +1,91 @@
+# Built-in Modules
+import datetime
+# Internal Modules
+import config
+import metrics
+
+# Cached dockets are quick and cheap to download, but may be out of date. Uncached dockets are current, but slower and
+# may cost more. Rather than choosing one for the whole pull, uncachedAfterDays (in config.py) lets each docket choose:
+# every docket is downloaded cached first, and only downloaded again uncached if the cached copy is older than that.
+# How old a cached docket is comes from when Docket Alarm last updated it, if the docket says. Dockets that don't say
+# are treated as fresh, unless uncachedUseEntryDates (in config.py) is True, in which case the date of the newest entry
+# is used instead. That date is when the case last had a filing, not when the cache was refreshed, so a quiet case
+# looks stale on every run and is downloaded twice, which is why it is off by default.
+# The counts of each outcome are kept in the metrics (cache_policy_total), so each run can report how many uncached
+# downloads it avoided.
+
+# The fields of a docket's info that may say when it was last updated, in the order they are checked.
+UPDATED_FIELDS = ("updated", "date_updated", "last_updated", "last_checked")
+
+# The outcomes counted for each docket downloaded cached while uncachedAfterDays is set.
+FRESH = "fresh"
+REFRESHED = "refreshed"
+UNKNOWN = "unknown"
+
+def enabled():
+    return config.uncachedAfterDays is not None
+
+def parse_date(value):
+    """
+    Takes in a date as it appears in a docket, like "2021-03-04", "2021-03-04T10:00:00" or "03/04/2021".
+    Returns it as a datetime.date, or None if it can't be read.
+    """
+    text = str(value or "").strip()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.strptime(text, "%m/%d/%Y").date()
+    except ValueError:
+        return None
+
+def last_updated(docket_json, use_entry_dates=None):
+    """
+    Takes in a docket's JSON as a dictionary. Returns the date Docket Alarm last updated it, or None if the docket
+    doesn't say.
+    If use_entry_dates is True (uncachedUseEntryDates in config.py by default), the date of the newest entry is
+    returned for dockets that don't say when they were updated.
+    """
+    use_entry_dates = config.uncachedUseEntryDates if use_entry_dates is None else use_entry_dates
+    info = docket_json.get("info") or {}
+    for field in UPDATED_FIELDS:
+        date = parse_date(info.get(field))
+        if date is not None:
+            return date
+    if not use_entry_dates:
+        return None
+    dates = [parse_date(item.get("entry_date")) for item in docket_json.get("docket_report") or []]
+    dates = [date for date in dates if date is not None]
+    return max(dates) if dates else None
+
+def is_stale(docket_json, today=None):
+    """
+    Takes in a cached docket's JSON as a dictionary. Returns True if it is older than uncachedAfterDays (in config.py),
+    so it should be downloaded again uncached. Dockets whose age can't be told are kept.
+    Counts the outcome in the metrics.
+    """
+    updated = last_updated(docket_json)
+    if updated is None:
+        metrics.REGISTRY.increment("cache_policy_total", outcome=UNKNOWN)
+        return False
+    stale = ((today or datetime.date.today()) - updated).days > config.uncachedAfterDays
+    metrics.REGISTRY.increment("cache_policy_total", outcome=REFRESHED if stale else FRESH)
+    return stale
+
+def counts():
+    """
+    Returns how many dockets had each outcome so far, as a dictionary.
+    """
+    return {outcome: metrics.REGISTRY.value("cache_policy_total", outcome=outcome) for outcome in (FRESH, REFRESHED, UNKNOWN)}
+
+def print_report(before):
+    """
+    Takes in the counts() from before a download. Prints how many uncached downloads the dockets downloaded since avoided.
+    """
+    after = counts()
+    fresh, refreshed, unknown = (after[outcome] - before[outcome] for outcome in (FRESH, REFRESHED, UNKNOWN))
+    if fresh + refreshed + unknown == 0:
+        return
+    print(f"{refreshed} dockets were older than {config.uncachedAfterDays} days in the cache and were downloaded again "
+          f"uncached. {fresh + unknown} uncached downloads were avoided ({unknown} of those dockets didn't show their age).")
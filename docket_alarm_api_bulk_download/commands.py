@@ -0,0 +1,315 @@
+# Built-in Modules
+import os
+import argparse
+# Internal Modules
+import config
+import global_variables
+
+# This module handles running the program from the command line with arguments, for tasks that need to run
+# without anyone at the keyboard (like a worker on a remote machine).
+# When the program is started without arguments, the interactive menus are shown instead.
+
+def job_from_args(args):
+    """
+    Returns the job (see jobs.py) for the input csv, folders, client matter and cached setting given on the command line.
+    Folders that aren't given are the defaults in global_variables.py.
+    """
+    import jobs
+    return jobs.Job(csvInputPath=args.csv, jsonOutputPath=args.json_dir, pdfOutputPath=args.pdf_dir,
+                    clientMatter=args.client_matter, isCached=not args.uncached)
+
+def queue_seed(args):
+    """
+    Adds the dockets from an input csv to a shared queue file.
+    """
+    import work_queue
+    added = work_queue.seed_queue(args.queue, job_from_args(args))
+    print(f"Added {added} dockets to {args.queue}.")
+
+def download(args):
+    """
+    Downloads the JSON for every docket in an input csv, and then optionally their PDFs.
+    """
+    import get_json, get_pdfs
+    job = job_from_args(args)
+    # The limits given on the command line replace the ones in config.py for this run.
+    if args.priority is not None:
+        config.pdfPriority = args.priority
+    if args.max_per_docket is not None:
+        config.maxDocumentsPerDocket = args.max_per_docket
+    if args.max_documents is not None:
+        config.maxDocumentsPerRun = args.max_documents
+    if args.max_spend is not None:
+        config.maxSpendPerRun = args.max_spend
+    if args.filter is not None:
+        config.pdfFilter = args.filter
+    if args.uncached_after_days is not None:
+        config.uncachedAfterDays = args.uncached_after_days
+    if args.archive:
+        config.outputMode = "archive"
+        config.archiveFormat = args.archive
+    # The filter is checked now, so a mistake in it is found before the JSON download starts rather than after.
+    import filters
+    filters.compile_filter()
+    get_json.thread_download_json(job)
+    if args.pdfs:
+        get_pdfs.thread_download_pdfs(get_pdfs.iter_urls(job.jsonOutputPath, job), job)
+
+def crawl(args):
+    """
+    Downloads the JSON for every docket in an input csv and their related dockets, and then optionally their PDFs.
+    """
+    import crawl, get_pdfs
+    job = job_from_args(args)
+    if args.threads_per_depth is not None:
+        config.crawlThreadsPerDepth = args.threads_per_depth
+    crawl.thread_crawl_json(job, depth=args.depth, max_related=args.max_related)
+    if args.pdfs:
+        get_pdfs.thread_download_pdfs(get_pdfs.iter_urls(job.jsonOutputPath, job), job)
+
+def watch(args):
+    """
+    Polls the dockets in an input csv for new entries, each as often as it gets them, and optionally downloads their PDFs.
+    """
+    import watch
+    job = job_from_args(args)
+    if args.once:
+        watch.poll_once(job, pdfs=args.pdfs, state_path=args.state)
+    else:
+        watch.watch(job, pdfs=args.pdfs, state_path=args.state)
+
+def plan(args):
+    """
+    Works out what downloading the PDFs linked in a folder of JSON files would get, without downloading them, and saves the plan.
+    """
+    import get_pdfs, planner, jobs
+    job = jobs.Job(jsonOutputPath=args.json_dir, pdfOutputPath=args.pdf_dir, clientMatter=args.client_matter)
+    result = planner.make_plan(get_pdfs.iter_urls(job.jsonOutputPath, job), job, probe_sizes=not args.no_probe)
+    planner.print_plan(result)
+    print(f"\nThe plan was saved to {planner.save_plan(result, args.output)}")
+
+def run_plan(args):
+    """
+    Downloads the PDFs in a plan saved by the plan command.
+    """
+    import get_pdfs, planner
+    job, link_list = planner.load_plan(args.plan)
+    get_pdfs.thread_download_pdfs(link_list, job)
+
+def missing_docs(args):
+    """
+    Recovers the documents missing from the dockets in a folder of JSON files, and downloads them.
+    """
+    import pull_missing_docs, jobs
+    job = jobs.Job(jsonOutputPath=args.json_dir, pdfOutputPath=args.pdf_dir, clientMatter=args.client_matter)
+    if args.threads is not None:
+        config.missingDocsThreads = args.threads
+    pull_missing_docs.thread_download_missing_pdfs(job)
+
+def menus(args):
+    """
+    Shows the interactive menus. This is what runs when no command is given.
+    """
+    import menus
+    menus.welcome()
+
+def worker(args):
+    """
+    Downloads dockets and PDFs from a shared queue file until no work is left.
+    """
+    import work_queue
+    work_queue.run_worker(args.queue, batch_size=args.batch_size)
+
+def daemon(args):
+    """
+    Stays running, and runs the pulls sent to it over a local HTTP API.
+    """
+    import daemon
+    daemon.serve(args.port, args.max_jobs)
+
+def submit(args):
+    """
+    Sends a pull to a running daemon, and prints its id.
+    """
+    import json
+    import requests
+    request = {"csv": os.path.abspath(args.csv), "client_matter": args.client_matter, "uncached": args.uncached, "pdfs": args.pdfs}
+    if args.json_dir:
+        request["json_dir"] = os.path.abspath(args.json_dir)
+    if args.pdf_dir:
+        request["pdf_dir"] = os.path.abspath(args.pdf_dir)
+    response = requests.post(f"http://127.0.0.1:{args.port or config.daemonPort}/jobs", json=request, timeout=60)
+    result = response.json()
+    if response.status_code != 202:
+        print(f"The daemon didn't take the pull: {result['error']}")
+        return
+    print(f"Sent as job {result['id']}. Check on it at http://127.0.0.1:{args.port or config.daemonPort}/jobs/{result['id']}")
+
+def reprocess(args):
+    """
+    Rebuilds the link list and spreadsheets from a directory of downloaded JSON files using a pool of processes.
+    """
+    import reprocess
+    reprocess.reprocess(args.json_dir, args.output_dir, processes=args.processes)
+
+def tables(args):
+    """
+    Generates the 4 spreadsheets from a directory of downloaded JSON files without calling the API.
+    """
+    import generate_spreadsheets
+    output_directory = generate_spreadsheets.directory_to_tables(args.json_dir, args.output_dir, output_format=args.format)
+    print(f"Spreadsheets saved to {output_directory}")
+
+def ingest(args):
+    """
+    Loads downloaded JSON files into the docket database.
+    """
+    import docket_store
+    docket_store.ingest_directory(args.json_dir, args.database)
+
+def search(args):
+    """
+    Searches the contents of downloaded docket entries without calling the API.
+    """
+    import search_index, docket_store
+    database_path = args.database or docket_store.default_database_path(args.json_dir)
+    if args.json_dir:
+        # The database is brought up to date with the JSON folder first. Only new and changed dockets are loaded.
+        docket_store.ingest_directory(args.json_dir, database_path)
+    search_index.print_results(search_index.search(args.query, database_path, limit=args.limit))
+
+def build_parser():
+    """
+    Returns the argument parser for every command the program accepts.
+    """
+    parser = argparse.ArgumentParser(prog="docket-alarm-api-bulk-download",
+                                     description="Uses the Docket Alarm API to pull state court cases in bulk. Run without arguments for the interactive menus.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run, and save the results to the log folder. Use without a command to profile a run from the menus.")
+    parser.set_defaults(function=menus)
+    subparsers = parser.add_subparsers(dest="command")
+
+    download_parser = subparsers.add_parser("download", help="Download the JSON (and optionally the PDFs) for every docket in a csv.")
+    download_parser.add_argument("csv", help="Path to the input csv.")
+    download_parser.add_argument("--json-dir", help="Where to save the JSON files.")
+    download_parser.add_argument("--pdf-dir", help="Where to save the PDF files.")
+    download_parser.add_argument("--pdfs", action="store_true", help="Also download the PDFs linked in the dockets. (Courts may charge for each document.)")
+    download_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    download_parser.add_argument("--uncached", action="store_true", help="Pull uncached dockets. (This may result in extra charges.)")
+    download_parser.add_argument("--priority", nargs="*", choices=["main_documents_first", "newest_first", "oldest_first", "lowest_entry_first"],
+                                 help="The order to download PDFs in. (Default: pdfPriority in config.py)")
+    download_parser.add_argument("--max-per-docket", type=int, help="The most PDFs to download from one docket.")
+    download_parser.add_argument("--max-documents", type=int, help="The most PDFs to download in this run.")
+    download_parser.add_argument("--max-spend", type=float, help="The most the PDFs in this run may cost, estimated with documentFeeEstimates in config.py.")
+    download_parser.add_argument("--filter", help='Only download PDFs from docket entries matching this filter, like: after:2020-01-01 contents:"order|judgment" exhibits:no')
+    download_parser.add_argument("--uncached-after-days", type=int, help="Download a docket again uncached when its cached copy is older than this many days. (Default: uncachedAfterDays in config.py)")
+    download_parser.add_argument("--archive", choices=["zip", "tar"], help="Save the dockets into compressed .jsonl.gz shards, and the PDFs into zip or tar archives, instead of one file each.")
+    download_parser.set_defaults(function=download)
+
+    crawl_parser = subparsers.add_parser("crawl", help="Download every docket in a csv, and the dockets related to them (appeals, consolidated and transferred cases).")
+    crawl_parser.add_argument("csv", help="Path to the input csv.")
+    crawl_parser.add_argument("--json-dir", help="Where to save the JSON files.")
+    crawl_parser.add_argument("--pdf-dir", help="Where to save the PDF files.")
+    crawl_parser.add_argument("--pdfs", action="store_true", help="Also download the PDFs linked in the dockets. (Courts may charge for each document.)")
+    crawl_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    crawl_parser.add_argument("--uncached", action="store_true", help="Pull uncached dockets. (This may result in extra charges.)")
+    crawl_parser.add_argument("--depth", type=int, help="How many steps of related dockets to follow. (Default: crawlDepth in config.py)")
+    crawl_parser.add_argument("--threads-per-depth", type=int, nargs="+", help="How many dockets to download at once at each depth, starting with the csv. (Default: crawlThreadsPerDepth in config.py)")
+    crawl_parser.add_argument("--max-related", type=int, help="The most related dockets to download. (Default: crawlMaxRelatedDockets in config.py)")
+    crawl_parser.set_defaults(function=crawl)
+
+    watch_parser = subparsers.add_parser("watch", help="Keep polling the dockets in a csv for new entries. Busy dockets are polled often, and quiet ones rarely.")
+    watch_parser.add_argument("csv", help="Path to the input csv. Dockets added to or removed from it are picked up as it runs.")
+    watch_parser.add_argument("--json-dir", help="Where to save the JSON files.")
+    watch_parser.add_argument("--pdf-dir", help="Where to save the PDF files.")
+    watch_parser.add_argument("--pdfs", action="store_true", help="Download the PDFs of new docket entries. (Courts may charge for each document.)")
+    watch_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    watch_parser.add_argument("--uncached", action="store_true", help="Pull uncached dockets, so new entries are seen sooner. (This may result in extra charges.)")
+    watch_parser.add_argument("--state", help="Path to the watch list file. (Default: watch.sqlite3 in the JSON directory)")
+    watch_parser.add_argument("--once", action="store_true", help="Poll the dockets that are due once and stop, for running on a schedule.")
+    watch_parser.set_defaults(function=watch)
+
+    plan_parser = subparsers.add_parser("plan", help="Show how many PDFs a download would get, how big they are and how long it would take, without downloading them.")
+    plan_parser.add_argument("json_dir", help="The directory of JSON files to read the PDF links from.")
+    plan_parser.add_argument("--pdf-dir", help="Where the PDF files will be saved.")
+    plan_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    plan_parser.add_argument("--no-probe", action="store_true", help="Don't ask the servers for the size of each document.")
+    plan_parser.add_argument("--output", help="Where to save the plan. (Default: the log folder)")
+    plan_parser.set_defaults(function=plan)
+
+    run_plan_parser = subparsers.add_parser("run-plan", help="Download the PDFs in a plan saved by the plan command.")
+    run_plan_parser.add_argument("plan", help="Path to the plan file.")
+    run_plan_parser.set_defaults(function=run_plan)
+
+    missing_parser = subparsers.add_parser("missing-docs", help="Find the docket entries saved without a document link, look their dockets up again, and download the documents found.")
+    missing_parser.add_argument("json_dir", help="The directory of JSON files to look for missing documents in.")
+    missing_parser.add_argument("--pdf-dir", help="Where to save the PDF files.")
+    missing_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull. (Dockets are pulled uncached, which may result in extra charges.)")
+    missing_parser.add_argument("--threads", type=int, help="How many dockets to look up at once. (Default: missingDocsThreads in config.py)")
+    missing_parser.set_defaults(function=missing_docs)
+
+    seed_parser = subparsers.add_parser("queue-seed", help="Add the dockets in a csv to a queue file shared by several workers.")
+    seed_parser.add_argument("queue", help="Path to the queue file. It should be on a volume every worker can reach.")
+    seed_parser.add_argument("csv", help="Path to the input csv.")
+    seed_parser.add_argument("--json-dir", help="Where the workers save JSON files. Must be reachable by every worker.")
+    seed_parser.add_argument("--pdf-dir", help="Where the workers save PDF files. Must be reachable by every worker.")
+    seed_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    seed_parser.add_argument("--uncached", action="store_true", help="Pull uncached dockets. (This may result in extra charges.)")
+    seed_parser.set_defaults(function=queue_seed)
+
+    worker_parser = subparsers.add_parser("worker", help="Download work from a shared queue file until none is left.")
+    worker_parser.add_argument("queue", help="Path to the queue file created by queue-seed.")
+    worker_parser.add_argument("--batch-size", type=int, help="How many tasks to claim at a time.")
+    worker_parser.set_defaults(function=worker)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Stay running, and run pulls sent to http://127.0.0.1:<port>/jobs.")
+    daemon_parser.add_argument("--port", type=int, help="The port to listen on. (Default: daemonPort in config.py)")
+    daemon_parser.add_argument("--max-jobs", type=int, help="How many pulls to run at once. (Default: daemonMaxJobs in config.py)")
+    daemon_parser.set_defaults(function=daemon)
+
+    submit_parser = subparsers.add_parser("submit", help="Send a pull to a running daemon.")
+    submit_parser.add_argument("csv", help="Path to the input csv.")
+    submit_parser.add_argument("--json-dir", help="Where to save the JSON files.")
+    submit_parser.add_argument("--pdf-dir", help="Where to save the PDF files.")
+    submit_parser.add_argument("--pdfs", action="store_true", help="Also download the PDFs linked in the dockets. (Courts may charge for each document.)")
+    submit_parser.add_argument("--client-matter", default="", help="The client or matter code used to bill this pull.")
+    submit_parser.add_argument("--uncached", action="store_true", help="Pull uncached dockets. (This may result in extra charges.)")
+    submit_parser.add_argument("--port", type=int, help="The port the daemon listens on. (Default: daemonPort in config.py)")
+    submit_parser.set_defaults(function=submit)
+
+    reprocess_parser = subparsers.add_parser("reprocess", help="Rebuild the link list and spreadsheets from downloaded JSON files, using every processor core.")
+    reprocess_parser.add_argument("json_dir", help="The directory of JSON files to read.")
+    reprocess_parser.add_argument("output_dir", help="The directory to save the csv files to.")
+    reprocess_parser.add_argument("--processes", type=int, help="How many processes to use. (Default: one per processor core)")
+    reprocess_parser.set_defaults(function=reprocess)
+
+    tables_parser = subparsers.add_parser("tables", help="Generate the 4 spreadsheets from downloaded JSON files without calling the API.")
+    tables_parser.add_argument("json_dir", help="The directory of JSON files to read.")
+    tables_parser.add_argument("output_dir", help="The directory to create the output folder in.")
+    tables_parser.add_argument("--format", choices=["csv", "xlsx"], help="The format to save the spreadsheets in. (Default: spreadsheetFormat in config.py)")
+    tables_parser.set_defaults(function=tables)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Load downloaded JSON files into a database. Only new and changed dockets are loaded.")
+    ingest_parser.add_argument("json_dir", help="The directory of JSON files to read.")
+    ingest_parser.add_argument("--database", help="Path to the database file. (Default: dockets.sqlite3 in the JSON directory)")
+    ingest_parser.set_defaults(function=ingest)
+
+    search_parser = subparsers.add_parser("search", help="Search the contents of docket entries you already downloaded. No API calls are made.")
+    search_parser.add_argument("query", help='The words to search for, like: motion AND dismiss, "summary judgment", or sanction*')
+    search_parser.add_argument("--json-dir", help="A directory of JSON files to load (only new and changed dockets) before searching.")
+    search_parser.add_argument("--database", help="Path to the database file. (Default: dockets.sqlite3 in the JSON directory)")
+    search_parser.add_argument("--limit", type=int, help="The most results to show.")
+    search_parser.set_defaults(function=search)
+
+    return parser
+
+def main(argv):
+    """
+    Takes in a list of command line arguments and runs the command they specify.
+    """
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        import profiling
+        profiling.profile_run(args.function, args)
+    else:
+        args.function(args)
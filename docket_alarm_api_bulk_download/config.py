@@ -9,6 +9,16 @@ spreadsheet = "input.csv"
 # (UnCached versions may be more expensive.)
 isCached = True
 
+# When dockets are downloaded cached (the default), each docket whose cached copy is older than this many days is
+# downloaded again uncached. Its age is when Docket Alarm last updated it. This keeps uncached downloads, which are
+# slower and may cost more, to the dockets that need them. None never downloads uncached.
+uncachedAfterDays = None
+
+# Dockets that don't say when they were last updated are kept as they are. Set this to True to judge their age by
+# the date of their newest entry instead. A case with no recent filings will then be downloaded again uncached on
+# every run, even if its cached copy is current.
+uncachedUseEntryDates = False
+
 # Do you want to use the GUI version of the program, or the command-line-interface version?
 isGUI = False
 
@@ -18,3 +28,189 @@ isGUI = False
 # will attempt to reformat those case numbers.
 formatCaseNos = False
 
+
+# These settings are used when several machines split one pull through a shared queue file.
+# How many seconds a worker's claim on a batch of tasks lasts before another worker may take it over.
+# Workers renew their claims while they are working, so this only matters when a worker stops unexpectedly.
+queueLeaseSeconds = 300
+
+# How many tasks a worker claims at a time.
+queueBatchSize = 25
+
+# How many seconds a worker with nothing to do waits before checking the queue again.
+queuePollSeconds = 10
+
+# How many times a task is attempted before it is marked as failed.
+queueMaxAttempts = 3
+
+# These settings are used by the daemon (python docket_alarm_api_bulk_download daemon), which stays running and takes
+# pulls sent to it at http://127.0.0.1:<daemonPort>/jobs.
+daemonPort = 8470
+
+# How many pulls the daemon runs at once. Pulls sent while this many are running wait, and start in the order they were sent.
+daemonMaxJobs = 2
+
+# These settings are used by the crawl command (python docket_alarm_api_bulk_download crawl), which downloads the
+# dockets in a csv and then the dockets related to them (appeals, consolidated and transferred cases).
+# How many steps away from the dockets in the csv related dockets are followed. 1 downloads the dockets related to the
+# ones in the csv, 2 also downloads the dockets related to those, and so on. 0 downloads only the csv.
+crawlDepth = 1
+
+# How many dockets are downloaded at once at each depth, starting with the dockets in the csv. Depths past the end of
+# the list use its last number. Fewer threads further out keep a large family of cases from flooding the API.
+crawlThreadsPerDepth = [16, 8, 4]
+
+# The most related dockets one crawl downloads, on top of the dockets in the csv. Each one may cost money, and a few
+# steps of related dockets can reach a lot of cases. None doesn't limit them.
+crawlMaxRelatedDockets = 1000
+
+# These settings are used by the watch command (python docket_alarm_api_bulk_download watch), which polls the dockets in
+# a csv for new entries. Each docket gets its own wait between polls: it is halved when new entries are found, and
+# doubled when none are, staying between watchMinHours and watchMaxHours. Busy dockets are polled often, quiet ones rarely.
+watchStartHours = 24
+watchMinHours = 6
+watchMaxHours = 24 * 30
+
+# The most dockets polled in one round. Dockets left over are polled first in the next round. None doesn't limit them.
+watchMaxPollsPerRound = None
+
+# These settings are used when documents missing from saved dockets are recovered (python docket_alarm_api_bulk_download
+# missing-docs). Each docket with entries saved without a link is looked up in its court's system and pulled again
+# uncached, which may result in extra charges.
+# How many dockets are looked up at once.
+missingDocsThreads = 8
+
+# The most searchdirect and searchpacer lookups started each second, by every lookup thread together. None leaves
+# them to maxRequestsPerSecond alone.
+missingDocsRequestsPerSecond = 2
+
+# Do you want downloaded dockets loaded into the searchable database (dockets.sqlite3 in the JSON folder)
+# as soon as a JSON download finishes? Only new and changed dockets are loaded, so this is quick.
+# This keeps the search of downloaded docket entries (More options [6]) up to date after every pull.
+ingestAfterDownload = True
+
+# How many dockets are loaded into the database between saves.
+docketStoreCommitEvery = 500
+
+# The most results shown when searching the docket entries you already downloaded.
+searchResultsLimit = 50
+
+# The format the 4 spreadsheets made from dockets (see generate_spreadsheets.py) are saved in: "csv" or "xlsx".
+# xlsx files are written one row at a time, so even very large spreadsheets don't need much memory.
+spreadsheetFormat = "csv"
+
+
+# Do you want to watch how a pull is going while it runs? Set this to a port number (like 9108), and the timings of
+# API calls and file writes, bytes transferred and tasks waiting can be viewed at http://127.0.0.1:<port>/metrics
+# (in the format Prometheus reads) or /metrics.json. None turns this off.
+metricsPort = None
+
+# Do you want a summary of those timings saved to the log folder when a download finishes?
+saveMetricsSummary = True
+
+
+# These settings decide which PDFs a download gets, and in what order. Courts may charge for each document, so on a
+# pull that is limited by time or money you can have the most valuable documents downloaded first, and stop at a limit.
+# The order documents are downloaded in. Leave the list empty to download them in the order they are found.
+# The rules are applied in the order listed. Choose from:
+#   "main_documents_first" - main documents before their exhibits.
+#   "newest_first" / "oldest_first" - by the date of the docket entry.
+#   "lowest_entry_first" - by the docket entry number.
+pdfPriority = []
+
+# The most documents downloaded from any one docket. None means no limit.
+maxDocumentsPerDocket = None
+
+# The most documents downloaded in one run. None means no limit.
+maxDocumentsPerRun = None
+
+# The most that the documents downloaded in one run may cost, estimated with the fees below. None means no limit.
+maxSpendPerRun = None
+
+# The estimated fee for each document, by court name (as it appears in the docket's 'court' field), like:
+# documentFeeEstimates = {"Texas State, Harris County, District Court": 1.00}
+# Courts not listed use defaultDocumentFee.
+documentFeeEstimates = {}
+defaultDocumentFee = 0.0
+
+# Only download the PDFs of docket entries that match this filter. Leave it empty to download every PDF.
+# Terms are separated by spaces, and a document must match all of them:
+#   after:2020-01-01  before:2021-12-31   the date the docket entry was filed
+#   contents:"order|judgment"             a regular expression the text of the docket entry must match
+#   exclude:"notice"                      a regular expression the text of the docket entry must not match
+#   number:1-50,75                        docket entry numbers
+#   exhibits:no                           leave out exhibits (or exhibits:only for only exhibits)
+# For example: pdfFilter = 'after:2020-01-01 contents:"order|judgment" exhibits:no'
+pdfFilter = ""
+
+# How many PDFs are downloaded at once. None uses one thread per processor core plus 4, up to 32.
+pdfDownloadThreads = None
+
+# The most PDFs downloaded at once from any one server. PDF links can point at several servers, and this keeps
+# one slow server from taking up every download thread.
+maxConnectionsPerHost = 8
+
+# These settings are used when a PDF download is planned before it starts (python docket_alarm_api_bulk_download plan).
+# Whether each document's server is asked for its size. This sends a HEAD request, which doesn't download the document.
+planProbeSizes = True
+
+# The speed of one download connection in megabytes per second, used to estimate how long a planned download will take.
+planMegabytesPerSecond = 2.0
+
+# The most requests made to Docket Alarm each second, by every download in the program together (including jobs
+# running at the same time). None doesn't limit them.
+maxRequestsPerSecond = None
+
+# How many minutes a login token is used before logging in again. Every download in the program shares the token.
+loginTokenMinutes = 10
+
+# How many dockets or PDF links are read ahead of the downloads. Tasks are read from the input csv and the saved JSON
+# as the downloads need them, so memory use stays the same however large the pull is.
+taskWindow = 1000
+
+# Whether each downloaded PDF is checked to really be a PDF (and not, for example, an error page or a download that
+# stopped short). The checks run in a pool of processes while the downloads continue.
+validatePdfs = True
+
+# Whether PDFs that fail the check are downloaded again once the other downloads finish.
+redownloadInvalidPdfs = True
+
+# How many processes check PDFs. None uses one per processor core.
+pdfValidationProcesses = None
+
+# Whether the pages of each PDF are counted for manifest.csv. Counting opens every file, which takes longer.
+pdfValidationCountPages = True
+
+# How downloads are saved. "files" saves each docket as its own .json file, and each PDF in a folder for its docket.
+# "archive" saves dockets as lines in compressed .jsonl.gz shards, and PDFs into ZIP or tar archives, with an index.csv
+# in each output folder listing where every docket and PDF went. This is much faster on network storage. See archives.py.
+outputMode = "files"
+
+# The kind of archive PDFs are saved into when outputMode is "archive": "zip" or "tar".
+archiveFormat = "zip"
+
+# How many PDFs go into each archive. None makes one archive per docket.
+archiveBatchSize = None
+
+# How many dockets go into each .jsonl.gz shard.
+jsonShardSize = 1000
+
+# The most PDF archives kept open at once while downloading.
+maxOpenArchives = 32
+
+# Where downloaded dockets and PDFs are written. "local" writes them to the output folders on this computer.
+# "s3" streams them straight to an S3-compatible object store, with the output folder's name as part of each key.
+# This needs boto3 (pip install boto3), and login details set up the usual way for boto3 (like AWS_ACCESS_KEY_ID).
+# See storage.py.
+storageBackend = "local"
+
+# The bucket, and the start of every key, used when storageBackend is "s3".
+s3Bucket = ""
+s3Prefix = ""
+
+# The address of the object store, for stores other than Amazon S3 (like a MinIO server, "http://localhost:9000").
+s3EndpointUrl = None
+
+# The size of each part of a multipart upload in bytes (at least 5MB), and how many parts are sent at once.
+s3PartSize = 8 * 1024 * 1024
+s3UploadConcurrency = 4
@@ -0,0 +1,150 @@
+# Built-in Modules
+import os
+import time
+# Third-party Modules
+from tqdm import tqdm
+# Internal Modules
+import config
+import jobs
+import metrics
+import archives
+import host_queue
+import task_records
+import cache_policy
+
+# Dockets list the dockets related to them, like appeals, consolidated cases and cases transferred in or out
+# ("related" in the docket's JSON, Docket.related in user_tools.py). A crawl downloads the dockets in the input csv,
+# then the dockets related to them, then the dockets related to those, up to crawlDepth steps away (in config.py), so a
+# whole family of cases can be pulled from a csv that lists only one of them.
+#
+# The crawl goes one depth at a time. The dockets at each depth are downloaded at once, crawlThreadsPerDepth at a time,
+# and every docket is downloaded only once, however many dockets it is related to.
+# Related dockets are saved like any other docket, named with the case name of the docket in the csv they were found
+# from, so each family's files sit together. Their PDFs are downloaded by get_pdfs.py like the rest.
+
+def docket_key(caseNo, caseCourt):
+    """
+    Takes in a docket number and court. Returns the key the crawl knows the docket by, which is the same however
+    the docket number and court are spaced or capitalized.
+    """
+    return (" ".join(str(caseCourt).split()).lower(), " ".join(str(caseNo).split()).lower())
+
+def related_dockets(docket_json):
+    """
+    Takes in a docket's JSON as a dictionary. Returns a list of (docket number, court) for each of its related dockets.
+    Related dockets listed without a court are in the same court as the docket. Ones without a docket number are left out.
+    """
+    court = (docket_json.get("info") or {}).get("court")
+    related = []
+    for item in docket_json.get("related") or []:
+        if not isinstance(item, dict):
+            continue
+        number = item.get("docket") or item.get("docket_number")
+        if number:
+            related.append((number, item.get("court") or court))
+    return related
+
+def threads_for_depth(depth):
+    """
+    Returns how many dockets are downloaded at once at the depth specified (0 is the dockets in the csv).
+    """
+    threads = config.crawlThreadsPerDepth
+    if not isinstance(threads, (list, tuple)):
+        return threads
+    return threads[min(depth, len(threads) - 1)] if threads else None
+
+def crawl(job=None, depth=None, max_related=None):
+    """
+    Downloads the dockets of the job given (see jobs.py), or by default the ones set in the menus, and their related
+    dockets up to depth steps away.
+    Optional arguments:
+    depth - how many steps of related dockets to follow (crawlDepth in config.py by default).
+    max_related - the most related dockets to download (crawlMaxRelatedDockets in config.py by default).
+    Returns the number of dockets that were saved, counting the ones in the csv.
+    """
+    # We import get_json here rather than at the top of the module, because it loads the GUI modules.
+    import get_json
+
+    job = jobs.current(job)
+    depth = config.crawlDepth if depth is None else depth
+    max_related = config.crawlMaxRelatedDockets if max_related is None else max_related
+    context = job.json_context()
+
+    # Every docket the crawl has seen, downloaded or waiting to be. A docket listed twice in the csv is downloaded once too.
+    visited = set()
+    level = []
+    for task in get_json.iter_table_tuples(job):
+        key = docket_key(task.caseNo, task.caseCourt)
+        if key not in visited:
+            visited.add(key)
+            level.append(task)
+
+    def download(task):
+        related = []
+        saved = get_json.download_json_from_list_of_tuples(task, on_docket=lambda docket: related.extend(related_dockets(docket)))
+        return task, saved, related
+
+    job.start_stage("json")
+    saved = related_count = left_out = 0
+    for current_depth in range(depth + 1):
+        if not level:
+            break
+        print(f"Downloading {len(level)} dockets at depth {current_depth}...")
+        progress = tqdm(total=len(level))
+        next_level = []
+
+        # This runs in this thread as each download finishes, so visited and next_level need no lock.
+        def done(result):
+            nonlocal saved, related_count, left_out
+            task, succeeded, related = result
+            saved += 1 if succeeded else 0
+            progress.update()
+            job.task_done("json", succeeded)
+            if current_depth == depth:
+                return
+            for caseNo, caseCourt in related:
+                key = docket_key(caseNo, caseCourt)
+                if key in visited:
+                    continue
+                visited.add(key)
+                if max_related is not None and related_count >= max_related:
+                    left_out += 1
+                    continue
+                related_count += 1
+                next_level.append(task_records.JsonTask(task.caseName, caseNo, caseCourt, job.jsonOutputPath,
+                                                        job.clientMatter, job.isCached, context=context))
+
+        # The queue depth in the metrics counts down the dockets at this depth.
+        host_queue.run_windowed(metrics.track_queue(download, "json", len(level)), level,
+                                max_workers=threads_for_depth(current_depth), on_done=done)
+        progress.close()
+        level = next_level
+
+    if left_out:
+        print(f"{left_out} related dockets were left out, because crawlMaxRelatedDockets in config.py is {max_related}.")
+    return saved
+
+def thread_crawl_json(job=None, depth=None, max_related=None):
+    """
+    Wrapper for crawl() that finishes the download the same way get_json.thread_download_json() does: it closes the
+    job's archives, saves the metrics, loads the dockets into the database and opens the JSON folder, as config.py asks.
+    Returns the number of dockets that were saved.
+    """
+    job = jobs.current(job)
+    print("Downloading JSON files and their related dockets...")
+    metrics.start_server()
+    start = time.perf_counter()
+    cache_counts = cache_policy.counts()
+    saved = crawl(job, depth, max_related)
+    print(f"Finished downloading {saved} JSON files in {round(time.perf_counter() - start)} seconds.")
+    cache_policy.print_report(cache_counts)
+    archives.close_all(job.jsonOutputPath)
+    if config.saveMetricsSummary:
+        print(f"Timings saved to {metrics.save_summary()}")
+    import docket_store
+    docket_store.ingest_after_download(job.jsonOutputPath)
+    try:
+        os.startfile(job.jsonOutputPath)
+    except:
+        pass
+    return saved
@@ -0,0 +1,221 @@
+# Built-in Modules
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+import itertools
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Internal Modules
+import config
+import jobs
+import login
+import api_session
+import storage
+
+# Starting a pull from the command line means starting the program again: loading pandas and the other modules,
+# logging in, and opening new connections. The daemon does that once, stays running, and takes pulls sent to it over
+# a small HTTP API on this computer (it only listens on 127.0.0.1):
+#
+#   POST /jobs        starts a pull. The body is JSON, like:
+#                     {"csv": "input.csv", "json_dir": "json", "pdf_dir": "pdf", "client_matter": "", "uncached": false, "pdfs": true}
+#                     or with "dockets": [["Case name", "17-645", "Supreme Court of the United States"], ...] instead of "csv".
+#                     Answers with the pull's id and status.
+#   GET /jobs         the status of every pull sent since the daemon started.
+#   GET /jobs/<id>    the status of one pull, with how many dockets and PDFs it has downloaded so far.
+#
+# Up to daemonMaxJobs pulls (in config.py) run at once, and the rest wait and start in the order they were sent.
+# Every pull shares the daemon's connections, login token and rate limit (see api_session.py).
+
+class DaemonJob:
+    """
+    A pull sent to the daemon, and how it is going.
+    """
+
+    def __init__(self, id, job, pdfs):
+        self.id = id
+        self.job = job
+        self.pdfs = pdfs
+        self.status = "queued"
+        self.error = None
+        self.saved = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        timestamp = lambda seconds: datetime.datetime.fromtimestamp(seconds).isoformat(timespec="seconds") if seconds else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "submitted": timestamp(self.submitted),
+            "started": timestamp(self.started),
+            "finished": timestamp(self.finished),
+            "dockets_saved": self.saved,
+            "progress": self.job.progress_summary(),
+            "csv": None if self.job.dockets is not None else self.job.csvInputPath,
+            "json_dir": self.job.jsonOutputPath,
+            "pdf_dir": self.job.pdfOutputPath if self.pdfs else None,
+        }
+
+def job_from_request(request):
+    """
+    Takes in the JSON body of a POST /jobs request as a dictionary.
+    Returns the jobs.Job it describes, and whether its PDFs are downloaded too.
+    Raises a ValueError if the request is missing something or has something it shouldn't.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("The request must be a JSON object.")
+    unknown = set(request) - {"csv", "dockets", "json_dir", "pdf_dir", "client_matter", "uncached", "pdfs"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if ("csv" in request) == ("dockets" in request):
+        raise ValueError("Send either 'csv' (the path to an input csv) or 'dockets' (a list of [case name, docket number, court]).")
+    dockets = request.get("dockets")
+    if dockets is not None:
+        if not isinstance(dockets, list) or not all(isinstance(docket, list) and len(docket) == 3 for docket in dockets):
+            raise ValueError("'dockets' must be a list of [case name, docket number, court].")
+        dockets = [tuple(docket) for docket in dockets]
+    elif not os.path.isfile(request["csv"]):
+        raise ValueError(f"The csv {request['csv']} doesn't exist.")
+    job = jobs.Job(csvInputPath=request.get("csv"), jsonOutputPath=request.get("json_dir"), pdfOutputPath=request.get("pdf_dir"),
+                   clientMatter=request.get("client_matter"), isCached=not request.get("uncached", False), dockets=dockets)
+    return job, bool(request.get("pdfs", False))
+
+class Daemon:
+    """
+    Runs the pulls sent to it over HTTP, on the local port specified (daemonPort in config.py by default).
+    Optional arguments:
+    port - the port to listen on. 0 picks a free one.
+    max_jobs - how many pulls run at once (daemonMaxJobs in config.py by default).
+    """
+
+    def __init__(self, port=None, max_jobs=None):
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # The pool takes pulls in the order they were sent, so a pull never waits behind one sent after it.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_jobs or config.daemonMaxJobs)
+        self._server = ThreadingHTTPServer(("127.0.0.1", config.daemonPort if port is None else port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def warm_up(self):
+        """
+        Loads the download modules and logs in, so the first pull doesn't wait for either.
+        """
+        # We import the download modules here rather than at the top of the module, because they load the GUI modules.
+        import get_json, get_pdfs
+        try:
+            user = login.Credentials()
+        except OSError:
+            print("Not logged in yet. Run the program once without arguments to log in.")
+            return
+        api_session.shared().login_token(user.username, user.password)
+
+    def start(self):
+        self.warm_up()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        # Pulls still waiting to start are dropped. Running pulls are finished.
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, job, pdfs=False):
+        """
+        Takes in a jobs.Job, and whether its PDFs are downloaded too. Queues it to run, and returns its DaemonJob.
+        """
+        with self._lock:
+            daemon_job = DaemonJob(str(next(self._ids)), job, pdfs)
+            self.jobs[daemon_job.id] = daemon_job
+        self._executor.submit(self._run, daemon_job)
+        return daemon_job
+
+    def _run(self, daemon_job):
+        import get_json, get_pdfs
+        daemon_job.status, daemon_job.started = "running", time.time()
+        try:
+            if storage.for_directory(daemon_job.job.jsonOutputPath).local:
+                os.makedirs(daemon_job.job.jsonOutputPath, exist_ok=True)
+            daemon_job.saved = get_json.thread_download_json(daemon_job.job)
+            if daemon_job.pdfs:
+                job = daemon_job.job
+                get_pdfs.thread_download_pdfs(get_pdfs.iter_urls(job.jsonOutputPath, job), job)
+            daemon_job.status = "finished"
+        except Exception as error:
+            # A pull that fails (or asks for input, which the daemon can't give) doesn't stop the others.
+            daemon_job.status, daemon_job.error = "failed", f"{type(error).__name__}: {error}"
+        finally:
+            daemon_job.finished = time.time()
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                # Requests are not printed, so they don't get in the way of the progress bars.
+                pass
+
+            def _send(self, status, body):
+                body = json.dumps(body, indent=3).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.rstrip("/")
+                if path == "/jobs":
+                    with daemon._lock:
+                        daemon_jobs = list(daemon.jobs.values())
+                    return self._send(200, {"jobs": [daemon_job.to_dict() for daemon_job in daemon_jobs]})
+                if path.startswith("/jobs/"):
+                    daemon_job = daemon.jobs.get(path[len("/jobs/"):])
+                    if daemon_job is not None:
+                        return self._send(200, daemon_job.to_dict())
+                self._send(404, {"error": "Not found."})
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/jobs":
+                    return self._send(404, {"error": "Not found."})
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                    job, pdfs = job_from_request(request)
+                except ValueError as error:
+                    return self._send(400, {"error": str(error)})
+                self._send(202, daemon.submit(job, pdfs).to_dict())
+
+        return Handler
+
+def serve(port=None, max_jobs=None):
+    """
+    Runs the daemon until it is stopped with Ctrl+C.
+    """
+    # Nobody is at the keyboard to answer a question a pull asks, so questions fail the pull rather than wait forever.
+    sys.stdin = open(os.devnull)
+    with Daemon(port, max_jobs) as daemon:
+        print(f"Taking pulls at {daemon.url}/jobs")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopping once the running pulls finish...")
@@ -0,0 +1,279 @@
+# Built-in Modules
+import os
+import json
+import hashlib
+import sqlite3
+import time
+# Third-party Modules
+from tqdm import tqdm
+# Internal Modules
+import config
+import global_variables
+import generate_spreadsheets
+import archives
+import storage
+
+CURRENT_DIR = os.path.dirname(__file__)
+
+# This module loads the JSON files saved by get_json into an SQLite database, so downloaded dockets can be queried
+# without opening thousands of files by hand.
+# The database has a dockets table, and one table for each of the 4 spreadsheets that generate_spreadsheets creates,
+# with the same columns. The rows are built with the same functions the spreadsheets use.
+# Loading is incremental. A docket whose file hasn't changed since it was last loaded is skipped, and for a docket that
+# has changed, only the rows that were added or removed are written, so loading again after a new pull is quick.
+# The contents of the docket entries are also indexed for full-text search. See search_index.
+
+# The name of the database file created inside the JSON folder when no other path is given.
+DEFAULT_DATABASE_NAME = "dockets.sqlite3"
+
+# Each table of rows, with the spreadsheet columns it stores and the names of the matching database columns.
+# Every row table also has a docket_id column pointing at the dockets table, and a row_hash column used to tell
+# which rows changed between loads.
+ROW_TABLES = {
+    'docket_information': (generate_spreadsheets.docketInformation_rows, {
+        'Case Info Field': 'field',
+        'Case Info Values': 'value',
+    }),
+    'docket_entries': (generate_spreadsheets.docketEntries_rows, {
+        'Docket Entry Date': 'entry_date',
+        'Docket Entry Numbers': 'entry_number',
+        'Docket Entry Contents': 'contents',
+        'Link': 'link',
+    }),
+    'parties': (generate_spreadsheets.parties_rows, {
+        'Party Name': 'party_name',
+        'Party Type': 'party_type',
+    }),
+    'attorneys_and_firms': (generate_spreadsheets.attorneysAndFirms_rows, {
+        'Attorney Name': 'attorney_name',
+        'Attorney Firm': 'attorney_firm',
+        'Attorney Email': 'attorney_email',
+        'Attorney Phone': 'attorney_phone',
+    }),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dockets (
+    id INTEGER PRIMARY KEY,
+    court TEXT,
+    docket_number TEXT,
+    case_title TEXT,
+    source_file TEXT,
+    file_hash TEXT,
+    loaded_at REAL,
+    UNIQUE (court, docket_number)
+);
+CREATE TABLE IF NOT EXISTS docket_information (
+    docket_id INTEGER NOT NULL REFERENCES dockets (id),
+    field TEXT,
+    value TEXT,
+    row_hash TEXT NOT NULL,
+    UNIQUE (docket_id, row_hash)
+);
+CREATE TABLE IF NOT EXISTS docket_entries (
+    id INTEGER PRIMARY KEY,
+    docket_id INTEGER NOT NULL REFERENCES dockets (id),
+    entry_date TEXT,
+    entry_number TEXT,
+    contents TEXT,
+    link TEXT,
+    row_hash TEXT NOT NULL,
+    UNIQUE (docket_id, row_hash)
+);
+CREATE TABLE IF NOT EXISTS parties (
+    docket_id INTEGER NOT NULL REFERENCES dockets (id),
+    party_name TEXT,
+    party_type TEXT,
+    row_hash TEXT NOT NULL,
+    UNIQUE (docket_id, row_hash)
+);
+CREATE TABLE IF NOT EXISTS attorneys_and_firms (
+    docket_id INTEGER NOT NULL REFERENCES dockets (id),
+    attorney_name TEXT,
+    attorney_firm TEXT,
+    attorney_email TEXT,
+    attorney_phone TEXT,
+    row_hash TEXT NOT NULL,
+    UNIQUE (docket_id, row_hash)
+);
+CREATE INDEX IF NOT EXISTS dockets_by_court ON dockets (court);
+CREATE INDEX IF NOT EXISTS dockets_by_docket_number ON dockets (docket_number);
+CREATE INDEX IF NOT EXISTS dockets_by_source_file ON dockets (source_file);
+CREATE INDEX IF NOT EXISTS docket_entries_by_date ON docket_entries (entry_date);
+CREATE INDEX IF NOT EXISTS parties_by_name ON parties (party_name);
+CREATE INDEX IF NOT EXISTS attorneys_and_firms_by_name ON attorneys_and_firms (attorney_name);
+"""
+
+def default_database_path(input_directory=None):
+    """
+    Returns the path of the database used when no other path is given: a file inside the JSON folder.
+    """
+    return os.path.join(input_directory or global_variables.JSON_INPUT_OUTPUT_PATH, DEFAULT_DATABASE_NAME)
+
+def connect(database_path=None):
+    """
+    Opens the database at the path specified (see default_database_path()), creating its tables if they don't exist yet.
+    Returns an sqlite3 connection.
+    """
+    # We import search_index here, because it imports this module.
+    import search_index
+    connection = sqlite3.connect(database_path or default_database_path())
+    connection.executescript(SCHEMA)
+    # The full-text index over the docket entries is kept in the same database.
+    search_index.create_index(connection)
+    return connection
+
+def _store_value(value):
+    """
+    Converts a value from a docket to something SQLite can store. Lists and dictionaries are stored as JSON text.
+    """
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, sort_keys=True)
+
+def docket_rows(docket, base_filename):
+    """
+    Takes in the docket data from a saved JSON file as a dictionary, and the name of the file without the extension.
+    Returns the docket's court, docket number and title as a dictionary, and a dictionary with the name of each row
+    table as keys, and the rows for that table as lists of tuples, with the row's hash as the last value.
+    """
+    result = generate_spreadsheets.result_from_saved_docket(docket, base_filename)
+    tables = {}
+    for table, (rows_function, columns) in ROW_TABLES.items():
+        rows = rows_function(result, docket)
+        if table == 'docket_entries':
+            # The spreadsheet doesn't have a column for the link to each entry's document, so we add it here.
+            # docketEntries_rows() makes one row per entry in the same order as docket_report.
+            for row, entry in zip(rows, docket['docket_report']):
+                row['Link'] = entry.get('link')
+        values = []
+        for row in rows:
+            value = tuple(_store_value(row.get(column)) for column in columns)
+            # The hash of a row's values tells us whether the same row was already loaded.
+            row_hash = hashlib.sha1(json.dumps(value).encode('utf-8')).hexdigest()
+            values.append(value + (row_hash,))
+        tables[table] = values
+    return result, tables
+
+def _file_hash(path):
+    """
+    Returns a hash of the contents of the file at the path specified.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fileToHash:
+        for chunk in iter(lambda: fileToHash.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def upsert_docket(connection, path, docket=None):
+    """
+    Loads one saved JSON file into the database.
+    A docket read from a compressed shard is passed in as docket, with the name its .json file would have had as path.
+    Returns a dictionary with the id of the docket, and the number of rows added and removed in each table,
+    or None if the file was skipped because it is unchanged or isn't a docket saved by get_json.
+    """
+    if docket is None:
+        file_hash = _file_hash(path)
+    else:
+        file_hash = hashlib.sha1(json.dumps(docket).encode('utf-8')).hexdigest()
+    filename = os.path.basename(path)
+
+    existing = connection.execute("SELECT id, file_hash FROM dockets WHERE source_file = ?", (filename,)).fetchone()
+    if existing and existing[1] == file_hash:
+        # The file is exactly the same as the last time it was loaded, so there is nothing to do.
+        return None
+
+    if docket is None:
+        with open(path) as jsonFile:
+            try:
+                docket = json.load(jsonFile)
+            except ValueError:
+                return None
+    if not isinstance(docket, dict) or 'info' not in docket or 'docket_report' not in docket:
+        return None
+
+    result, tables = docket_rows(docket, os.path.splitext(filename)[0])
+
+    # A docket is identified by its court and docket number, so the same docket saved under a different file name
+    # updates the rows that are already there.
+    connection.execute("""
+        INSERT INTO dockets (court, docket_number, case_title, source_file, file_hash, loaded_at) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (court, docket_number) DO UPDATE SET
+            case_title = excluded.case_title, source_file = excluded.source_file,
+            file_hash = excluded.file_hash, loaded_at = excluded.loaded_at
+    """, (result['court'], _store_value(result['docket']), result['title'], filename, file_hash, time.time()))
+    docket_id = connection.execute("SELECT id FROM dockets WHERE court IS ? AND docket_number IS ?",
+                                   (result['court'], _store_value(result['docket']))).fetchone()[0]
+
+    changes = {'docket_id': docket_id}
+    for table, rows in tables.items():
+        columns = list(ROW_TABLES[table][1].values())
+        stored_hashes = {row_hash for (row_hash,) in connection.execute(f"SELECT row_hash FROM {table} WHERE docket_id = ?", (docket_id,))}
+        new_hashes = {row[-1] for row in rows}
+
+        # Rows that are no longer on the docket are removed, and rows that are new are added. Rows that haven't changed are left alone.
+        removed = stored_hashes - new_hashes
+        connection.executemany(f"DELETE FROM {table} WHERE docket_id = ? AND row_hash = ?", ((docket_id, row_hash) for row_hash in removed))
+        added = [row for row in rows if row[-1] not in stored_hashes]
+        placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+        connection.executemany(
+            f"INSERT OR IGNORE INTO {table} (docket_id, {', '.join(columns)}, row_hash) VALUES ({placeholders})",
+            ((docket_id,) + row for row in added))
+        changes[table] = {'added': len(added), 'removed': len(removed)}
+    return changes
+
+def ingest_directory(input_directory=None, database_path=None):
+    """
+    Takes in a directory of JSON files saved by get_json (JSON_INPUT_OUTPUT_PATH by default), and the path to the
+    database (see default_database_path()).
+    Loads every docket that is new or has changed since the last time the directory was loaded.
+    Returns a dictionary counting the dockets that were loaded and skipped, and the rows added and removed.
+    """
+    input_directory = input_directory or global_variables.JSON_INPUT_OUTPUT_PATH
+    database_path = database_path or default_database_path(input_directory)
+    connection = connect(database_path)
+
+    summary = {'dockets loaded': 0, 'dockets skipped': 0, 'rows added': 0, 'rows removed': 0}
+    paths = [entry.path for entry in os.scandir(input_directory) if entry.name.lower().endswith('.json')]
+
+    def saved_dockets():
+        for path in paths:
+            yield path, None
+        # Dockets saved into compressed shards (when outputMode in config.py is "archive") are loaded too.
+        for name, docket in archives.iter_shard_dockets(input_directory):
+            yield f"{name}.json", docket
+
+    total = len(paths) + archives.count_shard_dockets(input_directory)
+    print(f"Loading {total} dockets into {database_path}...")
+    try:
+        for number, (path, docket) in enumerate(tqdm(saved_dockets(), total=total), start=1):
+            changes = upsert_docket(connection, path, docket)
+            if changes is None:
+                summary['dockets skipped'] += 1
+            else:
+                summary['dockets loaded'] += 1
+                summary['rows added'] += sum(change['added'] for table, change in changes.items() if table != 'docket_id')
+                summary['rows removed'] += sum(change['removed'] for table, change in changes.items() if table != 'docket_id')
+            # We commit in batches, so a very large load doesn't keep one huge transaction open.
+            if number % config.docketStoreCommitEvery == 0:
+                connection.commit()
+        connection.commit()
+    finally:
+        connection.close()
+
+    print(", ".join(f"{count} {name}" for name, count in summary.items()) + ".")
+    return summary
+
+def ingest_after_download(input_directory):
+    """
+    Loads the new and changed dockets in a JSON folder that was just downloaded to, if ingestAfterDownload in config.py
+    is True. Returns the summary from ingest_directory(), or None if nothing was loaded.
+    Dockets uploaded to S3 (when storageBackend in config.py is "s3") aren't loaded, because the database is kept in
+    the JSON folder, which isn't on this machine.
+    """
+    if not config.ingestAfterDownload:
+        return None
+    if not storage.for_directory(input_directory).local:
+        print("The dockets were uploaded, so they weren't loaded into the database.")
+        return None
+    return ingest_directory(input_directory)
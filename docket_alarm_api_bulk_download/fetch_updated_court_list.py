@@ -2,12 +2,15 @@ import requests
 import os
 import login
 import global_variables
+import api_session
+import jobs
 
 CURRENT_DIR = os.path.dirname(__file__)
 
-def fetch_updated_court_list():
+def fetch_updated_court_list(job=None):
     """
     Prints all the courts to the console and returns a list of courts
+    Optionally takes in the job whose client matter the request is billed to (see jobs.py).
     """
 
     user = login.Credentials()
@@ -16,15 +19,15 @@ def fetch_updated_court_list():
     # client matter will return a list of couthouses. This list is every court we can search,
     # with the name formatted in a way that we can send later when accessing the API for 
     # searching for dockets.
-    searchdirect_url = "https://www.docketalarm.com/api/v1/searchdirect/"
+    searchdirect_url = global_variables.API_URL + "searchdirect/"
 
     data = {
         'login_token':user.authenticate(),
-        'client_matter': global_variables.CLIENT_MATTER,
+        'client_matter': jobs.current(job).clientMatter,
     }
 
     # returns a json object
-    result = requests.get(searchdirect_url, data)
+    result = api_session.shared().get(searchdirect_url, data)
 
 
     # We call the .json() method on the json object to turn it into a python dictionary
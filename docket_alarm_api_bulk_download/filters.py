@@ -0,0 +1,145 @@
+# Built-in Modules
+import re
+import shlex
+import datetime
+# Internal Modules
+import config
+
+# This module decides which documents in a docket are worth downloading at all, so the PDFs that aren't wanted are
+# never queued, and never cost bandwidth or court fees.
+# A filter is written as an expression (pdfFilter in config.py, or --filter on the download command) made of terms
+# separated by spaces. A document is downloaded only if it matches every term:
+#     after:2020-01-01         the docket entry was filed on or after this date
+#     before:2021-12-31        the docket entry was filed on or before this date
+#     contents:"order|judgment" the text of the docket entry matches this regular expression (upper or lower case)
+#     exclude:"notice"         the text of the docket entry does not match this regular expression
+#     number:1-50,75           the docket entry number is in one of these numbers or ranges
+#     exhibits:no              leave out exhibits (exhibits:only downloads only exhibits, exhibits:yes is the default)
+# For example: after:2020-01-01 contents:"order|judgment" exhibits:no
+# The expression is compiled once, and then checked against each docket entry as its links are found.
+
+TERMS = ["after", "before", "contents", "exclude", "number", "exhibits"]
+
+HTML_TAG = re.compile('<.*?>')
+
+class FilterError(ValueError):
+    """
+    Raised when a filter expression can't be understood.
+    """
+
+def _parse_date(text, term):
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        raise FilterError(f"'{term}' needs a date like 2020-01-31, not '{text}'.")
+
+def _parse_numbers(text):
+    ranges = []
+    for part in text.split(","):
+        low, _, high = part.strip().partition("-")
+        try:
+            ranges.append((float(low), float(high or low)))
+        except ValueError:
+            raise FilterError(f"'number' needs numbers or ranges like 1-50,75, not '{text}'.")
+    return ranges
+
+class DocumentFilter:
+    """
+    A compiled filter expression. Create one with compile_filter().
+    """
+
+    def __init__(self, expression=""):
+        self.expression = expression
+        self.after = None
+        self.before = None
+        self.contents = None
+        self.exclude = None
+        self.numbers = None
+        self.exhibits = "yes"
+
+        try:
+            terms = shlex.split(expression or "")
+        except ValueError as error:
+            raise FilterError(f"Could not read the filter '{expression}': {error}")
+        for term in terms:
+            name, separator, value = term.partition(":")
+            if not separator or name not in TERMS:
+                raise FilterError(f"Unknown filter term '{term}'. Terms look like name:value, with name one of: {', '.join(TERMS)}")
+            if name == "after":
+                self.after = _parse_date(value, name)
+            elif name == "before":
+                self.before = _parse_date(value, name)
+            elif name in ("contents", "exclude"):
+                try:
+                    setattr(self, name, re.compile(value, re.IGNORECASE))
+                except re.error as error:
+                    raise FilterError(f"'{name}' needs a regular expression, and '{value}' isn't one: {error}")
+            elif name == "number":
+                self.numbers = _parse_numbers(value)
+            elif name == "exhibits":
+                if value not in ("yes", "no", "only"):
+                    raise FilterError(f"'exhibits' must be yes, no or only, not '{value}'.")
+                self.exhibits = value
+
+        # When there is nothing to check, the checks below are skipped altogether.
+        self.checks_entries = any(check is not None for check in (self.after, self.before, self.contents, self.exclude, self.numbers))
+
+    def __repr__(self):
+        return f"DocumentFilter({self.expression!r})"
+
+    def entry_matches(self, item):
+        """
+        Takes in a docket entry (one dictionary from the docket_report list).
+        Returns True if the documents of the entry may be downloaded.
+        """
+        if not self.checks_entries:
+            return True
+        if self.after is not None or self.before is not None:
+            try:
+                entryDate = datetime.date.fromisoformat(str(item.get('entry_date'))[:10])
+            except ValueError:
+                # An entry without a date can't be shown to be in the date range, so it's left out.
+                return False
+            if self.after is not None and entryDate < self.after:
+                return False
+            if self.before is not None and entryDate > self.before:
+                return False
+        if self.contents is not None or self.exclude is not None:
+            # The HTML tags in the entry are removed first, so a term like 'span' doesn't match every entry.
+            contents = HTML_TAG.sub(" ", item.get('contents') or "")
+            if self.contents is not None and not self.contents.search(contents):
+                return False
+            if self.exclude is not None and self.exclude.search(contents):
+                return False
+        if self.numbers is not None:
+            try:
+                number = float(item.get('number'))
+            except (TypeError, ValueError):
+                return False
+            if not any(low <= number <= high for low, high in self.numbers):
+                return False
+        return True
+
+    def main_documents(self):
+        """
+        Returns True if the main documents of entries may be downloaded.
+        """
+        return self.exhibits != "only"
+
+    def exhibits_allowed(self):
+        """
+        Returns True if exhibits may be downloaded.
+        """
+        return self.exhibits != "no"
+
+_compiled = {}
+
+def compile_filter(expression=None):
+    """
+    Takes in a filter expression (pdfFilter in config.py by default), and returns it as a DocumentFilter.
+    Each expression is only compiled once.
+    """
+    expression = config.pdfFilter if expression is None else expression
+    if expression not in _compiled:
+        _compiled[expression] = DocumentFilter(expression)
+    return _compiled[expression]
@@ -1,5 +1,7 @@
 # Built-in Modules
+import csv
 import datetime
+import json
 import os
 import re
 # Third-party Modules
@@ -7,10 +9,15 @@ import pandas as pd
 from progress.bar import Bar
 from colorama import init, Fore, Back, Style
 # Internal Modules
+import config
+import xlsx_export
 import user_tools
 import login
 import global_variables
 import menus
+import profiling
+import archives
+import jobs
 from get_pdfs import cleanhtml
 
 # We store the directory of this file in a variable so we can access it as needed.
@@ -18,12 +25,11 @@ CURRENT_DIR = os.path.dirname(__file__)
 
 # This module is for creating csv files from a Docket Alarm search query
 
-# Here we initialize our blank dataframes with their column headers. We append each of these throughout the script.
-# Dataframes are tables that are easy to work with in python. They can be easily exported to a variety of formats.
-docketInformation = pd.DataFrame(columns=['Docket Number', 'Court Name','Case Title', 'Case Info Field', 'Case Info Values'])
-docketEntries = pd.DataFrame(columns=['Docket Number', 'Court Name','Case Title', 'Docket Entry Date', 'Docket Entry Numbers', 'Docket Entry Contents'])
-parties = pd.DataFrame(columns=['Docket Number', 'Court Name','Case Title', 'Party Name', 'Party Type'])
-attorneysAndFirms = pd.DataFrame(columns=['Docket Number', 'Court Name','Attorney Name', 'Attorney Firm', 'Attorney Email', 'Attorney Phone'])
+# These are the column headers of the 4 spreadsheets we generate.
+docketInformation_columns = ['Docket Number', 'Court Name','Case Title', 'Case Info Field', 'Case Info Values']
+docketEntries_columns = ['Docket Number', 'Court Name','Case Title', 'Docket Entry Date', 'Docket Entry Numbers', 'Docket Entry Contents']
+parties_columns = ['Docket Number', 'Court Name','Case Title', 'Party Name', 'Party Type']
+attorneysAndFirms_columns = ['Docket Number', 'Court Name','Attorney Name', 'Attorney Firm', 'Attorney Email', 'Attorney Phone']
 
 
 # We create this function to remove the HTML tags from the docket entries returned by the API.
@@ -42,152 +48,185 @@ def removehtml(html_string):
     # We return the string with the HTML tags removed.
     return html_removed
 
-def query_to_tables(query, results_limit, output_path, result_order=None):
+def docketInformation_rows(result, docket):
+    """
+    Takes in a search result and the docket data for that result, both as dictionaries.
+    Returns the rows for the docketInformation spreadsheet as a list of dictionaries.
+    """
+
+    rows = []
+
+    # We loop through all the keys present in the dockets info dictionary.
+    for key in docket['info']:
+        
+        # We create the new row we want to add as a dictionary.
+        # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
+        # case the key doesn't exist.
+        rows.append({
+            'Docket Number':result['docket'],
+            'Court Name':result['court'],
+            'Case Title':docket['info'].get('title',result.get("title", None)),
+            'Case Info Field':key,
+            'Case Info Values': docket['info'][key],
+        })
+
+    return rows
+
+def docketEntries_rows(result, docket):
+    """
+    Takes in a search result and the docket data for that result, both as dictionaries.
+    Returns the rows for the docketEntries spreadsheet as a list of dictionaries.
+    """
+
+    rows = []
+
+    # We loop through each dictionary within the docket_report list
+    for document in docket['docket_report']:
+
+        # We create the new row we want to add as a dictionary.
+        # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
+        # case the key doesn't exist.
+        rows.append({
+            'Docket Number':result['docket'],
+            'Court Name':result['court'],
+            'Case Title':docket['info'].get('title',result.get("title", None)),
+            'Docket Entry Date': document.get('entry_date', None),
+            'Docket Entry Numbers': document.get('number', None),
+            'Docket Entry Contents': removehtml(document.get('contents', None)),
+        })
+
+    return rows
+
+def parties_rows(result, docket):
+    """
+    Takes in a search result and the docket data for that result, both as dictionaries.
+    Returns the rows for the parties spreadsheet as a list of dictionaries.
+    """
+
+    rows = []
+
+    # The parties key is not always present in our response.
+    if not 'parties' in docket:
+        # If it's not present, there are no rows to add.
+        return rows
+
+    for party in docket.get('parties', None):
+
+        # We create the new row we want to add as a dictionary.
+        # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
+        # case the key doesn't exist.
+        rows.append({
+        'Docket Number':result.get('docket', None),
+        'Court Name': result.get('court', None),
+        'Case Title': docket['info'].get('title', result.get("title", None)),
+        'Party Name': party.get('name_normalized', party.get('name')),
+        'Party Type': party.get('type', None),
+        })
+
+    return rows
+
+def attorneysAndFirms_rows(result, docket):
+    """
+    Takes in a search result and the docket data for that result, both as dictionaries.
+    Returns the rows for the attorneysAndFirms spreadsheet as a list of dictionaries.
+    """
+
+    rows = []
+
+    # The parties key is not always present in our response.
+    if not 'parties' in docket:
+        # If it's not present, there are no rows to add.
+        return rows
+
+    # We loop through each dictionary within the parties list of dictionaries.
+    for party in docket['parties']:
+
+        # The counsel key will not always be present in the dictionary.
+        if not 'counsel' in party:
+            # If it's not, we stop looking for attorneys on this docket.
+            return rows
+        for counsel in party['counsel']:
+
+            # We create the new row we want to add as a dictionary.
+            # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
+            # case the key doesn't exist.
+            rows.append({
+                'Docket Number': result.get('docket', None),
+                'Court Name': result.get('court', None),
+                'Attorney Name': counsel.get("name", None),
+                'Attorney Firm': counsel.get("firm", None),
+                'Attorney Email': counsel.get("email", None),
+                'Attorney Phone': counsel.get("phone", None),
+            })
+
+    return rows
+
+def result_from_saved_docket(docket, base_filename):
+    """
+    Takes in the docket data from a JSON file saved by get_json, and the name of that file without the extension.
+    Returns a dictionary with the same 'docket', 'court' and 'title' keys as a search result, so saved dockets
+    can be passed to the *_rows() functions without running a search.
+    """
+    info = docket.get('info') or {}
+    return {
+        # The docket number and court are read from the docket's info, falling back to the file name when they are missing.
+        'docket': docket.get('docket', info.get('docket_number', info.get('docket', base_filename))),
+        'court': docket.get('court', info.get('court', None)),
+        'title': info.get('title', None),
+    }
+
+def query_to_tables(query, results_limit, output_path, result_order=None, job=None, output_format=None):
     """
     Takes in a search query as a sting,
     the amount of results you want returned as a string,
     the path you want to save to as a string,
-    and optionally, the order of your results as a string.
+    and optionally, the order of your results as a string,
+    the job whose client matter and cached setting the dockets are pulled with (see jobs.py),
+    and the format to save the spreadsheets in, "csv" or "xlsx" (spreadsheetFormat in config.py by default).
 
     Generates a folder within the folder you specify and
     populates it with 4 spreadsheets containing the docket data
     from your search.
     """
 
+    job = jobs.current(job)
+
     # We convert the amount of results the user wants to an integer so we can work with the number.
     results_limit = int(results_limit)
 
+    # The rows for each spreadsheet are collected in these lists as we loop through the results, and added to the
+    # dataframes all at once when we're done. Appending to a dataframe copies the whole dataframe every time, which gets
+    # very slow when a search returns a lot of dockets.
+    docketInformation_new_rows = []
+    docketEntries_new_rows = []
+    parties_new_rows = []
+    attorneysAndFirms_new_rows = []
+
     def fill_docketInformation(result,docket):
         """
-        This nested function populates the docketInformation dataframe.
+        This nested function collects the rows for the docketInformation dataframe.
         """
-
-        # We loop through all the keys present in the dockets info dictionary.
-        for key in docket['info']:
-            
-            # We create the new row we want to add as a dictionary.
-            # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
-            # case the key doesn't exist.
-            new_docketInformation_row = {
-                'Docket Number':result['docket'],
-                'Court Name':result['court'],
-                'Case Title':docket['info'].get('title',result.get("title", None)),
-                'Case Info Field':key,
-                'Case Info Values': docket['info'][key],
-            }
-
-            # We append the global dataframe with the row we want represented as a dictionary. 
-            # ignore_index=True specifies that we don't want to generate an index column.
-            global docketInformation
-            appender = docketInformation.append(new_docketInformation_row, ignore_index=True)
-
-            # When we append a dataframe, the original is not changed, rather a new version of the dataframe with the added row is generated.
-            # We replace the original with the new version so our changes get saved.
-            docketInformation = appender
+        docketInformation_new_rows.extend(docketInformation_rows(result, docket))
 
 
     def fill_docketEntries(result,docket):
         """
-        This nested function populates the docketEntries dataframe.
+        This nested function collects the rows for the docketEntries dataframe.
         """
-
-        # We loop through each dictionary within the docket_report list
-        for document in docket['docket_report']:
-
-            # We create the new row we want to add as a dictionary.
-            # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
-            # case the key doesn't exist.
-            new_docketEntries_row = {
-                'Docket Number':result['docket'],
-                'Court Name':result['court'],
-                'Case Title':docket['info'].get('title',result.get("title", None)),
-                'Docket Entry Date': document.get('entry_date', None),
-                'Docket Entry Numbers': document.get('number', None),
-                'Docket Entry Contents': removehtml(document.get('contents', None)),
-            }
-
-            # We append the global dataframe with the row we want represented as a dictionary. 
-            # ignore_index=True specifies that we don't want to generate an index column.
-            global docketEntries
-            appender = docketEntries.append(new_docketEntries_row, ignore_index=True)
-
-            # When we append a dataframe, the original is not changed, rather a new version of the dataframe with the added row is generated.
-            # We replace the original with the new version so our changes get saved.
-            docketEntries = appender
+        docketEntries_new_rows.extend(docketEntries_rows(result, docket))
 
 
     def fill_parties(result,docket):
         """
-        This nested function populates the parties dataframe.
+        This nested function collects the rows for the parties dataframe.
         """
-
-        # The parties key is not always present in our response.
-        if not 'parties' in docket:
-            # If it's not present, we don't add to the dataframe and we exit the function.
-            return
-
-        for party in docket.get('parties', None):
-
-            # We create the new row we want to add as a dictionary.
-            # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
-            # case the key doesn't exist.
-            new_parties_row = {
-            'Docket Number':result.get('docket', None),
-            'Court Name': result.get('court', None),
-            'Case Title': docket['info'].get('title', result.get("title", None)),
-            'Party Name': party.get('name_normalized', party.get('name')),
-            'Party Type': party.get('type', None),
-            }
-
-
-            # We append the global dataframe with the row we want represented as a dictionary. 
-            # ignore_index=True specifies that we don't want to generate an index column.
-            global parties
-            appender = parties.append(new_parties_row, ignore_index=True)
-
-            # When we append a dataframe, the original is not changed, rather a new version of the dataframe with the added row is generated.
-            # We replace the original with the new version so our changes get saved.
-            parties = appender
+        parties_new_rows.extend(parties_rows(result, docket))
 
     def fill_attorneysAndFirms(result, docket):
         """
-        This nested function populates the attorneysAndFirms dataframe.
+        This nested function collects the rows for the attorneysAndFirms dataframe.
         """
-
-        # The parties key is not always present in our response.
-        if not 'parties' in docket:
-            # If it's not present, we don't add to the dataframe and we exit the function.
-            return
-
-        # We loop through each dictionary within the parties list of dictionaries.
-        for party in docket['parties']:
-
-            # The counsel key will not always be present in the dictionary.
-            if not 'counsel' in party:
-                # If it's not, we don't write to the dataframe and we exit the function.
-                return
-            for counsel in party['counsel']:
-
-                # We create the new row we want to add as a dictionary.
-                # Using .get() allows us to specify the key that we want, and specify a default value as the second argument in
-                # case the key doesn't exist.
-                new_attorneysAndFirms_row = {
-                    'Docket Number': result.get('docket', None),
-                    'Court Name': result.get('court', None),
-                    'Attorney Name': counsel.get("name", None),
-                    'Attorney Firm': counsel.get("firm", None),
-                    'Attorney Email': counsel.get("email", None),
-                    'Attorney Phone': counsel.get("phone", None),
-                }
-
-                # We append the global dataframe with the row we want represented as a dictionary. 
-                # ignore_index=True specifies that we don't want to generate an index column.
-                global attorneysAndFirms
-                appender = attorneysAndFirms.append(new_attorneysAndFirms_row, ignore_index=True)
-
-                # When we append a dataframe, the original is not changed, rather a new version of the dataframe with the added row is generated.
-                # We replace the original with the new version so our changes get saved.
-                attorneysAndFirms = appender
+        attorneysAndFirms_new_rows.extend(attorneysAndFirms_rows(result, docket))
 
     # After defining all of our nested functions, this is where the query_to_tables() function begins.
 
@@ -237,19 +276,35 @@ def query_to_tables(query, results_limit, output_path, result_order=None):
 
         # We use the get_docket() function to return the docket data for every result in our search query.
         # To pull the docket, we specify the docket number and the court. We specify if the data is cached or uncached, and what the client matter is.
-        docket = user_tools.get_docket(user.authenticate(), result['docket'], result['court'], cached=global_variables.IS_CACHED, client_matter=global_variables.CLIENT_MATTER)
+        docket = user_tools.get_docket(user.authenticate(), result['docket'], result['court'], cached=job.isCached, client_matter=job.clientMatter)
+
+        # If the docket couldn't be pulled, the API returns an error instead of the docket data, so we skip it.
+        if not isinstance(docket, dict) or 'info' not in docket:
+            print(f"\nCould not pull {result['docket']} from {result['court']}: {docket.get('error') if isinstance(docket, dict) else docket}")
+            bar.next()
+            continue
 
         # through every iteration over our results, we pass the result data, and the docket data for each result to each of the
-        # nested functions we defined at the beginning of this funciton. The dataframes that are declared as global variables at the
-        # top of this module are appended with new data with each iteration.
-        fill_docketInformation(result,docket)
-        fill_docketEntries(result,docket)
-        fill_parties(result,docket)
-        fill_attorneysAndFirms(result,docket)
+        # nested functions we defined at the beginning of this funciton, which collect the new rows for each dataframe.
+        with profiling.stage("tables"):
+            fill_docketInformation(result,docket)
+            fill_docketEntries(result,docket)
+            fill_parties(result,docket)
+            fill_attorneysAndFirms(result,docket)
 
         # With each iteration, we move our progress bar forward until it hits its maximum.
         bar.next()
 
+    # We make a dataframe from the rows we collected for each spreadsheet.
+    # Dataframes are tables that are easy to work with in python. They can be easily exported to a variety of formats.
+    # They belong to this call alone, so the tables of an earlier search, or of a search running at the same time,
+    # aren't added to them.
+    with profiling.stage("tables"):
+        docketInformation = pd.DataFrame(docketInformation_new_rows, columns=docketInformation_columns)
+        docketEntries = pd.DataFrame(docketEntries_new_rows, columns=docketEntries_columns)
+        parties = pd.DataFrame(parties_new_rows, columns=parties_columns)
+        attorneysAndFirms = pd.DataFrame(attorneysAndFirms_new_rows, columns=attorneysAndFirms_columns)
+
     # We get the current date and time to use in the name of the output folder we will generate. This helps us generate
     # unique folder names each time we run the script.
     timeNow = datetime.datetime.now().strftime("%I%M%p %B %d %Y")
@@ -267,18 +322,110 @@ def query_to_tables(query, results_limit, output_path, result_order=None):
         # If it doesn't, we create it.
         os.makedirs(output_directory)
 
-    # We create strings for the absolute paths to each individual csv file we will be creating, with the .csv extension included.
-    docketInformation_outputFile = os.path.join(output_directory, "docketInformation.csv") 
-    docketEntries_outputFile = os.path.join(output_directory, "docketEntries.csv")
-    parties_outputFile = os.path.join(output_directory, "parties.csv")
-    attorneysAndFirms_outputFile = os.path.join(output_directory, "attorneysAndFirms.csv")
+    # The spreadsheets are saved as csv files, or as xlsx files if that format was asked for.
+    extension = (output_format or config.spreadsheetFormat).lower()
+
+    # We create strings for the absolute paths to each individual file we will be creating, with the extension included.
+    docketInformation_outputFile = os.path.join(output_directory, f"docketInformation.{extension}")
+    docketEntries_outputFile = os.path.join(output_directory, f"docketEntries.{extension}")
+    parties_outputFile = os.path.join(output_directory, f"parties.{extension}")
+    attorneysAndFirms_outputFile = os.path.join(output_directory, f"attorneysAndFirms.{extension}")
 
     # We use the .to_csv() method on our dataframe object to save the filled out dataframes to csv files at the paths we specified above.
     # index=False specifies that we do not want to generate a numerical index column.
-    docketInformation.to_csv(docketInformation_outputFile, index=False)
-    docketEntries.to_csv(docketEntries_outputFile, index=False)
-    parties.to_csv(parties_outputFile, index=False)
-    attorneysAndFirms.to_csv(attorneysAndFirms_outputFile, index=False)
+    # xlsx files are written one row at a time by xlsx_export.py, rather than with .to_excel(), which builds the whole
+    # workbook in memory first.
+    save = (lambda dataframe, path: dataframe.to_csv(path, index=False)) if extension == "csv" else xlsx_export.save_dataframe
+    with profiling.stage("write"):
+        save(docketInformation, docketInformation_outputFile)
+        save(docketEntries, docketEntries_outputFile)
+        save(parties, parties_outputFile)
+        save(attorneysAndFirms, attorneysAndFirms_outputFile)
 
     # We set the progress bar to it's completed state.
-    bar.finish()
\ No newline at end of file
+    bar.finish()
+
+def directory_to_tables(input_directory, output_path, output_format=None):
+    """
+    Takes in the path to a directory of JSON files saved by get_json, and the path you want to save to as strings.
+    Optionally takes in the format to save the spreadsheets in, "csv" or "xlsx" (spreadsheetFormat in config.py by default).
+
+    Generates a folder within the folder you specify and populates it with the same 4 spreadsheets
+    as query_to_tables(), built from the dockets that were already downloaded instead of from a search,
+    so no API calls are made.
+    Each docket is read, turned into rows and written to the spreadsheets before the next one is read, so
+    only one docket is held in memory at a time no matter how many files are in the directory.
+    Returns the path to the generated folder.
+    """
+
+    # The names of the JSON files in the directory. We only keep the names, not the files themselves.
+    filenames = [entry.name for entry in os.scandir(input_directory) if entry.name.lower().endswith('.json')]
+
+    # We name the output folder after the input folder, followed by the current time, just like query_to_tables() does.
+    timeNow = datetime.datetime.now().strftime("%I%M%p %B %d %Y")
+    containing_folder_name = f"{cleanhtml(os.path.basename(os.path.normpath(input_directory)))} - {timeNow}"
+    output_directory = os.path.join(output_path, containing_folder_name)
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    # Each spreadsheet is paired with its column headers and the function that builds its rows.
+    tables = [
+        ("docketInformation", docketInformation_columns, docketInformation_rows),
+        ("docketEntries", docketEntries_columns, docketEntries_rows),
+        ("parties", parties_columns, parties_rows),
+        ("attorneysAndFirms", attorneysAndFirms_columns, attorneysAndFirms_rows),
+    ]
+    extension = (output_format or config.spreadsheetFormat).lower()
+
+    # We open every spreadsheet up front and keep it open, writing rows to it as each docket is read.
+    # xlsx files are written a row at a time too (see xlsx_export.py), and saved when they are closed.
+    if extension == "xlsx":
+        outputFiles = [xlsx_export.XlsxWriter(os.path.join(output_directory, f"{name}.xlsx"), columns) for name, columns, _ in tables]
+        writers = outputFiles
+    else:
+        outputFiles = [open(os.path.join(output_directory, f"{name}.csv"), 'w', newline='', encoding='utf-8') for name, _, _ in tables]
+        writers = [csv.DictWriter(outputFile, fieldnames=columns) for outputFile, (_, columns, _) in zip(outputFiles, tables)]
+    for writer in writers:
+        writer.writeheader()
+
+    bar = Bar('Generating CSVs', max=len(filenames) + archives.count_shard_dockets(input_directory))
+    skipped = 0
+
+    def saved_dockets():
+        for filename in filenames:
+            with open(os.path.join(input_directory, filename)) as jsonFile, profiling.stage("parse"):
+                try:
+                    docket = json.load(jsonFile)
+                except ValueError:
+                    docket = None
+            yield os.path.splitext(filename)[0], docket
+        # Dockets saved into compressed shards (when outputMode in config.py is "archive") are read too.
+        yield from archives.iter_shard_dockets(input_directory)
+
+    try:
+        for name, docket in saved_dockets():
+
+            # Files that aren't dockets saved by get_json are skipped.
+            if not docket or 'info' not in docket or 'docket_report' not in docket:
+                skipped += 1
+                bar.next()
+                continue
+
+            # The saved docket stands in for the search result query_to_tables() gets from its search.
+            result = result_from_saved_docket(docket, name)
+
+            for writer, (_, _, rows_function) in zip(writers, tables):
+                with profiling.stage("tables"):
+                    rows = rows_function(result, docket)
+                with profiling.stage("write"):
+                    writer.writerows(rows)
+
+            bar.next()
+    finally:
+        for outputFile in outputFiles:
+            outputFile.close()
+
+    bar.finish()
+    if skipped:
+        print(f"{skipped} files were skipped because they are not dockets saved by this program.")
+    return output_directory
@@ -1,5 +1,6 @@
 # Built-in Modules
 import re           # For pattern matching within strings
+import csv          # For counting the rows of the input csv
 import json         # For working with json data
 import os           # For accessing features of the operating system
 import threading
@@ -15,72 +16,149 @@ from tqdm import tqdm
 # Internal Modules
 import config
 import login, file_browser, global_variables
+import metrics
+import profiling
+import archives
+import host_queue
+import storage
+import jobs
+import task_records
+import cache_policy
 import gui #DEV
 import PySimpleGUI as sg
 import user_tools
 
 CURRENT_DIR = os.path.dirname(__file__)
 
-# Reinforces that the variables defined in the global_variables module, and then edited from within other modules,
-# continue to have the value that the user changed it to.
-# It may look redundant, but without this line, the script only uses the default variable, without reflecting changes.
-
-global_variables.JSON_INPUT_OUTPUT_PATH = global_variables.JSON_INPUT_OUTPUT_PATH
-global_variables.CLIENT_MATTER = global_variables.CLIENT_MATTER
+# The paths and client matter a download uses come from the job it is run for (see jobs.py), which by default has the
+# values the user chose in the menus.
 
 # We create an instance of a lock object. We use this later when we download json with threads, to ensure that no 
 # two threads try to access data in the same place at the same time, causing problems.
 lock = threading.Lock()
 
 
-def table_to_list_of_tuples():
+def table_to_list_of_tuples(job=None):
     """
-    Grabs the csv from the CSV_INPUT_PATH variable that the user specified in the main menu,
-    and returns a list of tuples. Each tuple in the list is a set of arguments ready to be passed to
+    Grabs the csv from the CSV_INPUT_PATH variable that the user specified in the main menu (or the csv of the job
+    given, see jobs.py), and returns a list of tuples. Each tuple in the list is a set of arguments ready to be passed to
     the download_json_from_list_of_tuples() function within the thread_download_json() function
     that wraps both of these funtions to use threading to download more quickly.
+    The tuples are made by iter_table_tuples(). Use that instead to read them one at a time.
+    """
+    return list(iter_table_tuples(job))
+
+def count_table_rows(job=None):
+    """
+    Returns the number of dockets in the csv at CSV_INPUT_PATH (or the job's csv), without loading it.
+    """
+    job = jobs.current(job)
+    if job.dockets is not None:
+        return len(job.dockets)
+    try:
+        with open(job.csvInputPath, newline='') as csvFile:
+            return max(0, sum(1 for _ in csv.reader(csvFile)) - 1)
+    except OSError:
+        return None
+
+def iter_table_tuples(job=None):
+    """
+    Yields the same tuples as table_to_list_of_tuples(), one at a time.
+    The csv is read taskWindow rows at a time (see config.py), so only a small part of it is in memory at once.
     """
 
+    job = jobs.current(job)
+
     # The path to the input spreadsheet is the path that the user specified in the main menu.
-    spreadsheet_path = global_variables.CSV_INPUT_PATH
+    spreadsheet_path = job.csvInputPath
 
     # The path where the JSON files will be downloaded to is the path that the user specified in the main menu.
-    JSON_INPUT_OUTPUT_PATH = global_variables.JSON_INPUT_OUTPUT_PATH
+    JSON_INPUT_OUTPUT_PATH = job.jsonOutputPath
 
     # The client matter is the string that the user specified in the main menu.
-    CLIENT_MATTER = global_variables.CLIENT_MATTER
+    CLIENT_MATTER = job.clientMatter
+
+    IS_CACHED = job.isCached
 
-    IS_CACHED = global_variables.IS_CACHED
+    # Every docket in the csv shares one copy of these values, rather than each task repeating them (see task_records.py).
+    context = job.json_context()
 
-    # This list starts out empty, gets a tuple appended to it with every iteration of the loop below, and will eventually
-    # be the value returned by this function.
-    output_list_of_tuples = []
+    # A job can list its dockets itself, rather than in a csv.
+    if job.dockets is not None:
+        for caseName, caseNo, caseCourt in job.dockets:
+            yield task_records.JsonTask(caseName, caseNo, caseCourt, JSON_INPUT_OUTPUT_PATH, CLIENT_MATTER, IS_CACHED,
+                                        context=context)
+        return
 
     try:
         # We try to open the csv as a pandas dataframe. Pandas dataframes make working with tabular data in python faster and easier.
-        df = pd.read_csv(spreadsheet_path)
+        # The csv is read in chunks of rows, rather than all at once.
+        with profiling.stage("csv_read"):
+            chunks = pd.read_csv(spreadsheet_path, chunksize=config.taskWindow)
 
     except Exception as e:
         # If there are any errors with opening the dataframe, we print the data to the console to alert the user.
         print(f"{e}")
         input()
-    
-    # We loop through every row of the input spreadsheet, the row value allows us to access each value in each row through indexing.
-    for index, row in df.iterrows():
-        # We use indexing to store each value in the appropriate variables so they are more human-readable.
-        caseName = row[0]
-        caseNo = row[1]
-        caseCourt = row[2]
-        # We place the values into a tuple that will serve as parameters for download_json_from_list_of_tuples()
-        # when we call it inside the thread_download_json() wrapper.
-        row_tuple = (caseName, caseNo, caseCourt, JSON_INPUT_OUTPUT_PATH, CLIENT_MATTER, IS_CACHED)
-        # We append each tuple to the list at the top of the function.
-        output_list_of_tuples.append(row_tuple)
-    # We return the list after it is populated with tuples during each iteration over every row in the spreadsheet.
-    return output_list_of_tuples
-
-@retry
-def download_json_from_list_of_tuples(result_tuple):
+        return
+
+    # The reader is closed in a finally block rather than used in a with block, because readers can only be used in
+    # with blocks from pandas 1.2.
+    try:
+        for df in chunks:
+            # We loop through every row of the chunk, the row value allows us to access each value in each row through indexing.
+            for index, row in df.iterrows():
+                # We use indexing to store each value in the appropriate variables so they are more human-readable.
+                caseName = row.iloc[0]
+                caseNo = row.iloc[1]
+                caseCourt = row.iloc[2]
+                # We place the values into a task that unpacks like a tuple, and will serve as parameters for
+                # download_json_from_list_of_tuples() when we call it inside the thread_download_json() wrapper.
+                yield task_records.JsonTask(caseName, caseNo, caseCourt, JSON_INPUT_OUTPUT_PATH, CLIENT_MATTER, IS_CACHED,
+                                            context=context)
+    finally:
+        chunks.close()
+
+def save_docket_json(JSON_INPUT_OUTPUT_PATH, name, result_json):
+    """
+    Saves a docket's JSON (as a dictionary) to the JSON folder, as the file name.json, or as a line in a compressed
+    shard if outputMode in config.py is "archive". A docket saved again replaces its file, or in shards, is added
+    again after the copy saved before.
+    Raises an exception if it can't be written.
+    """
+    # Creates the path where our .json file will be saved to
+    filePathNameWExt = os.path.join(JSON_INPUT_OUTPUT_PATH, name + '.json')
+
+    if archives.archive_mode():
+        # The docket is added as one line to a compressed shard, instead of to a file of its own.
+        with profiling.stage("serialize"):
+            json_text = json.dumps(result_json)
+        with metrics.timed_write("json"), profiling.stage("write"):
+            written = archives.json_writer(JSON_INPUT_OUTPUT_PATH).write(name, json_text)
+        metrics.record_bytes_written("json", written)
+        return
+
+    # We use a lock so this code won't be executed by multiple threads simultaneously, this way we don't get errors.
+    # We turn the data into text first, so the time spent on that isn't spent holding the lock.
+    with profiling.stage("serialize"):
+        json_text = json.dumps(result_json, indent=3)
+
+    # The file is written to the JSON folder, or uploaded if storageBackend in config.py is "s3". See storage.py.
+    store = storage.for_directory(JSON_INPUT_OUTPUT_PATH)
+    if store.local:
+        with lock, metrics.timed_write("json"), profiling.stage("write"):
+            # We create the json file and write the data to it.
+            store.write_text(os.path.basename(filePathNameWExt), json_text)
+    else:
+        # Uploads don't touch the same files, so they don't wait for each other.
+        with metrics.timed_write("json"), profiling.stage("write"):
+            store.write_text(os.path.basename(filePathNameWExt), json_text)
+
+    # We count how much was written, for the metrics.
+    metrics.record_bytes_written("json", len(json_text))
+
+@retry(retry_on_exception=metrics.count_retries("getdocket"))
+def download_json_from_list_of_tuples(result_tuple, on_docket=None):
     """
     This function takes in a tuple with 5 arguments as strings in order:
     The case name,
@@ -92,6 +170,9 @@ def download_json_from_list_of_tuples(result_tuple):
     This function is not called on its own, it is wrapped by the 
     thread_download_json() function, which allows each call of the function to be done in it's
     own thread, speeding up the download.
+    Optionally takes in a function called with the docket's JSON (as a dictionary) once it is saved. crawl.py uses
+    this to find the docket's related dockets without reading it back.
+    Returns True if the docket was saved, and False if it was written to the error log instead.
     """
 
     # We unpack the tuple and assign all of it's values to human-readable variable names.
@@ -99,49 +180,27 @@ def download_json_from_list_of_tuples(result_tuple):
 
     user = login.Credentials()
 
-    # The endpoint we will be connecting to. Calls to this endpoint return the json data for the docket we want.
-    getdocket_url = "https://www.docketalarm.com/api/v1/getdocket/"
-
-    # The parameters we pass to the endpoint. This is how the API knows how to find what we are looking for.
-    data = {
-        # The token generated after logging in.
-        'login_token': user.authenticate(),
-        # The reason for use
-        'client_matter': CLIENT_MATTER,
-        # The court we want to search.
-        'court': caseCourt,
-        # The docket number we want data for
-        'docket':caseNo,
-        # A boolean representing whether or not we want the cached version of the data.
-        'cached': IS_CACHED,
-        # Cleans up names
-        'normalize':True,
-    }
-
-    # Makes the api call. We specify the endpoint and the parameters as arguments. The results of the API call are returned and
-    # stored to a variable. 
-
-
-    # result = requests.get(getdocket_url, data)
-
-    
-
+    # The docket is pulled by user_tools.Docket, which logs in with the token every download shares (see api_session.py).
     try:
         # if the api call fails, a detailed error is thrown. The script does not stop and the error message is not immediately shown to the user.
         # result.raise_for_status() 
         myDocket = user_tools.Docket((user.username, user.password), caseNo, caseCourt, client_matter=CLIENT_MATTER, cached=IS_CACHED, normalize=True)
         result_json = myDocket.all
+        # If uncachedAfterDays is set in config.py, a cached docket that is too old is downloaded again uncached.
+        if IS_CACHED and cache_policy.enabled() and result_json and result_json.get('success') and cache_policy.is_stale(result_json):
+            myDocket = user_tools.Docket((user.username, user.password), caseNo, caseCourt, client_matter=CLIENT_MATTER, cached=False, normalize=True)
+            result_json = myDocket.all
     except Exception as error:
         # Rather, the error is written to log/log.txt with a timestamp and information about which case could not be downloaded.
         result_json = None
         timeNow = datetime.datetime.now().strftime("%I:%M%p %B %d, %Y")
-        with open(os.path.join(CURRENT_DIR, 'log', 'log.txt'), 'a') as errorlog:
+        with open(os.path.join(global_variables.LOG_PATH, 'log.txt'), 'a') as errorlog:
             errorlog.write(f"\n{timeNow}\n")
             errorlog.write("JSON could not be downloaded:\n")
             errorlog.write(f"{caseName}, {caseNo}, {caseCourt}\n")
             errorlog.write(f"{error}\n")
             errorlog.write("------------------")
-        return
+        return False
 
     # result_json = result.json()
 
@@ -152,62 +211,81 @@ def download_json_from_list_of_tuples(result_tuple):
     # Exits the function.
     if result_json['success'] == False:
         timeNow = datetime.datetime.now().strftime("%I:%M%p %B %d, %Y")
-        with open(os.path.join(CURRENT_DIR, 'log', 'log.txt'), 'a') as errorlog:
+        with open(os.path.join(global_variables.LOG_PATH, 'log.txt'), 'a') as errorlog:
             errorlog.write(f"\n{timeNow}\n")
             errorlog.write("JSON could not be downloaded:\n")
             errorlog.write(f"{result_json}: {caseName}, {caseNo}, {caseCourt}\n")
             errorlog.write("------------------")
-        return
+        return False
     
     try:
-        # Creates the path where our .json file will be saved to
-        filePathNameWExt = os.path.join(JSON_INPUT_OUTPUT_PATH, f"{caseName} {caseNo}" + '.json')
-
-
-        # We use a lock so this code won't be executed by multiple threads simultaneously, this way we don't get errors.
-        with lock:
-            # When 'opening' a file that doesn't yet exist, we create that file.
-            # Here, we create the json file we'll be saving the data to.
-            with open(filePathNameWExt, 'w') as fp:
-
-                # Then we write the data to the newly created .json file.
-                json.dump(result_json,fp, indent=3)
+        save_docket_json(JSON_INPUT_OUTPUT_PATH, f"{caseName} {caseNo}", result_json)
 
     # If the api call was successful, but the writing of the data to a file fails, we display the error message to the user.
     except Exception as e:
         print("\nError writing json file.\nReference the documentation for more information\n")
         input()
         print(e)
-    return
+        return False
+    if on_docket:
+        on_docket(result_json)
+    return True
 
-def thread_download_json():
+def thread_download_json(job=None):
     """
     Wrapper function for download_json_from_list_of_tuples
     and table_to_list_of_tuples().
-    table_to_list_of_tuples() is called, and it's return values are stored in a variable and passed as arguments
-    to individual calls of download_json_from_list_of_tuples() within individual threads, speeding up the download.
+    Downloads the dockets of the job given (see jobs.py), or by default the ones set in the menus.
+    The tuples from iter_table_tuples() are passed as arguments to individual calls of
+    download_json_from_list_of_tuples() within individual threads, speeding up the download.
+    Only taskWindow dockets (in config.py) are read ahead of the downloads, so memory use doesn't grow with the csv.
+    Returns the number of dockets that were saved.
     """
 
-    # We call table_to_list_of_tuples() and store the results in a variable.
-    tuples_from_table = table_to_list_of_tuples()
+    job = jobs.current(job)
+    # The rows of the csv are read as the downloads need them, rather than all at once.
+    tuples_from_table = iter_table_tuples(job)
     # We get the amount of iterations the program will make, this will be used to tell the loading bar when it will be done.
-    maximum = len(tuples_from_table)
+    maximum = count_table_rows(job)
     print("Downloading JSON files...")
+    # If metricsPort is set in config.py, the timings of the downloads can be watched while they run.
+    metrics.start_server()
+    # Each download counts down the number of dockets still waiting, for the metrics.
+    download = metrics.track_queue(download_json_from_list_of_tuples, "json", maximum)
     # We start a counter, so at the end we can calculate how long the downloads took.
     start = time.perf_counter()
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-    # We start concurrent.futures to have every line of code within the block get passed to its own sepreate thread.
-        results = list(tqdm(executor.map(download_json_from_list_of_tuples, tuples_from_table), total=maximum))
-        # We use executor.map to use threading, it takes the function and a list of arguments to pass as arguments.
-        # tdqm starts a progress bar, and we specify the max value it needs to reach to finish.
+    # The downloads run in a pool of threads. New dockets are only read from the csv as earlier downloads finish.
+    # tdqm starts a progress bar, and we specify the max value it needs to reach to finish.
+    progress = tqdm(total=maximum)
+    # The job counts its progress too, so it can be checked while it runs (see daemon.py).
+    job.start_stage("json", maximum)
+    # We note how many dockets the cache policy has checked so far, to report on just this download at the end.
+    cache_counts = cache_policy.counts()
+    saved = 0
+    def done(result):
+        nonlocal saved
+        saved += 1 if result else 0
+        progress.update()
+        job.task_done("json", result)
+    host_queue.run_windowed(download, tuples_from_table, on_done=done)
+    progress.close()
     # We store the time again when it is over.
     finish = time.perf_counter()
     # We subtract the start time from the finish time to let the user know how long the download took.
     print(f"Finished downloading JSON files in {round(finish-start)} seconds.")
+    cache_policy.print_report(cache_counts)
+    # Any shards the dockets were saved to are finished. Shards other jobs are writing to are left open.
+    archives.close_all(job.jsonOutputPath)
+    if config.saveMetricsSummary:
+        # We save the timings of every API call and file write to the log folder.
+        print(f"Timings saved to {metrics.save_summary()}")
+    # We load the new and changed dockets into the database, so they can be queried straight away.
+    import docket_store
+    docket_store.ingest_after_download(job.jsonOutputPath)
     try:
         # If the users operating system permits, we open the download directory where the desired output files were downloaded to.
-        os.startfile(global_variables.JSON_INPUT_OUTPUT_PATH)
+        os.startfile(job.jsonOutputPath)
     except:
         pass
-        
-    return results
\ No newline at end of file
+
+    return saved
\ No newline at end of file
@@ -19,21 +19,55 @@ import file_browser, global_variables
 import gui #DEV
 import log_errors_to_table
 import login
+import metrics
+import profiling
+import scheduler
+import filters
+import host_queue
+import resumable
+import pdf_validation
+import archives
+import storage
+import task_records
+import jobs
+import api_session
 
 CURRENT_DIR = os.path.dirname(__file__)
 
-# Reinforces that the variables defined in the global_variables module, and then edited from within other modules,
-# continue to have the value that the user changed it to.
-# It may look redundant, but without this line, the script only uses the default variable, without reflecting changes.
-global_variables.PDF_OUTPUT_PATH = global_variables.PDF_OUTPUT_PATH
-global_variables.CLIENT_MATTER = global_variables.CLIENT_MATTER
+# The paths and client matter a download uses come from the job it is run for (see jobs.py), which by default has the
+# values the user chose in the menus.
 
 # We create an instance of a lock object. We use this later when we download json with threads, to ensure that no 
 # two threads try to access data in the same place at the same time, causing problems.
 lock = threading.Lock()
 
-# We create an ErrorTable object where we can write errors to an xlsx file as they come and then save the file at the end of the download.
-tableErrorLog = log_errors_to_table.ErrorTable()
+# Each link found by get_urls() is stored as a PdfLink. The first 5 values are the arguments download_from_link_list()
+# needs. The rest describe the document, so the scheduler can decide which documents to download first.
+# PdfLinks are kept small, since a run can have millions of them waiting (see task_records.py).
+PdfLink = task_records.PdfLink
+
+# We keep an ErrorTable object for each PDF folder, where we can write errors to an xlsx file as they come and then save
+# the file at the end of the download. Jobs saving to different folders at the same time (see jobs.py) each get their own.
+_error_tables = {}
+_error_tables_lock = threading.Lock()
+
+def error_table(outputPath):
+    """
+    Returns the ErrorTable that errors with the PDFs saved to the folder specified are written to.
+    """
+    with _error_tables_lock:
+        key = os.path.abspath(outputPath)
+        if key not in _error_tables:
+            _error_tables[key] = log_errors_to_table.ErrorTable()
+        return _error_tables[key]
+
+def save_error_table(outputPath, path):
+    """
+    Saves the ErrorTable for the PDF folder specified to an xlsx file at path, and starts a new one for the next download.
+    """
+    with _error_tables_lock:
+        table = _error_tables.pop(os.path.abspath(outputPath), None) or log_errors_to_table.ErrorTable()
+    table.error_excel_save(path)
 
 def cleanhtml(raw_html):
     """
@@ -64,38 +98,50 @@ def cleanhtml(raw_html):
     # It will also be cut to a length that doesn't go over the maximum length for a filename. 
     return cleantext
 
-def get_urls(input_directory):
+def get_urls(input_directory, job=None):
     """
     Takes in a directory full of JSON files as input, and returns the values for keys labeled 'link' for all of the files.
-    The output is a list of tuples.
+    The JSON folder read, and the PDF folder and client matter the links are made with, are the job's (see jobs.py).
+    By default they are the ones set in the menus.
+    The links are found by iter_urls(). Use that instead to read them one at a time.
+    The output is a list of PdfLink tuples.
     The first item in each tuple is a string containing the link.
     The second item in each tuple is a string containing the name of the document the link is connected to.
     The third item in each tuple is a string containing the original file name of the json file that the link was retrieved from.
+    The fourth and fifth are the folder the PDFs are saved to, and the client matter.
+    The rest are the date and number of the docket entry, the exhibit number (None for a main document), and the court.
     """
+    return list(iter_urls(input_directory, job))
 
-    # This list will be appended throughout the function with every pdf link found within the json files.
-    # It will ultimately be returned at the end of the function.
-    pdf_list = []
+def iter_urls(input_directory, job=None):
+    """
+    Yields the same PdfLink tuples as get_urls(), reading one JSON file at a time as more links are needed.
+    """
+
+    job = jobs.current(job)
 
     # The absolute path of the 'result' folder
-    input_directory = global_variables.JSON_INPUT_OUTPUT_PATH
+    input_directory = job.jsonOutputPath
 
     # The client matter the user specified in the menus.
-    CLIENT_MATTER = global_variables.CLIENT_MATTER
+    CLIENT_MATTER = job.clientMatter
+
+    # We store our output path for PDFs from the job in a local variable.
+    # The output path must be included in the result because when the resulting tuples get passed to our
+    # download_from_link_list() function within the thread_download_pdfs() wrapper function, it can't access the
+    # job directly from inside the seperate threads.
+    PDF_OUTPUT_PATH = job.pdfOutputPath
+
+    # The JSON files are read from wherever they were saved to (see storage.py).
+    store = storage.for_directory(input_directory)
 
-    if os.path.isdir(input_directory) == False:
+    if store.local and os.path.isdir(input_directory) == False:
         print("[ERROR] Could not write PDF files.\nMake sure 'json-output' folder exists in the root directroy of the program.\nCheck documentation for more information.\n")
         input()
 
 
     # Loops through every file in the 'result' directory.
-    for file in os.listdir(input_directory):
-
-        # We store our output path for PDFs from our global variable in a local variable.
-        # The output path must be included in the result because when the resulting tuples get passed to our
-        # download_from_link_list() function within the thread_download_pdfs() wrapper function, it can't access the 
-        # global variable directly from inside the seperate threads.
-        PDF_OUTPUT_PATH = global_variables.PDF_OUTPUT_PATH
+    for file in store.names():
 
         # Saves the name of each file in the folder to a variable
         filename = os.fsdecode(file)
@@ -106,79 +152,124 @@ def get_urls(input_directory):
         # Stores the absolute path of the current JSON file in the loop as a variable. 
         path = os.path.join(input_directory, filename)
 
-        # Designates the extenstion '.json' as a regex pattern that we want to remove from a string.
-        text_to_remove = re.compile(re.escape('.json'), re.IGNORECASE)
+        # We pull every link out of the current JSON file.
+        yield from get_urls_from_json_file(path, PDF_OUTPUT_PATH, CLIENT_MATTER)
+
+    # Dockets saved into compressed shards (when outputMode in config.py is "archive") are read too.
+    for base_filename, jsonObject in (archives.iter_shard_dockets(input_directory) if store.local else ()):
+        yield from get_urls_from_docket(jsonObject, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER)
+
+def get_urls_from_json_file(path, PDF_OUTPUT_PATH, CLIENT_MATTER):
+    """
+    Takes in the path to a single JSON file, the folder PDFs will be saved to, and the client matter.
+    Returns a list of tuples in the same format as get_urls(), for the links found in that one file.
+    This is the part of get_urls() that runs on each file, split out so that other modules
+    (like the shared work queue) can extract the links from a docket as soon as its JSON is saved.
+    """
+
+    # Saves the name of the file to a variable
+    filename = os.path.basename(path)
+
+    # Designates the extenstion '.json' as a regex pattern that we want to remove from a string.
+    text_to_remove = re.compile(re.escape('.json'), re.IGNORECASE)
 
-        # Uses the regex above to remove '.json' from the json filenames, which we will use to name the folders that
-        # will contain the corresponding pdfs to the original json file.
-        base_filename = text_to_remove.sub("", filename)
+    # Uses the regex above to remove '.json' from the json filenames, which we will use to name the folders that
+    # will contain the corresponding pdfs to the original json file.
+    base_filename = text_to_remove.sub("", filename)
+    
+    # Opens each individual JSON file, from the JSON folder or from S3 (see storage.py).
+    jsonText = storage.for_directory(os.path.dirname(path)).read_bytes(filename)
+
+    # Allows us to work with JSON files the same way we would work with a Python dictionary.
+    with profiling.stage("parse"):
+        jsonObject = json.loads(jsonText)
+
+    return get_urls_from_docket(jsonObject, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER)
+
+def get_urls_from_docket(jsonObject, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER, document_filter=None):
+    """
+    Takes in the docket data from a JSON file as a dictionary, the name of the folder its PDFs will be saved in,
+    the folder PDFs will be saved to, and the client matter.
+    Optionally takes in a filters.DocumentFilter. By default, the filter set as pdfFilter in config.py is used.
+    Returns a list of tuples in the same format as get_urls(), for the links found in that docket
+    that match the filter.
+    """
+
+    pdf_list = []
+
+    # Documents that don't match the filter are left out here, so they are never downloaded.
+    document_filter = document_filter or filters.compile_filter()
+
+    # The court is saved with each link, so fees can be estimated for it.
+    court = (jsonObject.get('info') or {}).get('court')
+
+    # Every link from the docket shares one copy of the output folder and client matter.
+    context = task_records.run_context(PDF_OUTPUT_PATH, CLIENT_MATTER)
         
-        # Opens each individual JSON file
-        with open(path) as jsonFile:
+    # Checks to see if a 'docket_report' key exists in the current JSON file in the loop.
+    if "docket_report" in jsonObject:
 
-            # Allows us to work with JSON files the same way we would work with a Python dictionary.
-            jsonObject = json.load(jsonFile)
-            
-            # Checks to see if a 'docket_report' key exists in the current JSON file in the loop.
-            if "docket_report" in jsonObject:
+        # If it exists, it saves the value for the docket_report key in a variable.
+        docket_report = jsonObject['docket_report']
 
-                # If it exists, it saves the value for the docket_report key in a variable.
-                docket_report = jsonObject['docket_report']
+        # docket_report will be a list of dictionaries. This loops through each dictionary in the list.
+        for item in docket_report:
 
-                # docket_report will be a list of dictionaries. This loops through each dictionary in the list.
-                for item in docket_report:
-                    
-                    docName = item['contents']
+            # If the docket entry doesn't match the filter, none of its documents are downloaded.
+            if not document_filter.entry_matches(item):
+                continue
+            
+            docName = item['contents']
 
-                    # We run the cleanhtml() function on the document name to remove the HTML tags and acharcters that can't be used in filenames
-                    docName = cleanhtml(docName)
+            # We run the cleanhtml() function on the document name to remove the HTML tags and acharcters that can't be used in filenames
+            docName = cleanhtml(docName)
 
-                    # The ID number of the document. We use this later for the file names
-                    docNum = item['number']
+            # The ID number of the document. We use this later for the file names
+            docNum = item['number']
 
-                    # Checks to see if any of the dictionaries inside the list contain a 'link' key
-                    if 'link' in item:
+            # Checks to see if any of the dictionaries inside the list contain a 'link' key
+            if 'link' in item and document_filter.main_documents():
 
-                        # The 'link' key contains a link to a PDF file associated with that item in the docket report.
-                        link = item['link']
+                # The 'link' key contains a link to a PDF file associated with that item in the docket report.
+                link = item['link']
 
-                        link_filename = f"{docNum} - {docName}"
+                link_filename = f"{docNum} - {docName}"
 
-                        link_tuple = (link, link_filename, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER)
-                        # Add the found link to the list, which will ultimately be returned at the end of the function.
-                        pdf_list.append(link_tuple)
+                link_tuple = PdfLink(link, link_filename, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER,
+                                     item.get('entry_date'), docNum, None, court, context=context)
+                # Add the found link to the list, which will ultimately be returned at the end of the function.
+                pdf_list.append(link_tuple)
 
-                    # Some PDF's are inside the exhibits key, which doesnt always exist. Here, we check to see if the exhibits key exists.
-                    if 'exhibits' in item:
+            # Some PDF's are inside the exhibits key, which doesnt always exist. Here, we check to see if the exhibits key exists.
+            if 'exhibits' in item and document_filter.exhibits_allowed():
 
-                        # if it does exist, we save its contents in an exhibits variable.
-                        exhibits = item['exhibits']
-                        
-                        # The data contained inside 'exhibits' will be a list of dictionaries. So we loop through the list to access the data.
-                        for exhibit in exhibits:
+                # if it does exist, we save its contents in an exhibits variable.
+                exhibits = item['exhibits']
+                
+                # The data contained inside 'exhibits' will be a list of dictionaries. So we loop through the list to access the data.
+                for exhibit in exhibits:
 
-                            # We chck to see if any links exist inside exhibits
-                            if 'link' in exhibit:
+                    # We chck to see if any links exist inside exhibits
+                    if 'link' in exhibit:
 
-                                exhibitNumber = f"{exhibit['exhibit']}"
+                        exhibitNumber = f"{exhibit['exhibit']}"
 
-                                # If a link to a PDF does exist, we store it in a variable.
-                                exhibitLink = exhibit['link']
-                                
-                                # We create a file name to save the exhibit pdf as
-                                exhibitName = f"Exhibit {exhibitNumber} - {docNum} - {docName}"
+                        # If a link to a PDF does exist, we store it in a variable.
+                        exhibitLink = exhibit['link']
+                        
+                        # We create a file name to save the exhibit pdf as
+                        exhibitName = f"Exhibit {exhibitNumber} - {docNum} - {docName}"
 
-                                # We package the name, link, and filename together in a tuple, that will be passed as an argument to our
-                                # download_from_link_list() function within the thread_download_pdfs() function where we use map to
-                                # downloading with seperate threads, speeding things up.
-                                exhibitLink_tuple = (exhibitLink, exhibitName, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER)
-                                pdf_list.append(exhibitLink_tuple)
+                        # We package the name, link, and filename together in a tuple, that will be passed as an argument to our
+                        # download_from_link_list() function within the thread_download_pdfs() function where we use map to
+                        # downloading with seperate threads, speeding things up.
+                        exhibitLink_tuple = PdfLink(exhibitLink, exhibitName, base_filename, PDF_OUTPUT_PATH, CLIENT_MATTER,
+                                                    item.get('entry_date'), docNum, exhibitNumber, court, context=context)
+                        pdf_list.append(exhibitLink_tuple)
 
-            # We close the file when we are done. This also ensures that the file is saved.    
-            jsonFile.close()
     return pdf_list
 
-@retry
+@retry(retry_on_exception=metrics.count_retries("pdf"))
 def download_from_link_list(link_list):
     """
     Downloads PDF documents from the web and saves them in a specified folder.
@@ -188,111 +279,310 @@ def download_from_link_list(link_list):
     3. Name of the folder we will create to store our PDFs.
     Notice how the arguments are the same as what the get_urls() function returns.
     This function Isn't made to be used on its own, but can be.
+    Returns True if the PDF was saved, and False if the download failed and was logged.
     """
 
     # We store a user object we can use to login
     user = login.Credentials()
 
     # We unpack the tuple, assigning each value to a human-readable variable name.
-    link, fileName, folderName, outputPath, CLIENT_MATTER = link_list
+    # Only the first 5 values are needed to download the document. The rest are used by the scheduler.
+    link, fileName, folderName, outputPath, CLIENT_MATTER = link_list[:5]
 
     # The directory where we will create the subdirectories within for each individual docket
-    outputDirectoryPath = os.path.join(outputPath, folderName)
+    # (or the staging folder, if PDFs are saved into archives).
+    outputDirectoryPath = os.path.dirname(output_file_path(link_list))
     # The path we are saving the file to, inside the subdirectory we will create.
-    outputFilePath = os.path.join(outputDirectoryPath, f"{fileName}.pdf")
-    
-    # We open a lock so threads can't run this block of code simultaneously since that would cause errors
-    with lock: 
-        # If the directory for the docket doesn't yet exist...
-        if not os.path.exists(outputDirectoryPath):
+    outputFilePath = output_file_path(link_list)
+
+    # The PDF is saved in the PDF folder, or uploaded if storageBackend in config.py is "s3". See storage.py.
+    store = storage.for_directory(outputPath)
+
+    if store.local:
+        # We open a lock so threads can't run this block of code simultaneously since that would cause errors
+        with lock:
+            # If the directory for the docket doesn't yet exist...
+            if not os.path.exists(outputDirectoryPath):
+
+                # Then, create it!
+                os.makedirs(outputDirectoryPath)
+
 
-            # Then, create it!
-            os.makedirs(outputDirectoryPath)
-    
-    
     # We ready our authentication token to pass as a paramater with our http request to get the pdf file. You must be logged in to access the files.
     params = {
             "login_token": user.authenticate(),
             "client_matter": CLIENT_MATTER,
             }
 
-    # We then make an http request to the pdf link and save the result in a variable. We pass the authentication token as a parameter.
-    result = requests.get(link, stream=True, params=params)
-
+    # If an earlier attempt at this PDF stopped partway, we only ask the server for the bytes that are missing.
+    # See resumable.py for how partial downloads are kept. Uploads can't be added to, so they always start over.
+    headers, offset = {}, 0
+    if store.local:
+        if resumable.complete_if_finished(outputFilePath):
+            return True
+        headers, offset = resumable.resume_headers(outputFilePath, link)
+
+    received = 0
+    write_seconds = 0.0
+    result = None
     try:
-        # If the http request failed, we have it throw a detailed error message. This is not immediately shown to the user and we let the donwload
-        # continue for now.
-        result.raise_for_status()
-    
-    except Exception as a:
+        # We then make an http request to the pdf link. We pass the authentication token as a parameter.
+        # The whole transfer happens inside this block, so the time it takes is counted in the metrics.
+        with metrics.timed_request("pdf"), profiling.stage("fetch"):
+            # The request goes over the connections every download shares (see api_session.py).
+            result = api_session.shared().get(link, stream=True, params=params, headers=headers)
+
+            if result.status_code == 416:
+                # The server can't send the bytes we asked for, so the partial file is no good. We delete it, and
+                # start the download again from the beginning. If that fails too, it is logged below like any other error.
+                result.close()
+                resumable.discard(outputFilePath)
+                headers, offset = {}, 0
+                result = api_session.shared().get(link, stream=True, params=params)
+
+            if api_session.is_token_error(result):
+                # The token was turned down before it was due to be renewed, so we log in again and try once more.
+                params["login_token"] = api_session.shared().renew_token(params["login_token"])
+                if params["login_token"] is not None:
+                    result.close()
+                    result = api_session.shared().get(link, stream=True, params=params, headers=headers)
+
+            # If the http request failed, we have it throw a detailed error message. This is not immediately shown to the user and we let the donwload
+            # continue for now.
+            result.raise_for_status()
+
+            # The server may send the whole document even though we asked for part of it, in which case we start over.
+            start = resumable.start_offset(result, offset)
+            total = resumable.total_size(result, start)
+
+            if store.local:
+                resumable.save_state(outputFilePath, link, result, total)
+                # The PDF is written to a .part file as it arrives, so only a small piece of it is in memory at a time.
+                outputFile = open(resumable.part_path(outputFilePath), "ab" if start else "wb")
+            else:
+                # The PDF is uploaded in parts as it arrives, without being saved here first.
+                outputFile = store.open_write(os.path.join(folderName, f"{fileName}.pdf"))
+            with outputFile as e:
+                for chunk in result.iter_content(resumable.CHUNK_SIZE):
+                    received += len(chunk)
+                    write_start = time.perf_counter()
+                    with profiling.stage("write"):
+                        e.write(chunk)
+                    write_seconds += time.perf_counter() - write_start
+                if not store.local and total is not None and received != total:
+                    # Raising here abandons the upload, so a PDF that stopped short isn't kept.
+                    raise requests.ConnectionError(f"The download of {link} stopped after {received} of {total} bytes.")
+
+    except requests.HTTPError as a:
         timeNow = datetime.datetime.now().strftime("%I:%M%p %B %d, %Y")
         with lock:
             # We write the error to log/log.txt with a timestamp and detailed information about which case caused the error.
-            with open(os.path.join(CURRENT_DIR, 'log', 'log.txt'), 'a') as errorlog:
+            with open(os.path.join(global_variables.LOG_PATH, 'log.txt'), 'a') as errorlog:
                 errorlog.write(f"\n{timeNow}\n")
                 errorlog.write(f"{a}")
                 errorlog.write(f"\n{link}\n{fileName}\n{folderName}\n{outputPath}\n------------------")
         
             # We write the error to a csv file that will be stored in the log folder when the download finishes.
-            tableErrorLog.append_error_table(f"{a}", folderName, fileName)
-            return
+            error_table(outputPath).append_error_table(f"{a}", folderName, fileName)
+            return False
+
+    except requests.RequestException:
+        # If the connection breaks partway, the @retry decorator tries again, and the download picks up where it stopped.
+        raise
+
+    except OSError as a:
+        # The file couldn't be written.
+        print(a)
+        with lock:
+            error_table(outputPath).append_error_table(f"{a}", folderName, fileName)
+        return False
 
+    finally:
+        # The connection goes back to the shared pool, even if the download stopped before the whole PDF was read.
+        if result is not None:
+            result.close()
+        metrics.record_bytes_received("pdf", received)
+        metrics.REGISTRY.increment("host_bytes_received_total", received, host=host_queue.host_of(link))
+        metrics.record_bytes_written("pdf", received)
 
+    metrics.REGISTRY.observe("file_write_seconds", write_seconds, kind="pdf")
+
+    # The .part file is only renamed to .pdf if every byte arrived.
+    if store.local and not resumable.finish(outputFilePath, total):
+        timeNow = datetime.datetime.now().strftime("%I:%M%p %B %d, %Y")
+        with lock:
+            with open(os.path.join(global_variables.LOG_PATH, 'log.txt'), 'a') as errorlog:
+                errorlog.write(f"\n{timeNow}\n")
+                errorlog.write("PDF download was incomplete. It will be resumed the next time it is downloaded.")
+                errorlog.write(f"\n{link}\n{fileName}\n{folderName}\n{outputPath}\n------------------")
+            error_table(outputPath).append_error_table("Incomplete download", folderName, fileName)
+        return False
+
+    return True
+
+
+def output_file_path(link_list):
+    """
+    Takes in a tuple generated by the get_urls() function.
+    Returns the path the PDF it links to is saved to.
+    When PDFs are saved into archives, this is where the PDF waits until it is added to its archive.
+    """
+    link, fileName, folderName, outputPath = link_list[:4]
+    if archives.archive_mode():
+        return os.path.join(outputPath, archives.STAGING_FOLDER, folderName, f"{fileName}.pdf")
+    return os.path.join(outputPath, folderName, f"{fileName}.pdf")
+
+def archive_pdf(link_tuple):
+    """
+    Takes in a tuple generated by the get_urls() function whose PDF was downloaded, and adds the PDF to its archive.
+    Returns True if it was added. Does nothing, and returns True, unless outputMode in config.py is "archive".
+    """
+    if not archives.archive_mode():
+        return True
     try:
-        # Once the folder is created, we can create a file inside it, open it, and...
-        with open(outputFilePath, "wb") as e:
+        archives.pdf_writer(link_tuple[3]).add(output_file_path(link_tuple), link_tuple)
+    except OSError as error:
+        print(f"Could not add {link_tuple[1]} to its archive: {error}")
+        with lock:
+            error_table(link_tuple[3]).append_error_table("Could not be archived", link_tuple[2], link_tuple[1])
+        return False
+    return True
 
-            # Write the contents of the PDF to the place we specify.
-            e.write(result.content)
-    
-    except Exception as a:
-        print(a)
-    
-    return
+def download_and_validate(download, link_list, on_done=None):
+    """
+    Takes in the function that downloads one PDF, the tuples generated by the get_urls() function (a list, or any
+    iterable), and optionally a function called with each result as it finishes.
+    Downloads every PDF with host_queue.run_by_host() and checks each one as it is saved, in a pool of processes, while
+    the other downloads continue. PDFs that fail the check are downloaded again if redownloadInvalidPdfs in config.py
+    is True, and the result of every check is added to manifest.csv in the PDF folder.
+    Returns the results of the downloads (None if link_list isn't a list, see host_queue.run_by_host()), with False for
+    PDFs that are still not valid, and the HostStats by host.
+    """
+    manifest = pdf_validation.ManifestWriter()
+    checked = 0
+
+    def check_result(result):
+        manifest.add(result)
+        # PDFs that pass the check are added to their archive, if PDFs are saved into archives.
+        if result["valid"]:
+            archive_pdf(result["link_tuple"])
+
+    def run(tasks, on_done=None):
+        nonlocal checked
+        validator = pdf_validation.Validator(on_result=check_result)
+        def download_and_check(link_tuple):
+            result = download(link_tuple)
+            if result is not False:
+                validator.submit(output_file_path(link_tuple), link_tuple)
+            return result
+        try:
+            results, host_stats = host_queue.run_by_host(download_and_check, tasks, on_done=on_done)
+        finally:
+            invalid = validator.finish()
+            checked += validator.checked
+        return results, host_stats, invalid
 
+    try:
+        results, host_stats, invalid = run(link_list, on_done)
+        if invalid and config.redownloadInvalidPdfs:
+            print(f"{len(invalid)} PDF files are not valid. Downloading them again...")
+            for result in invalid:
+                # A PDF can fail the check because it is missing, so there is nothing to remove.
+                if os.path.exists(result["path"]):
+                    os.remove(result["path"])
+            _, _, invalid = run([result["link_tuple"] for result in invalid])
+    finally:
+        manifest.close()
+
+    # We mark the PDFs that are still not valid as failed, and log them.
+    positions = {id(link_tuple): index for index, link_tuple in enumerate(link_list)} if results is not None else {}
+    for result in invalid:
+        link_tuple = result["link_tuple"]
+        if id(link_tuple) in positions:
+            results[positions[id(link_tuple)]] = False
+        with lock:
+            error_table(link_tuple[3]).append_error_table(f"Invalid PDF: {result['problem']}", link_tuple[2], link_tuple[1])
+
+    if checked:
+        print(f"Checked {checked} PDF files, {len(invalid)} not valid. "
+              f"Page counts saved to {pdf_validation.MANIFEST_NAME} in the PDF folder.")
+    return results, host_stats
 
-def thread_download_pdfs(link_list):
+def thread_download_pdfs(link_list, job=None):
     """
     Wrapper of download_from_link_list()
-    Takes in a link_list generated by the get_urls() function.
+    Takes in a link_list generated by the get_urls() function, or the links from iter_urls() as they are read.
+    Optionally takes in the job the links are from (see jobs.py), whose PDF folder the error log is kept for.
+    The links are ordered, and cut down to the limits set in config.py, by scheduler.schedule_for_download().
+    Only taskWindow links (in config.py) are read ahead of the downloads, so when links come from iter_urls() and no
+    order or caps are set, memory use doesn't grow with the number of links.
     """
 
-    # Gets the amount of links that will be downloaded. We use this later because the progress bar takes the maximum
-    # amount of downloads as a parameter
-    maximum = len(link_list)
+    job = jobs.current(job)
+
+    # We put the most valuable documents first, and leave out any that go over the limits in config.py.
+    link_list = scheduler.schedule_for_download(link_list)
+
+    # Gets the amount of links that will be downloaded, if we know it. We use this later because the progress bar
+    # takes the maximum amount of downloads as a parameter
+    maximum = len(link_list) if isinstance(link_list, list) else None
 
     print("Downloading PDF files...")
 
+    # If metricsPort is set in config.py, the timings of the downloads can be watched while they run.
+    metrics.start_server()
+    # Each download counts down the number of documents still waiting, for the metrics.
+    download = metrics.track_queue(download_from_link_list, "pdf", maximum)
+
     # Starts a timer, we end the timer after we run the function with threading to see how long the bulk download
     # took in total.
     start = time.perf_counter()
-    # We start up the threading executor
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        try:
-            # We use executor.map() to select our function and the arguments that will be passed to it in each new thread.
-            # We wrap this in list(tdqm()) to add the progress bar. See stackoverflow page below for more info.
-            # https://stackoverflow.com/questions/51601756/use-tqdm-with-concurrent-futures
-            results = list(tqdm(executor.map(download_from_link_list, link_list), total=maximum))
-        except FileExistsError as fee:
-            # If we get a FileExistsError, we let the user know that the directory they save to must be empty.
-            print("[ERROR] Directory you're saving PDFs to must be empty.")
-            input()
-            # After pressig enter, we print the error thrown out to the user.
-            print(fee)
+    # The downloads run in a pool of threads. Each host the PDFs come from gets its own queue, so one slow server
+    # can't take up every thread, and no more than maxConnectionsPerHost (in config.py) downloads run against one host at once.
+    progress = tqdm(total=maximum)
+    # The job counts its progress too, so it can be checked while it runs (see daemon.py).
+    job.start_stage("pdf", maximum)
+    def done(result):
+        progress.update()
+        job.task_done("pdf", result)
+    host_stats = {}
+    results = []
+    try:
+        if config.validatePdfs and storage.for_directory(job.pdfOutputPath).local:
+            # Each PDF is checked as it is saved, and the ones that fail are downloaded again. See pdf_validation.
+            results, host_stats = download_and_validate(download, link_list, on_done=done)
+        else:
+            def download_and_archive(link_tuple):
+                return download(link_tuple) and archive_pdf(link_tuple)
+            results, host_stats = host_queue.run_by_host(download_and_archive, link_list, on_done=done)
+    except FileExistsError as fee:
+        # If we get a FileExistsError, we let the user know that the directory they save to must be empty.
+        print("[ERROR] Directory you're saving PDFs to must be empty.")
+        input()
+        # After pressig enter, we print the error thrown out to the user.
+        print(fee)
+    progress.close()
+    # Any archives the PDFs were added to are finished. Archives other jobs are adding to are left open.
+    archives.close_all(job.pdfOutputPath)
     # We finish our timer.
     finish = time.perf_counter()
     # We display the amount of time the downloads took all together.
     print(f"Finished downloading PDF files in {round(finish - start)} seconds.")
+    # We show how quickly each host served its documents.
+    host_queue.print_host_summary(host_stats)
+    if config.saveMetricsSummary:
+        # We save the timings of every download and file write to the log folder.
+        print(f"Timings saved to {metrics.save_summary()}")
     # We save the current date and time in a variable
     currentDateTime = datetime.datetime.now().strftime("%I%M%p %B %d, %Y")
     # We save our csv log that has been tracking any errors throughout the downloads.
     # If any PDFs will not open, then they wil be displayed in this PDF.
     # The file will be in the log folder and will be named according to the date and time when
     # the download finished.
-    tableErrorLog.error_excel_save(os.path.join(CURRENT_DIR, "log", f"logTable - {currentDateTime}.xlsx"))
+    save_error_table(job.pdfOutputPath, os.path.join(global_variables.LOG_PATH, f"logTable - {currentDateTime}.xlsx"))
     # We must return results to make the progress bar work.
     try:
-        os.startfile(global_variables.PDF_OUTPUT_PATH)
+        os.startfile(job.pdfOutputPath)
     except:
         pass
         
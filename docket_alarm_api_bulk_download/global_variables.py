@@ -12,7 +12,14 @@ JSON_INPUT_OUTPUT_PATH = os.path.join(CURRENT_DIR, "json-output")
 # The path wherer the folders full of pdfs will be saved to
 PDF_OUTPUT_PATH = os.path.join(CURRENT_DIR, "pdf-output")
 
+# The path where the error log and the table of failed downloads are saved
+LOG_PATH = os.path.join(CURRENT_DIR, "log")
+
 # The reason for using the script. Used for billing purposes.
 CLIENT_MATTER = ""
 
-IS_CACHED = True
\ No newline at end of file
+IS_CACHED = True
+
+# The address of the Docket Alarm API. Every endpoint the program calls is found by adding its name to the end of this.
+# (The tests and benchmarks point this at a local stand-in for the API.)
+API_URL = "https://www.docketalarm.com/api/v1/"
\ No newline at end of file
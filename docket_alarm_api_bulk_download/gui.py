@@ -68,7 +68,7 @@ def display_login_window():
         if event == "submit":
 
             # We ready up the api endpoint for logging in to Docket Alarm...
-            login_url = "https://www.docketalarm.com/api/v1/login/"
+            login_url = global_variables.API_URL + "login/"
 
             # We ready up the parameters to send to the login endpoint, with the values the user specified...
             data = {
@@ -151,7 +151,7 @@ def gui_run():
     user can select their filepaths and what files they want to download.
     """
     # If there is no file stored locally containing valid login credentials...
-    if not os.path.isfile(os.path.join(CURRENT_DIR, "sav", "credentials.pickle")):
+    if not os.path.isfile(login.CREDENTIALS_PATH):
         # Prompt the user to enter their login info.
         display_login_window()
     # If there is a file stored locally containing valid login credentials...
@@ -0,0 +1,229 @@
+# Built-in Modules
+import os
+import time
+import threading
+import collections
+import concurrent.futures
+from urllib.parse import urlparse
+# Internal Modules
+import config
+import metrics
+
+# The PDF links in a docket report don't all point at the same server. This module runs downloads so that one slow
+# server can't take up every download thread: each host gets its own queue, at most maxConnectionsPerHost downloads
+# run against any one host at a time, and free threads are handed to the hosts in turn.
+# Within each host, documents still start in the order they were given (see scheduler).
+# Tasks can be given as a list or as an iterator that makes them one at a time. Only taskWindow tasks are read ahead of
+# the downloads, so a run over millions of links uses as little memory as one over a few.
+# How many documents each host served, how fast, and how many failed is kept for the summary printed after a download.
+
+def host_of(link):
+    """
+    Returns the host name of a link, like www.docketalarm.com
+    """
+    return urlparse(link).netloc.lower() or "unknown"
+
+class HostStats:
+    """
+    Counts the documents downloaded from one host, and how long it took.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.documents = 0
+        self.failures = 0
+        # The total time spent downloading from the host, added up over every thread.
+        self.busy_seconds = 0.0
+        # When the first download from the host started, and the last one finished.
+        self.first_start = None
+        self.last_finish = None
+        # The bytes received are counted by the download function in the metrics, so we note where the count started.
+        self._bytes_before = metrics.REGISTRY.value("host_bytes_received_total", host=host)
+
+    @property
+    def bytes(self):
+        return metrics.REGISTRY.value("host_bytes_received_total", host=self.host) - self._bytes_before
+
+    def summary(self):
+        elapsed = (self.last_finish - self.first_start) if self.first_start is not None else 0
+        return {
+            "host": self.host,
+            "documents": self.documents,
+            "failures": self.failures,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "documents_per_second": round(self.documents / elapsed, 2) if elapsed else None,
+            "megabytes_per_second": round(self.bytes / 1e6 / elapsed, 2) if elapsed else None,
+            "average_seconds": round(self.busy_seconds / self.documents, 3) if self.documents else None,
+        }
+
+def run_by_host(function, tasks, link_of=lambda task: task[0], max_workers=None, max_per_host=None, on_done=None, window=None):
+    """
+    Takes in the function to run on each task, the tasks (a list, or any iterable), and a function that returns the
+    link of a task.
+    Optionally takes in the number of threads, the most tasks run against one host at a time (pdfDownloadThreads and
+    maxConnectionsPerHost in config.py by default), a function called with each result as it finishes, and the most
+    tasks read from tasks before they start (taskWindow in config.py by default).
+    Returns a list of the results, in the same order as the tasks, and a dictionary of HostStats by host.
+    If tasks isn't a list, the results aren't kept (so memory doesn't grow with the number of tasks), and None is
+    returned in place of the list. Use on_done to see each result.
+    If a task raises an exception, the exception is raised here once the running tasks finish.
+    """
+    # Without a setting, we use as many threads as a ThreadPoolExecutor would.
+    max_workers = max_workers or config.pdfDownloadThreads or min(32, (os.cpu_count() or 1) + 4)
+    max_per_host = max_per_host or config.maxConnectionsPerHost
+    window = max(window or config.taskWindow, max_workers)
+
+    results = [None] * len(tasks) if isinstance(tasks, list) else None
+    tasks = enumerate(tasks)
+    # The tasks read so far that are waiting for each host, in the order they were given,
+    # and the hosts with tasks waiting, in the order they were first seen.
+    waiting = {}
+    hosts = collections.deque()
+    buffered = 0
+    stats = {}
+    running_per_host = {}
+    lock = threading.Lock()
+
+    def read_ahead():
+        # Tasks are read until taskWindow of them are waiting or running, or there are none left.
+        nonlocal buffered, tasks
+        while tasks is not None and buffered < window:
+            try:
+                index, task = next(tasks)
+            except StopIteration:
+                tasks = None
+                break
+            host = host_of(link_of(task))
+            if host not in stats:
+                stats[host] = HostStats(host)
+                running_per_host[host] = 0
+            if not waiting.get(host):
+                waiting[host] = collections.deque()
+                hosts.append(host)
+            waiting[host].append((index, task))
+            buffered += 1
+
+    def run_task(host, task):
+        start = time.perf_counter()
+        with lock:
+            if stats[host].first_start is None:
+                stats[host].first_start = start
+        metrics.REGISTRY.add_to_gauge("host_in_flight", 1, host=host)
+        succeeded = False
+        try:
+            result = function(task)
+            succeeded = result is not False
+            return result
+        finally:
+            finish = time.perf_counter()
+            metrics.REGISTRY.add_to_gauge("host_in_flight", -1, host=host)
+            metrics.REGISTRY.increment("host_documents_total", host=host)
+            if not succeeded:
+                metrics.REGISTRY.increment("host_failures_total", host=host)
+            with lock:
+                host_stats = stats[host]
+                host_stats.documents += 1
+                host_stats.failures += 0 if succeeded else 1
+                host_stats.busy_seconds += finish - start
+                host_stats.last_finish = finish
+
+    running = {}
+    error = None
+    read_ahead()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while hosts or running:
+            # We go around the hosts in turn, starting one task for each host that is under its limit,
+            # until every thread is busy or no host can take another task.
+            started = True
+            while started and len(running) < max_workers and error is None:
+                started = False
+                for _ in range(len(hosts)):
+                    if not hosts or len(running) >= max_workers:
+                        break
+                    host = hosts[0]
+                    hosts.rotate(-1)
+                    if running_per_host[host] >= max_per_host:
+                        continue
+                    index, task = waiting[host].popleft()
+                    if not waiting[host]:
+                        del waiting[host]
+                        hosts.remove(host)
+                    running_per_host[host] += 1
+                    running[executor.submit(run_task, host, task)] = (index, host)
+                    started = True
+
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index, host = running.pop(future)
+                running_per_host[host] -= 1
+                buffered -= 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # We stop starting new tasks, and raise the error once the tasks already running are done.
+                    error = error or e
+                    hosts.clear()
+                    tasks = None
+                    continue
+                if results is not None:
+                    results[index] = result
+                if on_done:
+                    on_done(result)
+            if error is None:
+                read_ahead()
+
+    if error is not None:
+        raise error
+    return results, stats
+
+def run_windowed(function, tasks, max_workers=None, window=None, on_done=None):
+    """
+    Takes in the function to run on each task, and the tasks (any iterable).
+    Optionally takes in the number of threads (as many as a ThreadPoolExecutor uses by default), the most tasks read
+    from tasks before they start (taskWindow in config.py by default), and a function called with each result.
+    Runs the tasks without grouping them by host, reading more only as earlier ones finish, so unlike executor.map
+    there is never a future waiting for every task. Returns the number of tasks run.
+    If a task raises an exception, the exception is raised here once the running tasks finish.
+    """
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    window = max(window or config.taskWindow, max_workers)
+    tasks = iter(tasks)
+    count = 0
+    error = None
+    running = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while error is None and len(running) < window:
+                task = next(tasks, StopIteration)
+                if task is StopIteration:
+                    break
+                running.add(executor.submit(function, task))
+            if not running:
+                break
+            done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                count += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if on_done:
+                    on_done(result)
+    if error is not None:
+        raise error
+    return count
+
+def print_host_summary(stats):
+    """
+    Prints how many documents each host served, and how fast.
+    """
+    if not stats:
+        return
+    print(f"\n{'Host':<40}{'Documents':>10}{'Failed':>8}{'MB':>10}{'Docs/s':>9}{'MB/s':>9}{'Avg s':>8}")
+    for host_stats in sorted(stats.values(), key=lambda host_stats: -host_stats.documents):
+        summary = host_stats.summary()
+        print(f"{summary['host'][:39]:<40}{summary['documents']:>10}{summary['failures']:>8}{summary['megabytes']:>10}"
+              f"{str(summary['documents_per_second']):>9}{str(summary['megabytes_per_second']):>9}{str(summary['average_seconds']):>8}")
@@ -0,0 +1,81 @@
+# Built-in Modules
+import threading
+# Internal Modules
+import global_variables
+import task_records
+
+# A job is one pull: the dockets listed in one input csv, downloaded to one JSON folder and one PDF folder, under one
+# client matter. The download functions in get_json, get_pdfs, generate_spreadsheets and work_queue take the job to
+# run as an argument, so several jobs can run at once in the same program, each in its own thread, without changing
+# each other's settings.
+# Jobs running at once share one connection pool, login token and rate limit (see api_session.py).
+# When no job is given, the functions make one from the settings chosen in the menus (see global_variables.py), which
+# is how the program has always worked.
+
+class Job:
+    """
+    The settings of one pull.
+    Optional arguments (each defaults to the value chosen in the menus, in global_variables.py):
+    csvInputPath - the csv file listing the dockets to download.
+    jsonOutputPath - the folder dockets are saved to, and where PDF links are read from.
+    pdfOutputPath - the folder PDFs are saved to.
+    clientMatter - the reason for the pull, for billing purposes.
+    isCached - whether the cached version of each docket is downloaded (getting uncached dockets may cost more).
+    dockets - a list of (case name, docket number, court) to download, instead of the ones in the csv.
+    """
+
+    def __init__(self, csvInputPath=None, jsonOutputPath=None, pdfOutputPath=None, clientMatter=None, isCached=None,
+                 dockets=None):
+        self.csvInputPath = global_variables.CSV_INPUT_PATH if csvInputPath is None else csvInputPath
+        self.jsonOutputPath = global_variables.JSON_INPUT_OUTPUT_PATH if jsonOutputPath is None else jsonOutputPath
+        self.pdfOutputPath = global_variables.PDF_OUTPUT_PATH if pdfOutputPath is None else pdfOutputPath
+        self.clientMatter = global_variables.CLIENT_MATTER if clientMatter is None else clientMatter
+        self.isCached = global_variables.IS_CACHED if isCached is None else isCached
+        self.dockets = dockets
+        # How far along each stage of the job ("json" and "pdf") is, updated by the downloads as they run.
+        self.progress = {}
+        self._progress_lock = threading.Lock()
+
+    def __repr__(self):
+        return (f"Job(csvInputPath={self.csvInputPath!r}, jsonOutputPath={self.jsonOutputPath!r}, "
+                f"pdfOutputPath={self.pdfOutputPath!r}, clientMatter={self.clientMatter!r}, isCached={self.isCached!r})")
+
+    def start_stage(self, stage, total=None):
+        """
+        Starts counting the tasks of a stage. total is the number of tasks, if it is known.
+        """
+        with self._progress_lock:
+            self.progress[stage] = {"total": total, "done": 0, "failed": 0}
+
+    def task_done(self, stage, succeeded):
+        """
+        Counts a finished task of a stage.
+        """
+        with self._progress_lock:
+            counts = self.progress.setdefault(stage, {"total": None, "done": 0, "failed": 0})
+            counts["done" if succeeded else "failed"] += 1
+
+    def progress_summary(self):
+        """
+        Returns a copy of the progress of every stage, which can be read while the downloads change it.
+        """
+        with self._progress_lock:
+            return {stage: dict(counts) for stage, counts in self.progress.items()}
+
+    def json_context(self):
+        """
+        Returns the RunContext shared by every docket this job downloads (see task_records.py).
+        """
+        return task_records.run_context(self.jsonOutputPath, self.clientMatter, self.isCached)
+
+    def pdf_context(self):
+        """
+        Returns the RunContext shared by every PDF this job downloads.
+        """
+        return task_records.run_context(self.pdfOutputPath, self.clientMatter)
+
+def current(job=None):
+    """
+    Returns the job given, or if it is None, a job with the settings chosen in the menus.
+    """
+    return job if job is not None else Job()
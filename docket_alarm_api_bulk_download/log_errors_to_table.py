@@ -1,50 +1,57 @@
+import csv
 import pandas as pd
+import xlsx_export
 
 class ErrorTable:
     # Used for creating Table (Excel) Error logs.
     # Calling object.df will produce the pandas dataframe.
     # Calling object.append_error_csv(Three string arguments) will add the values to the csv log object.
     # Calling error_csv_save(path) will save the table as a csv to the path you specify.
+    # The rows are kept in a list rather than in the dataframe, so adding a row doesn't copy every row added before it,
+    # and the table is saved one row at a time (see xlsx_export.py), so saving a large table doesn't build it all in memory.
+
+    columns = ['error', 'docket', 'document']
+
     def __init__(self):
         """
-        Initializes an empty dataframe with three column headers
+        Initializes an empty table with three column headers
         """
-        self.df = pd.DataFrame(columns=['error', 'docket','document'])
+        self.rows = []
+
+    @property
+    def df(self):
+        return pd.DataFrame(self.rows, columns=self.columns)
 
     def __repr__(self):
-        # returns the dataframe, using dropna() to remove any null values.
-        # Null values usually get added to the class as a glitch.
-        return pd.dropna(self.df)
+        return repr(self.df)
+
+    def __len__(self):
+        return len(self.rows)
 
     def append_error_table(self, error, docket, document):
         """
         Takes 3 string arguments, adds them to the csv log in order
         """
-        # Before adding a new row, the row must be structured as a dictionary.
-        # We create a dictionary whenever this method is called, that has the column labels as keys,
-        # and will fill in the values with the arguments passed to the method.
-        new_row = {
-            "error":error,
-            "docket":docket,
-            "document":document,
-        }
-        # Then we use append() to add the new values to the dataframe.
-        appender = self.df.append(new_row, ignore_index=True)
-        # Append() usually returns a new dataframe with the changes added, rather than actually 
-        # changing the original, so we make self.df equal to the changed version.
-        self.df = appender.dropna()
+        # Rows with a missing value are left out. Null values usually get added to the table as a glitch.
+        if any(pd.isna(value) for value in (error, docket, document)):
+            return
+        self.rows.append((error, docket, document))
 
     def error_csv_save(self,path):
         """
         Saves the csv when you are done appending it.
         Must specify a path as a string for the argument.
         """
-        self.df.to_csv(path, index=False)
+        with open(path, 'w', newline='') as csvFile:
+            writer = csv.writer(csvFile)
+            writer.writerow(self.columns)
+            writer.writerows(self.rows)
 
     def error_excel_save(self,path):
         """
         Saves the xlsx file when you are done appending it.
         Must specify a file path as a string for the argument.
         """
-        self.df.to_excel(path,index=False)
-
+        with xlsx_export.XlsxWriter(path, self.columns) as writer:
+            writer.writeheader()
+            writer.writerows(self.rows)
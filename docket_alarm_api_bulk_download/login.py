@@ -10,9 +10,14 @@ from retrying import retry
 # Internal Modules
 import requests
 import menus
+import global_variables
+import api_session
 
 CURRENT_DIR = os.path.dirname(__file__)
 
+# The file the users login information is saved to after they log in for the first time.
+CREDENTIALS_PATH = os.path.join(CURRENT_DIR, "sav", "credentials.pickle")
+
 def store_user_info_locally(username, password):
     """
     Takes in 3 strings as arguments, a username, a password, and the client matter.
@@ -27,7 +32,7 @@ def store_user_info_locally(username, password):
     }
 
     # We choose a file location to save the dictionary to.
-    output_path = os.path.join(CURRENT_DIR, "sav", "credentials.pickle")
+    output_path = CREDENTIALS_PATH
     # We open a .pickle file to save the dictionary in, which can store python variables to be accessed later.
     # This allows the program to not have to ask the user to log in every time they use the script.
     pickle_out = open(output_path, "wb")
@@ -46,7 +51,7 @@ class Credentials:
     # This is the code that is run when we initialize a new instance of this object
     def __init__(self):
         # We get the path to the .pickle file the user credentials information is stored in.
-        input_path = os.path.join(CURRENT_DIR, "sav", "credentials.pickle")
+        input_path = CREDENTIALS_PATH
         # We open it up...
         pickle_in = open(input_path, "rb")
         # We store the dictionary inside of it to a variable...
@@ -59,35 +64,16 @@ class Credentials:
     @retry
     def authenticate(self):
         # """Returns the authentication token to make API calls. Make sure that auth.py is filled out!"""
-        # This is the endpoint for logging in to Docket Alarm from the API.
-        login_url = "https://www.docketalarm.com/api/v1/login/"
-
-        # The data we will send to the endpoint with our post request will be
-        # our Docket Alarm username and password.
-        data = {
-            'username': self.username,
-            'password': self.password,
-            }
-
-        # We save the response to a variable. The response is a json object containing
-        # our authentication key iside the json key named 'login_token'
-        result = requests.post(login_url, data=data, timeout=60)
-
-        result.raise_for_status()
-        # Calling the .json() method on the result turns it into a python dictionary we
-        # can work with natively.
-        result_json = result.json()
-
-        # We go into the 'login_token' key in our dictionary. The value we save here to
-        # this variable is our authentication key.
-        login_token = result_json['login_token']
+        # Every download shares one token, so we only log in to Docket Alarm when there isn't a token yet, or it is
+        # due to be renewed. The login itself is done by the shared session in api_session.py.
+        login_token = api_session.shared().login_token(self.username, self.password)
 
         # We have the function return the key so this function can be called wherever we need
         # the key.
         return login_token
 
     def logout(self):
-        os.remove(os.path.join(CURRENT_DIR, "sav", "credentials.pickle"))
+        os.remove(CREDENTIALS_PATH)
 
 def login_interface():
     """
@@ -100,7 +86,7 @@ def login_interface():
     input_password = stdiomask.getpass(mask="*", prompt="")
     menus.clear()
     # This is the endpoint for logging in to Docket Alarm from the API.
-    login_url = "https://www.docketalarm.com/api/v1/login/"
+    login_url = global_variables.API_URL + "login/"
     # The data we will send to the endpoint with our post request will be
     # our Docket Alarm username and password.
     data = {
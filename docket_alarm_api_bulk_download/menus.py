@@ -61,7 +61,7 @@ def welcome():
     clear()
 
     # Checks to see if the account information was stored on the local machine previously
-    if not os.path.isfile(os.path.join(CURRENT_DIR, "sav", "credentials.pickle")):
+    if not os.path.isfile(login.CREDENTIALS_PATH):
 
         # If the user hasn't successfullly logged in before, it takes them to a menu sequence to log in, and saves the info locally
         # for the next time the script is run.
@@ -148,8 +148,9 @@ Enter your response below.[1/2/3/4]
             menus.select_paths_menu()
             menus.specify_client_matter_menu()
             print(msg)
-            link_list = get_pdfs.get_urls("json-output")
-            get_pdfs.thread_download_pdfs(link_list)
+            link_list = plan_before_download(get_pdfs.get_urls("json-output"))
+            if link_list is not None:
+                get_pdfs.thread_download_pdfs(link_list)
         elif userChoice == "4":
             spreadsheet_generator_menu()
         elif userChoice == "5":
@@ -164,7 +165,7 @@ Enter your response below.[1/2/3/4]
 
     handle_input()
     try:
-        os.startfile(os.path.join(CURRENT_DIR, "log"))
+        os.startfile(global_variables.LOG_PATH)
     except:
         pass
         
@@ -185,12 +186,32 @@ def get_json_and_pdfs():
 
     # The function that extracts the proper arguments to pass to the function for downloading PDFs using multiprocessing.
     # That function requires a list of tuples, each tuple being a seperate set of arguments to pass.
-    link_list = get_pdfs.get_urls("json-output")
+    link_list = plan_before_download(get_pdfs.get_urls("json-output"))
+    if link_list is None:
+        return
 
     # This function uses threading on the function that downloads PDFs, allowing us to download multiple PDFs at once,
     # speeding up the process.
     get_pdfs.thread_download_pdfs(link_list)
 
+def plan_before_download(link_list):
+    """
+    Offers to show the user what downloading the PDFs at the links given would get (how many, how big and how long it
+    would take) before it starts, and to stop there. See planner.py.
+    Returns the links to download, or None if the user chose not to download them.
+    """
+    print("\nWould you like to see how many PDFs will be downloaded, how big they are and how long it will take, before starting?[Y/n]\n")
+    if input().upper() != "Y":
+        return link_list
+    import planner
+    plan = planner.make_plan(link_list)
+    planner.print_plan(plan)
+    print(f"\nThe plan was saved to {planner.save_plan(plan)}")
+    print("\nStart downloading the PDFs now?[Y/n]\n")
+    if input().upper() != "Y":
+        return None
+    return link_list
+
 def select_paths_menu(pdfOption=True):
     """
     This displays a menu to the user allowing them to choose file paths to save their downloaded data to.
@@ -280,7 +301,16 @@ Type in one of the following numbers and press ENTER to specify your choice:
 
 [3] Uncached Search
 
-Enter your response below.[0/1/2/3]
+[4] Generate spreadsheets from JSON files you already downloaded.
+    (No API calls are made, so there are no extra charges.)
+
+[5] Load JSON files you already downloaded into a database.
+    (Only new and changed dockets are loaded.)
+
+[6] Search the docket entries you already downloaded.
+    (No API calls are made, so there are no extra charges.)
+
+Enter your response below.[0/1/2/3/4/5/6]
     """
     print(other_options)
     userChoice = input()
@@ -309,8 +339,16 @@ Enter your response below.[0/1/2/3]
     elif userChoice == "3":
         clear()
         print("\nUncached searches retrieve more up-to-date results but may result in extra charges.\nWould you like to turn uncached search on?[Y/n]\n")
+        print("Or type a number of days, to only download a docket uncached when its cached copy is older than that.\n")
         userChoice = input()
-        if userChoice.upper() == "Y":
+        if userChoice.strip().isdigit():
+            clear()
+            config.uncachedAfterDays = int(userChoice)
+            print(f"\nDockets older than {config.uncachedAfterDays} days in the cache will be downloaded again uncached, until the program is closed.")
+            print("\nPress ENTER to return to the menu.")
+            input()
+            welcome()
+        elif userChoice.upper() == "Y":
             clear()
             global_variables.IS_CACHED = False
             print("\nUncached search is ON and will remain ON until the program is closed.")
@@ -325,10 +363,55 @@ Enter your response below.[0/1/2/3]
             input()
             clear()
             other_options_menu()
+    elif userChoice == "4":
+        import generate_spreadsheets
+        clear()
+        print("\nUpon pressing ENTER, a file browser will open. Please browse to the directory of JSON files you\nwould like to generate spreadsheets from.")
+        input()
+        users_json_path = file_browser.browseDirectories("json-output")
+        clear()
+        print("\nUpon pressing ENTER, a file browser will open. Please browse to the directory where you\nwould like to save your output folder.")
+        input()
+        users_output_path = file_browser.browseDirectories("csv-output")
+        clear()
+        print(Fore.RED + msg2 + Style.RESET_ALL)
+        output_directory = generate_spreadsheets.directory_to_tables(users_json_path, users_output_path)
+        print(f"\nSpreadsheets saved to:\n{output_directory}")
+        print("\nPress ENTER to return to the menu.")
+        input()
+        welcome()
+    elif userChoice == "5":
+        import docket_store
+        clear()
+        print("\nUpon pressing ENTER, a file browser will open. Please browse to the directory of JSON files you\nwould like to load.")
+        input()
+        users_json_path = file_browser.browseDirectories("json-output")
+        clear()
+        docket_store.ingest_directory(users_json_path)
+        print(f"\nThe database is saved at:\n{docket_store.default_database_path(users_json_path)}")
+        print("\nPress ENTER to return to the menu.")
+        input()
+        welcome()
+    elif userChoice == "6":
+        import docket_store, search_index
+        clear()
+        print("\nUpon pressing ENTER, a file browser will open. Please browse to the directory of JSON files you\nwould like to search.")
+        input()
+        users_json_path = file_browser.browseDirectories("json-output")
+        clear()
+        # Any dockets that were downloaded since the last search are loaded first.
+        docket_store.ingest_directory(users_json_path)
+        clear()
+        print('\nEnter the words to search for, like: motion AND dismiss, "summary judgment", or sanction*\n')
+        users_search_query = input()
+        search_index.print_results(search_index.search(users_search_query, docket_store.default_database_path(users_json_path)))
+        print("\nPress ENTER to return to the menu.")
+        input()
+        welcome()
 
             
     else:
-        print("Please Enter Valid input (0, 1, 2, or 3)")
+        print("Please Enter Valid input (0, 1, 2, 3, 4, 5, or 6)")
 
 def specify_client_matter_menu():
     clear()
@@ -0,0 +1,295 @@
+# Built-in Modules
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Internal Modules
+import config
+import global_variables
+
+# This module measures where a bulk pull spends its time. Every API call and every file write made by the downloads is
+# timed and counted here, along with the bytes transferred, how many requests are in flight, how many tasks are still
+# waiting, and how many times calls were retried.
+# The measurements can be watched while a pull runs at http://localhost:<metricsPort>/metrics (Prometheus text format)
+# or /metrics.json, and a summary is saved to the log folder when a download finishes.
+
+# Every metric name starts with this.
+PREFIX = "docket_alarm_"
+
+# The upper bounds, in seconds, of the buckets that timings are counted in.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# The help text shown for each metric in the Prometheus output.
+DESCRIPTIONS = {
+    "request_seconds": ("histogram", "Time taken by each API call or PDF download, by endpoint."),
+    "request_errors_total": ("counter", "API calls or PDF downloads that failed, by endpoint."),
+    "retries_total": ("counter", "API calls retried after an error, by endpoint."),
+    "bytes_received_total": ("counter", "Bytes received from the API, by endpoint."),
+    "in_flight": ("gauge", "API calls or PDF downloads currently in progress, by endpoint."),
+    "file_write_seconds": ("histogram", "Time taken to write each downloaded file, by kind of file."),
+    "bytes_written_total": ("counter", "Bytes written to disk, by kind of file."),
+    "queue_depth": ("gauge", "Tasks waiting to start, by stage."),
+    "host_bytes_received_total": ("counter", "Bytes of PDFs received, by host."),
+    "host_in_flight": ("gauge", "PDF downloads currently in progress, by host."),
+    "host_documents_total": ("counter", "PDF downloads finished, by host."),
+    "host_failures_total": ("counter", "PDF downloads that failed, by host."),
+}
+
+class Metrics:
+    """
+    A set of counters, gauges and timings that can be updated from many threads at once.
+    Every value is identified by a name and optional labels, like: increment("retries_total", endpoint="getdocket")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears every value.
+        """
+        with self._lock:
+            self._counters = {}
+            self._gauges = {}
+            # Each timing is stored as [count, total seconds, slowest, count in each bucket].
+            self._timings = {}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add_to_gauge(self, name, amount, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timing[3][index] += 1
+                    break
+
+    def value(self, name, **labels):
+        """
+        Returns the current value of a counter or gauge, or 0 if it hasn't been set.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def to_prometheus(self):
+        """
+        Returns every value as text in the Prometheus exposition format.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {key: [value[0], value[1], value[2], list(value[3])] for key, value in self._timings.items()}
+
+        def label_text(labels, extra=()):
+            labels = list(labels) + list(extra)
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{name}="{str(value)}"' for name, value in labels) + "}"
+
+        lines = []
+        names = sorted({key[0] for key in list(counters) + list(gauges) + list(timings)})
+        for name in names:
+            kind, description = DESCRIPTIONS.get(name, ("untyped", name))
+            lines.append(f"# HELP {PREFIX}{name} {description}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f"{PREFIX}{name}{label_text(labels)} {value}")
+            for (key_name, labels), value in sorted(gauges.items()):
+                if key_name == name:
+                    lines.append(f"{PREFIX}{name}{label_text(labels)} {value}")
+            for (key_name, labels), (count, total, slowest, buckets) in sorted(timings.items()):
+                if key_name != name:
+                    continue
+                # Prometheus histogram buckets count every value up to their bound, so we add them up as we go.
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, buckets):
+                    cumulative += bucket_count
+                    lines.append(f"{PREFIX}{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{PREFIX}{name}_bucket{label_text(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{PREFIX}{name}_sum{label_text(labels)} {round(total, 6)}")
+                lines.append(f"{PREFIX}{name}_count{label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        Returns every value as a dictionary that can be saved as JSON.
+        Timings are given as a count, total, average and slowest time in seconds.
+        """
+        def label_name(name, labels):
+            return name + "".join(f" {key}={value}" for key, value in labels)
+
+        with self._lock:
+            elapsed = time.time() - self.started
+            summary = {
+                "started": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "elapsed_seconds": round(elapsed, 3),
+                "counters": {label_name(*key): value for key, value in sorted(self._counters.items())},
+                "gauges": {label_name(*key): value for key, value in sorted(self._gauges.items())},
+                "timings": {},
+            }
+            for key, (count, total, slowest, buckets) in sorted(self._timings.items()):
+                summary["timings"][label_name(*key)] = {
+                    "count": count,
+                    "total_seconds": round(total, 3),
+                    "average_seconds": round(total / count, 4) if count else None,
+                    "slowest_seconds": round(slowest, 4),
+                    "per_second": round(count / elapsed, 2) if elapsed else None,
+                }
+        return summary
+
+# The values measured by this process. Everything the program measures goes here.
+REGISTRY = Metrics()
+
+@contextmanager
+def timed_request(endpoint):
+    """
+    Used as: with metrics.timed_request("getdocket"):
+    Times the API call or download made inside the with block, counts it as in flight while it runs,
+    and counts it as an error if it raises an exception.
+    """
+    REGISTRY.add_to_gauge("in_flight", 1, endpoint=endpoint)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        REGISTRY.increment("request_errors_total", endpoint=endpoint)
+        raise
+    finally:
+        REGISTRY.observe("request_seconds", time.perf_counter() - start, endpoint=endpoint)
+        REGISTRY.add_to_gauge("in_flight", -1, endpoint=endpoint)
+
+@contextmanager
+def timed_write(kind):
+    """
+    Used as: with metrics.timed_write("pdf"):
+    Times the file write made inside the with block.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("file_write_seconds", time.perf_counter() - start, kind=kind)
+
+def record_error(endpoint):
+    """
+    Counts a failed API call or download that didn't raise an exception (like a response with 'success': False).
+    """
+    REGISTRY.increment("request_errors_total", endpoint=endpoint)
+
+def record_bytes_received(endpoint, amount):
+    REGISTRY.increment("bytes_received_total", amount, endpoint=endpoint)
+
+def record_bytes_written(kind, amount):
+    REGISTRY.increment("bytes_written_total", amount, kind=kind)
+
+def count_retries(endpoint):
+    """
+    Returns a function to pass as retry_on_exception to the @retry decorator, like:
+    @retry(retry_on_exception=metrics.count_retries("getdocket"))
+    Every exception is still retried, just as with a plain @retry, but each retry is counted.
+    """
+    def retry_on_exception(exception):
+        REGISTRY.increment("retries_total", endpoint=endpoint)
+        return True
+    return retry_on_exception
+
+def track_queue(function, stage, total):
+    """
+    Takes in the function run for each task of a download stage ("json" or "pdf"), and the number of tasks.
+    Returns the function wrapped so that the queue depth of the stage goes down by one as each task starts.
+    If the number of tasks isn't known (None), the queue depth isn't tracked.
+    """
+    if total is None:
+        return function
+    REGISTRY.set_gauge("queue_depth", total, stage=stage)
+    def run_task(task):
+        REGISTRY.add_to_gauge("queue_depth", -1, stage=stage)
+        return function(task)
+    return run_task
+
+def save_summary(path=None):
+    """
+    Saves the summary of every value measured so far as a JSON file, in the log folder by default.
+    Returns the path of the file.
+    """
+    if path is None:
+        timeNow = datetime.datetime.now().strftime("%I%M%p %B %d, %Y")
+        path = os.path.join(global_variables.LOG_PATH, f"metrics - {timeNow}.json")
+    with open(path, 'w') as summaryFile:
+        json.dump(REGISTRY.summary(), summaryFile, indent=3)
+    return path
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        # Requests for the metrics are not printed, so they don't get in the way of the progress bars.
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body = REGISTRY.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body = json.dumps(REGISTRY.summary(), indent=3).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+_server = None
+
+def start_server(port=None):
+    """
+    Starts serving the metrics on the local port specified (metricsPort in config.py by default) in a background thread.
+    Does nothing if no port is set, or if the server is already running. Returns the server, or None.
+    """
+    global _server
+    port = port if port is not None else config.metricsPort
+    if port is None or _server is not None:
+        return _server
+    _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    print(f"Serving metrics at http://127.0.0.1:{_server.server_address[1]}/metrics")
+    return _server
+
+def stop_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -0,0 +1,151 @@
+# Built-in Modules
+import os
+import csv
+import threading
+import concurrent.futures
+# Internal Modules
+import config
+
+# This module checks that every downloaded PDF really is a PDF. A server can answer with an HTML error page, or a
+# download can stop short, and either way the file is saved with a .pdf extension. Each file is checked for the
+# '%PDF-' header at its start and the '%%EOF' marker at its end, and optionally opened to count its pages.
+# The checks run in a pool of processes as each download finishes, so they never hold up the download threads.
+# Files that fail are downloaded again, and the results, with page counts, are added to manifest.csv in the PDF folder.
+
+# The name of the file in the PDF folder that lists every checked PDF.
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_COLUMNS = ["docket", "file", "link", "bytes", "pages", "valid", "problem"]
+
+# PDF readers accept the header anywhere in the first 1024 bytes, and the end of file marker anywhere in the last 1024.
+HEADER_WINDOW = 1024
+TRAILER_WINDOW = 1024
+
+def validate_pdf(path, count_pages=True):
+    """
+    Takes in the path to a PDF file, and optionally whether to count its pages.
+    Returns a dictionary with the size of the file, its number of pages (or None), whether it is valid,
+    and the problem found if it isn't.
+    This runs in a separate process, so it only uses what it is given.
+    """
+    result = {"bytes": 0, "pages": None, "valid": False, "problem": None}
+    try:
+        size = os.path.getsize(path)
+        result["bytes"] = size
+        with open(path, "rb") as pdfFile:
+            head = pdfFile.read(HEADER_WINDOW)
+            pdfFile.seek(max(0, size - TRAILER_WINDOW))
+            tail = pdfFile.read(TRAILER_WINDOW)
+    except OSError as error:
+        result["problem"] = f"Could not read file: {error}"
+        return result
+
+    if size == 0:
+        result["problem"] = "Empty file"
+    elif b"%PDF-" not in head:
+        # An error page sent in place of the document is the usual reason for this.
+        result["problem"] = "Not a PDF (the file starts with: " + head[:40].decode("latin-1").strip() + ")"
+    elif b"%%EOF" not in tail:
+        result["problem"] = "Incomplete PDF (no end of file marker)"
+    else:
+        result["valid"] = True
+
+    if result["valid"] and count_pages:
+        try:
+            import PyPDF2
+            result["pages"] = len(PyPDF2.PdfReader(path, strict=False).pages)
+        except Exception:
+            # Some PDFs that open fine in a viewer can't be read here. The page count is left empty,
+            # but the file isn't treated as broken, since its header and end of file marker are in place.
+            result["pages"] = None
+    return result
+
+class Validator:
+    """
+    Checks PDFs in a pool of processes as they are handed to it with submit().
+    Call finish() once every download is done to wait for the checks and get the PDFs that failed.
+    If on_result is given, it is called with the result of each check as it finishes.
+    """
+
+    def __init__(self, processes=None, count_pages=None, on_result=None):
+        self.count_pages = config.pdfValidationCountPages if count_pages is None else count_pages
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=processes or config.pdfValidationProcesses)
+        # The processes are started now, before the download threads, rather than on the first check.
+        self._executor.submit(os.getpid).result()
+        self._lock = threading.Lock()
+        self._futures = set()
+        # Only the results of PDFs that aren't valid are kept, so memory doesn't grow with the number of PDFs.
+        self.invalid = []
+        self.checked = 0
+        self.on_result = on_result
+
+    def submit(self, path, link_tuple):
+        """
+        Queues the PDF at path, downloaded from link_tuple, to be checked. Returns straight away.
+        """
+        future = self._executor.submit(validate_pdf, path, self.count_pages)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(lambda future: self._done(future, path, link_tuple))
+
+    def _done(self, future, path, link_tuple):
+        try:
+            result = future.result()
+        except Exception as error:
+            result = {"bytes": None, "pages": None, "valid": False, "problem": f"Could not be checked: {error}"}
+        result.update({"path": path, "link_tuple": link_tuple})
+        with self._lock:
+            self._futures.discard(future)
+            self.checked += 1
+            if not result["valid"]:
+                self.invalid.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    def finish(self):
+        """
+        Waits for every check to finish and shuts down the pool.
+        Returns the results for the PDFs that are not valid.
+        """
+        with self._lock:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            return list(self.invalid)
+
+class ManifestWriter:
+    """
+    Adds the result of each check to manifest.csv in the PDF folder the file was saved to, as the results arrive.
+    A file checked more than once (because it was downloaded again) has a row for each check. The last row is the latest.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def add(self, result):
+        link_tuple = result["link_tuple"]
+        with self._lock:
+            writer = self._files.get(link_tuple[3])
+            if writer is None:
+                manifest_path = os.path.join(link_tuple[3], MANIFEST_NAME)
+                is_new = not os.path.exists(manifest_path)
+                manifestFile = open(manifest_path, 'a', newline='', encoding='utf-8')
+                writer = self._files[link_tuple[3]] = (manifestFile, csv.DictWriter(manifestFile, fieldnames=MANIFEST_COLUMNS))
+                if is_new:
+                    writer[1].writeheader()
+            writer[1].writerow({
+                "docket": link_tuple[2],
+                "file": os.path.basename(result["path"]),
+                "link": link_tuple[0],
+                "bytes": result["bytes"],
+                "pages": result["pages"],
+                "valid": result["valid"],
+                "problem": result["problem"],
+            })
+
+    def close(self):
+        with self._lock:
+            for manifestFile, _ in self._files.values():
+                manifestFile.close()
+            self._files.clear()
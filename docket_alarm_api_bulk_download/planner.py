@@ -0,0 +1,163 @@
+# Built-in Modules
+import os
+import json
+import time
+import datetime
+import collections
+# Internal Modules
+import config
+import global_variables
+import jobs
+import login
+import api_session
+import host_queue
+import scheduler
+import task_records
+
+# A PDF download can take hours, and before this there was no way to know how many documents it would get or how
+# big they were until it was running. A plan answers that first, without downloading anything:
+#   the links are read from the JSON and ordered and capped by the scheduler, exactly as the download would,
+#   the size of each document is asked for from its server with a HEAD request (if planProbeSizes in config.py is
+#   True), many at once, with no more than maxConnectionsPerHost at a time against one server,
+#   and the time the download would take is worked out from the sizes, how long the servers took to answer, and the
+#   number of download threads.
+# The plan is saved as a JSON file in the log folder, with every document in it, so the download can then be run from
+# the plan (python docket_alarm_api_bulk_download run-plan <plan file>) without reading the JSON again.
+
+# The size used for documents whose server doesn't say, when no other document's size is known either.
+DEFAULT_DOCUMENT_BYTES = 250000
+
+# The seconds a download is expected to wait for its server to answer, when no server was asked.
+DEFAULT_SECONDS_PER_REQUEST = 0.5
+
+def probe(link_tuple, params):
+    """
+    Takes in a link from get_pdfs.get_urls() and the parameters to log in with.
+    Asks the document's server for its size without downloading it. Returns the size in bytes (None if the server
+    doesn't say), and the seconds the server took to answer.
+    """
+    start = time.perf_counter()
+    try:
+        response = api_session.shared().request("HEAD", link_tuple[0], params=params, allow_redirects=True, timeout=30)
+        size = response.headers.get("Content-Length") if response.ok else None
+        response.close()
+    except Exception:
+        size = None
+    return (int(size) if size and size.isdigit() else None), time.perf_counter() - start
+
+def estimate_seconds(documents, threads=None, per_host=None, megabytes_per_second=None):
+    """
+    Takes in a list of (host, bytes, seconds to answer) for each document.
+    Returns how many seconds downloading them is expected to take with the number of threads and connections per host
+    given (pdfDownloadThreads and maxConnectionsPerHost in config.py by default).
+    """
+    threads = threads or config.pdfDownloadThreads or min(32, (os.cpu_count() or 1) + 4)
+    per_host = min(per_host or config.maxConnectionsPerHost, threads)
+    bytes_per_second = (megabytes_per_second or config.planMegabytesPerSecond) * 1000000
+    work = collections.Counter()
+    for host, size, seconds in documents:
+        work[host] += seconds + size / bytes_per_second
+    if not work:
+        return 0.0
+    # The threads share the work, but a host can't be sent more than per_host downloads at once.
+    return max(sum(work.values()) / threads, max(work.values()) / per_host)
+
+def make_plan(link_list, job=None, probe_sizes=None):
+    """
+    Takes in the links from get_pdfs.get_urls() or get_pdfs.iter_urls(), and optionally the job they are from
+    (see jobs.py) and whether to ask each server for the size of its documents (planProbeSizes in config.py by default).
+    Returns the plan as a dictionary.
+    """
+    job = jobs.current(job)
+    probe_sizes = config.planProbeSizes if probe_sizes is None else probe_sizes
+    # The plan has the documents the download would get, in the order it would get them.
+    link_list = list(scheduler.schedule_for_download(link_list))
+
+    sizes, seconds = [None] * len(link_list), [None] * len(link_list)
+    if probe_sizes and link_list:
+        user = login.Credentials()
+        params = {"login_token": user.authenticate(), "client_matter": job.clientMatter}
+        print(f"Asking for the size of {len(link_list)} documents...")
+        results, _ = host_queue.run_by_host(lambda link_tuple: probe(link_tuple, params), link_list)
+        sizes, seconds = zip(*results)
+
+    # Documents whose server didn't say are counted at the average size of the ones that did.
+    known = [size for size in sizes if size is not None]
+    average_size = sum(known) / len(known) if known else DEFAULT_DOCUMENT_BYTES
+    answered = collections.defaultdict(list)
+    for link_tuple, answer in zip(link_list, seconds):
+        if answer is not None:
+            answered[host_queue.host_of(link_tuple[0])].append(answer)
+    average_answer = {host: sum(times) / len(times) for host, times in answered.items()}
+
+    documents, estimates = [], []
+    dockets = collections.OrderedDict()
+    for link_tuple, size in zip(link_list, sizes):
+        host = host_queue.host_of(link_tuple[0])
+        estimate = size if size is not None else average_size
+        estimates.append((host, estimate, average_answer.get(host, DEFAULT_SECONDS_PER_REQUEST)))
+        docket = dockets.setdefault(link_tuple[2], {"docket": link_tuple[2], "documents": 0, "bytes": 0, "estimated_fees": 0.0})
+        docket["documents"] += 1
+        docket["bytes"] += round(estimate)
+        docket["estimated_fees"] += scheduler.document_fee(link_tuple)
+        documents.append([link_tuple[0], link_tuple[1], link_tuple[2], scheduler.link_value(link_tuple, "entryDate"),
+                          scheduler.link_value(link_tuple, "entryNumber"), scheduler.link_value(link_tuple, "exhibit"),
+                          scheduler.link_value(link_tuple, "court"), size])
+
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "pdf_dir": job.pdfOutputPath,
+        "client_matter": job.clientMatter,
+        "summary": {
+            "documents": len(documents),
+            "dockets": len(dockets),
+            "sizes_known": len(known),
+            "estimated_bytes": round(sum(estimate for _, estimate, _ in estimates)),
+            "estimated_fees": round(sum(docket["estimated_fees"] for docket in dockets.values()), 2),
+            "estimated_seconds": round(estimate_seconds(estimates)),
+        },
+        "dockets": list(dockets.values()),
+        "documents": documents,
+    }
+
+def save_plan(plan, path=None):
+    """
+    Saves a plan as a JSON file, in the log folder by default. Returns the path of the file.
+    """
+    if path is None:
+        timeNow = datetime.datetime.now().strftime("%I%M%p %B %d, %Y")
+        path = os.path.join(global_variables.LOG_PATH, f"plan - {timeNow}.json")
+    with open(path, 'w') as planFile:
+        json.dump(plan, planFile, indent=3)
+    return path
+
+def load_plan(path):
+    """
+    Takes in the path to a plan saved by save_plan(). Returns the job to run it with, and the links to download.
+    """
+    with open(path) as planFile:
+        plan = json.load(planFile)
+    job = jobs.Job(pdfOutputPath=plan["pdf_dir"], clientMatter=plan["client_matter"])
+    context = job.pdf_context()
+    link_list = [task_records.PdfLink(link, fileName, folderName, job.pdfOutputPath, job.clientMatter, entryDate,
+                                      entryNumber, exhibit, court, context=context)
+                 for link, fileName, folderName, entryDate, entryNumber, exhibit, court, _ in plan["documents"]]
+    return job, link_list
+
+def print_plan(plan, dockets=10):
+    """
+    Prints what a plan would download, with the dockets that have the most to download.
+    """
+    summary = plan["summary"]
+    megabytes = summary["estimated_bytes"] / 1000000
+    duration = datetime.timedelta(seconds=summary["estimated_seconds"])
+    print(f"\n{summary['documents']} documents from {summary['dockets']} dockets, about {megabytes:.1f} MB "
+          f"({summary['sizes_known']} sizes known), estimated fees {summary['estimated_fees']:.2f}.")
+    print(f"Expected to take about {duration} with the current download settings.")
+    if not plan["dockets"]:
+        return
+    print(f"\n{'Docket':<50}{'Documents':>10}{'MB':>10}{'Fees':>10}")
+    for docket in sorted(plan["dockets"], key=lambda docket: docket["bytes"], reverse=True)[:dockets]:
+        print(f"{docket['docket'][:49]:<50}{docket['documents']:>10}{docket['bytes'] / 1000000:>10.1f}{docket['estimated_fees']:>10.2f}")
+    if len(plan["dockets"]) > dockets:
+        print(f"...and {len(plan['dockets']) - dockets} more dockets.")
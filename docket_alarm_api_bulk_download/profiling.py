@@ -0,0 +1,190 @@
+# Built-in Modules
+import os
+import io
+import sys
+import time
+import datetime
+import threading
+import cProfile
+import pstats
+from contextlib import contextmanager
+# Internal Modules
+import global_variables
+
+# This module is for finding out why a pull is slow. Run any command with --profile, like:
+#     python docket_alarm_api_bulk_download --profile tables path/to/json-output path/to/output
+# (or just --profile to profile a run from the menus) and three files are saved to the log folder when it finishes:
+#     profile - <date>.prof    cProfile statistics for every thread, which can be opened with pstats or snakeviz.
+#     profile - <date>.folded  Stacks sampled from every thread, in the folded format read by flamegraph.pl and speedscope.
+#     profile - <date>.txt     How long each stage took (CSV read, auth, fetch, parse, serialize, write, tables),
+#                              followed by the functions that took the most time.
+# When no run is being profiled, stage() only checks a flag, so the timed code runs at full speed.
+
+# How many seconds the sampler waits between samples of every thread's stack.
+SAMPLE_INTERVAL = 0.005
+
+# The stages a pull is split into, in the order they are listed in the report.
+STAGES = ["csv_read", "auth", "fetch", "parse", "serialize", "write", "tables"]
+
+# These are set while a run is being profiled.
+_active = False
+_stage_lock = threading.Lock()
+_stage_seconds = {}
+_stage_counts = {}
+
+@contextmanager
+def stage(name):
+    """
+    Used as: with profiling.stage("fetch"):
+    Adds the time taken by the with block to the stage named, when a run is being profiled.
+    Stages timed in many threads at once are added together, so a stage's time can be longer than the whole run.
+    """
+    if not _active:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _stage_lock:
+            _stage_seconds[name] = _stage_seconds.get(name, 0.0) + elapsed
+            _stage_counts[name] = _stage_counts.get(name, 0) + 1
+
+class Sampler(threading.Thread):
+    """
+    A background thread that regularly records the call stack of every other thread,
+    and counts how often each stack was seen.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Threads from the same pool are grouped together, so their stacks add up in the flame graph.
+                thread_name = names.get(thread_id, "thread").split("_")[0].rstrip("-0123456789") or "thread"
+                folded = ";".join([thread_name] + calls[::-1]).replace(" ", "_")
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        """
+        Returns the samples as text in the folded stack format: one stack per line, followed by how often it was seen.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+class _ThreadProfiles:
+    """
+    Starts a cProfile profiler in every thread started while it is installed, so work done in the
+    download thread pools is profiled along with the main thread.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    def _start_in_thread(self, *args):
+        # This is called by the first event in each new thread. Enabling the profiler replaces this hook for the thread.
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # On Python 3.12 and later there is only one profiler for every thread, and it is already running.
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self.profiles.append(profile)
+
+    def install(self):
+        threading.setprofile(self._start_in_thread)
+
+    def uninstall(self):
+        threading.setprofile(None)
+        with self._lock:
+            for profile in self.profiles:
+                profile.disable()
+
+def stage_report(elapsed):
+    """
+    Returns the time taken by each stage, as a table in text.
+    """
+    with _stage_lock:
+        seconds = dict(_stage_seconds)
+        counts = dict(_stage_counts)
+    names = [name for name in STAGES if name in seconds] + sorted(name for name in seconds if name not in STAGES)
+    lines = [f"Wall-clock time: {elapsed:.3f} seconds", "",
+             f"{'Stage':<12}{'Calls':>10}{'Seconds':>12}{'Average (ms)':>15}{'Of run time':>14}"]
+    for name in names:
+        share = f"{seconds[name] / elapsed:.0%}" if elapsed else ""
+        lines.append(f"{name:<12}{counts[name]:>10}{seconds[name]:>12.3f}{seconds[name] / counts[name] * 1000:>15.2f}{share:>14}")
+    if not names:
+        lines.append("(No stages were timed.)")
+    lines.append("")
+    lines.append("Stages run in many threads at once can add up to more than the run time.")
+    return "\n".join(lines)
+
+def profile_run(function, *args, output_directory=None, **kwargs):
+    """
+    Runs the function with the arguments specified while profiling it, and saves the profile files
+    to output_directory (the log folder by default). Returns whatever the function returns.
+    """
+    global _active
+    output_directory = output_directory or global_variables.LOG_PATH
+    os.makedirs(output_directory, exist_ok=True)
+    base_path = os.path.join(output_directory, f"profile - {datetime.datetime.now().strftime('%I%M%S%p %B %d, %Y')}")
+
+    with _stage_lock:
+        _stage_seconds.clear()
+        _stage_counts.clear()
+    _active = True
+    main_profile = cProfile.Profile()
+    thread_profiles = _ThreadProfiles()
+    sampler = Sampler()
+
+    thread_profiles.install()
+    sampler.start()
+    start = time.perf_counter()
+    main_profile.enable()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        main_profile.disable()
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        thread_profiles.uninstall()
+        _active = False
+
+        stats = pstats.Stats(main_profile)
+        for profile in thread_profiles.profiles:
+            stats.add(profile)
+        stats.dump_stats(base_path + ".prof")
+
+        with open(base_path + ".folded", 'w') as foldedFile:
+            foldedFile.write(sampler.folded())
+
+        top_functions = io.StringIO()
+        pstats.Stats(base_path + ".prof", stream=top_functions).sort_stats("cumulative").print_stats(40)
+        with open(base_path + ".txt", 'w') as reportFile:
+            reportFile.write(stage_report(elapsed))
+            reportFile.write("\n\n")
+            reportFile.write(top_functions.getvalue())
+
+        print(f"\n{stage_report(elapsed)}")
+        print(f"\nProfile saved to {base_path}.prof, .folded and .txt")
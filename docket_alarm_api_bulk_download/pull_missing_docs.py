@@ -1,45 +1,252 @@
-import requests
-import get_json
+# Built-in Modules
+import os
+import json
+import queue
+import datetime
+import threading
+# Internal Modules
+import config
+import global_variables
+import jobs
+import login
+import metrics
+import profiling
+import archives
+import storage
+import filters
+import host_queue
+import api_session
+import user_tools
 
-def search_direct(docketnum, court):
-    """ Takes in the name of a party and the docket number as a parameter,
-        returns the Docket Alarm search results. You can make calls to the
-        /getdocket endpoint with these results to get more detailed information
-        on the docket you are looking for.
+# Some docket entries are saved without a 'link', because Docket Alarm didn't have the document yet when the docket
+# was pulled. This module recovers them:
+#   the saved JSON is scanned for entries without a link (that match pdfFilter in config.py),
+#   each of those dockets is looked up in its court's own system, with searchpacer for federal courts and searchdirect
+#   for the rest, and pulled again uncached, so Docket Alarm fetches it from the court,
+#   and the links the missing entries have now are handed to the PDF downloader as they are found.
+# The docket pulled again is saved over the old one, so entries that were recovered aren't looked up again.
+# The lookups run missingDocsThreads at a time, no faster than missingDocsRequestsPerSecond (both in config.py), and
+# within the limit every request shares (maxRequestsPerSecond, see api_session.py).
+
+# Spaces out the searches across every thread, on top of the limit every request shares. With
+# missingDocsRequestsPerSecond set to None, only that shared limit applies.
+_lookup_limiter = api_session.RateLimiter(config.missingDocsRequestsPerSecond)
+
+def search_direct(docketnum, court, client_matter=""):
+    """ Takes in the docket number and the court as parameters,
+        returns the Docket Alarm search results, searched for in the court's own system.
+        You can make calls to the /getdocket endpoint with these results to get more
+        detailed information on the docket you are looking for.
     """
-    searchdirect_url = "https://www.docketalarm.com/api/v1/searchdirect/"
+    searchdirect_url = global_variables.API_URL + "searchdirect/"
 
     data = {
-        'login_token':get_json.authenticate(),
-        'client_matter':"",
+        'login_token':login.Credentials().authenticate(),
+        'client_matter':client_matter,
         # 'party_name':party_name,
         'docketnum':docketnum,
         'court': court,
         # 'case_type':'CF',
 
     }
-    
-    result = requests.post(searchdirect_url, data)
+
+    _lookup_limiter.wait()
+    with metrics.timed_request("searchdirect"), profiling.stage("fetch"):
+        result = api_session.shared().post(searchdirect_url, data, timeout=120)
 
     result_json = result.json()
 
     return result_json
 
-def search_pacer(docketnum, court):
-    url = "https://www.docketalarm.com/api/v1/searchpacer/"
+def search_pacer(docketnum, court, client_matter=""):
+    """ Takes in the docket number and the court region as parameters,
+        returns the Docket Alarm search results, searched for in PACER.
+    """
+    url = global_variables.API_URL + "searchpacer/"
 
     data = {
-        'login_token':get_json.authenticate(),
-        'client_matter':"",
+        'login_token':login.Credentials().authenticate(),
+        'client_matter':client_matter,
         # 'party_name':party_name,
         'docket_num':docketnum,
         'court_region': court,
         # 'case_type':'CF',
 
     }
-    
-    result = requests.get(url, data)
+
+    _lookup_limiter.wait()
+    with metrics.timed_request("searchpacer"), profiling.stage("fetch"):
+        result = api_session.shared().get(url, params=data, timeout=120)
 
     result_json = result.json()
 
-    return result_json
\ No newline at end of file
+    return result_json
+
+# Parts of a court's name that mark it as a federal court whose dockets are in PACER. State courts have "State" in
+# their names (like "Texas State, 1st Court of Appeals" or "Arkansas State, Pulaski County, Circuit Court"), and are
+# ruled out first, since many of them are called circuit or district courts too.
+PACER_COURT_MARKERS = ("U.S. District Court", "U.S. Court of Appeals", "Circuit", "Bankruptcy Court",
+                       "Court of Federal Claims", "Court of International Trade")
+
+def is_pacer_court(court):
+    """
+    Returns True if the court is a federal court, whose dockets are in PACER.
+    Searching PACER may cost money, so a court is only treated as one when its name clearly says so.
+    """
+    court = str(court or "")
+    if "State" in court:
+        return False
+    return any(marker in court for marker in PACER_COURT_MARKERS)
+
+def missing_entries(docket_json, document_filter=None):
+    """
+    Takes in a docket's JSON as a dictionary. Returns the numbers of the entries (that match pdfFilter in config.py)
+    that have no link to their document.
+    """
+    document_filter = document_filter or filters.compile_filter()
+    if not document_filter.main_documents():
+        return []
+    return [item.get('number') for item in docket_json.get('docket_report') or []
+            if 'link' not in item and document_filter.entry_matches(item)]
+
+def scan_missing(input_directory):
+    """
+    Yields (folder name, docket number, court, entry numbers) for each saved docket with entries missing their document.
+    """
+    document_filter = filters.compile_filter()
+
+    def missing(name, docket_json):
+        info = docket_json.get('info') or {}
+        numbers = missing_entries(docket_json, document_filter)
+        if numbers and info.get('docket_number') and info.get('court'):
+            return name, info['docket_number'], info['court'], numbers
+        return None
+
+    store = storage.for_directory(input_directory)
+    for filename in store.names():
+        if filename.lower().endswith(".json"):
+            with profiling.stage("parse"):
+                result = missing(filename[:-len(".json")], json.loads(store.read_bytes(filename)))
+            if result:
+                yield result
+    # A docket in the compressed shards is saved again after its old copy when it is recovered. Only the copy saved
+    # last is read back (see archives.iter_shard_dockets()).
+    for name, docket_json in (archives.iter_shard_dockets(input_directory) if store.local else ()):
+        result = missing(name, docket_json)
+        if result:
+            yield result
+
+def recover_links(missing, job):
+    """
+    Takes in one docket from scan_missing(), and the job it is from (see jobs.py).
+    Looks the docket up in its court's system, pulls it again uncached, and returns the PdfLinks of the missing
+    entries that have a link now.
+    """
+    # We import get_json and get_pdfs here rather than at the top of the module, because they load the GUI modules.
+    import get_json, get_pdfs
+    name, docketNumber, court, numbers = missing
+    search = search_pacer if is_pacer_court(court) else search_direct
+    found = search(docketNumber, court, job.clientMatter)
+    results = found.get('search_results') or [] if isinstance(found, dict) else []
+    # The court's system may write the docket number or court a little differently, so we pull the docket it found.
+    if results:
+        docketNumber, court = results[0].get('docket', docketNumber), results[0].get('court', court)
+    user = login.Credentials()
+    docket_json = user_tools.get_docket(user.authenticate(), docketNumber, court, client_matter=job.clientMatter, cached=False)
+    if not docket_json.get('success'):
+        raise ValueError(docket_json.get('error') or "The docket could not be pulled again.")
+    # The docket is saved over its old copy, so the entries recovered aren't looked up (and paid for) again next time.
+    get_json.save_docket_json(job.jsonOutputPath, name, docket_json)
+    wanted = {str(number) for number in numbers}
+    return [link for link in get_pdfs.get_urls_from_docket(docket_json, name, job.pdfOutputPath, job.clientMatter)
+            if link.exhibit is None and str(link.entryNumber) in wanted]
+
+def iter_recovered_links(job=None):
+    """
+    Yields the PdfLinks recovered for the entries missing their document in the job's JSON folder (see jobs.py), as
+    the lookups find them, so the PDFs start downloading while other dockets are still being looked up.
+    """
+    job = jobs.current(job)
+    found = queue.Queue(maxsize=config.taskWindow)
+    finished = object()
+    # Set when the links stop being read (because the download stopped, or this generator was closed early), so the
+    # lookups stop too, rather than waiting forever for room in the queue.
+    stopped = threading.Event()
+    errors = []
+    counts = {"dockets": 0, "entries": 0, "recovered": 0, "failed": 0}
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                found.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def dockets():
+        for missing in scan_missing(job.jsonOutputPath):
+            if stopped.is_set():
+                return
+            counts["dockets"] += 1
+            counts["entries"] += len(missing[3])
+            yield missing
+
+    def lookup(missing):
+        try:
+            return recover_links(missing, job)
+        except Exception as error:
+            # A docket that can't be looked up is written to the error log, and the others carry on.
+            timeNow = datetime.datetime.now().strftime("%I:%M%p %B %d, %Y")
+            with open(os.path.join(global_variables.LOG_PATH, 'log.txt'), 'a') as errorlog:
+                errorlog.write(f"\n{timeNow}\n")
+                errorlog.write("Missing documents could not be recovered:\n")
+                errorlog.write(f"{missing[0]}, {missing[1]}, {missing[2]}\n")
+                errorlog.write(f"{error}\n")
+                errorlog.write("------------------")
+            return None
+
+    def done(links):
+        if links is None:
+            counts["failed"] += 1
+            return
+        counts["recovered"] += len(links)
+        for link in links:
+            put(link)
+
+    def run_lookups():
+        try:
+            host_queue.run_windowed(lookup, dockets(), max_workers=config.missingDocsThreads, on_done=done)
+        except Exception as error:
+            # An error reading the saved dockets stops the lookups. It is raised again where the links are read.
+            errors.append(error)
+        finally:
+            put(finished)
+
+    lookups = threading.Thread(target=run_lookups, daemon=True)
+    lookups.start()
+    try:
+        while True:
+            link = found.get()
+            if link is finished:
+                break
+            yield link
+    finally:
+        # The lookups already started are let finish, so the counts below are complete.
+        stopped.set()
+        lookups.join()
+        print(f"\n{counts['entries']} entries in {counts['dockets']} dockets were missing their documents. "
+              f"{counts['recovered']} were recovered, and {counts['failed']} dockets could not be looked up.")
+    if errors:
+        raise errors[0]
+
+def thread_download_missing_pdfs(job=None):
+    """
+    Downloads the documents missing from the dockets in the job's JSON folder (see jobs.py), or by default the one set
+    in the menus, as their links are recovered.
+    """
+    import get_pdfs
+    job = jobs.current(job)
+    print("Looking for docket entries missing their documents...")
+    get_pdfs.thread_download_pdfs(iter_recovered_links(job), job)
+    # Any shards the recovered dockets were saved to are finished.
+    archives.close_all(job.jsonOutputPath)
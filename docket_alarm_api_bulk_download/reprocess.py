@@ -0,0 +1,156 @@
+# Built-in Modules
+import os
+import csv
+import json
+import re
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool, cpu_count
+# Third-party Modules
+from tqdm import tqdm
+# Internal Modules
+import global_variables
+
+CURRENT_DIR = os.path.dirname(__file__)
+
+# This module rebuilds the link list and the 4 spreadsheets from a directory of JSON files that were already downloaded.
+# Parsing the JSON, cleaning the document names and building the rows is all work for the processor, so instead of
+# doing it in one process we split the files between a pool of processes, one per processor core.
+# Each process writes the rows it builds straight to its own shard files. Only a few counts are sent back to the
+# main process, and the shards are joined together at the end.
+
+# The names of the tables we write, with their column headers.
+# The 4 spreadsheets use the same columns as generate_spreadsheets. links has the same values as the tuples from get_pdfs.get_urls().
+LINKS_COLUMNS = ['link', 'fileName', 'folderName']
+
+# These are set in every process of the pool by _start_worker().
+_shard_directory = None
+_shard_files = {}
+
+def _table_columns():
+    """
+    Returns a dictionary with the name of each table we write as keys, and their column headers as values.
+    """
+    import generate_spreadsheets
+    return {
+        'docketInformation': generate_spreadsheets.docketInformation_columns,
+        'docketEntries': generate_spreadsheets.docketEntries_columns,
+        'parties': generate_spreadsheets.parties_columns,
+        'attorneysAndFirms': generate_spreadsheets.attorneysAndFirms_columns,
+        'links': LINKS_COLUMNS,
+    }
+
+def _start_worker(shard_directory):
+    """
+    Runs once in every process of the pool, before it does any work. Stores where the shards will be written.
+    """
+    global _shard_directory
+    _shard_directory = shard_directory
+
+def _shard_writer(table):
+    """
+    Returns a csv writer for this process's shard of the table specified, creating the shard the first time it's needed.
+    """
+    if table not in _shard_files:
+        path = os.path.join(_shard_directory, f"{table}.{os.getpid()}.csv")
+        shard = open(path, 'w', newline='', encoding='utf-8')
+        _shard_files[table] = (shard, csv.writer(shard))
+    return _shard_files[table]
+
+def process_json_file(path):
+    """
+    Runs in a process of the pool. Takes in the path to one JSON file saved by get_json.
+    Writes the links and spreadsheet rows for that docket to this process's shards.
+    Returns a small dictionary counting the rows written to each table, so the docket itself never has to be
+    sent back to the main process.
+    """
+    # We import these here, inside the pool's processes, instead of at the top of the module.
+    import generate_spreadsheets
+    from get_pdfs import get_urls_from_docket
+
+    counts = {}
+
+    base_filename = re.sub(re.escape('.json'), '', os.path.basename(path), flags=re.IGNORECASE)
+    try:
+        with open(path) as jsonFile:
+            docket = json.load(jsonFile)
+        result = generate_spreadsheets.result_from_saved_docket(docket, base_filename)
+
+        # The output path and client matter aren't needed in the link list, they're added back when the PDFs are downloaded.
+        tables = {'links': [link_tuple[:3] for link_tuple in get_urls_from_docket(docket, base_filename, "", "")]}
+        # Every docket saved by get_json has an info key, but we check for it so a stray JSON file doesn't stop the run.
+        if 'info' in docket:
+            tables['docketInformation'] = generate_spreadsheets.docketInformation_rows(result, docket)
+            tables['docketEntries'] = generate_spreadsheets.docketEntries_rows(result, docket) if 'docket_report' in docket else []
+            tables['parties'] = generate_spreadsheets.parties_rows(result, docket)
+            tables['attorneysAndFirms'] = generate_spreadsheets.attorneysAndFirms_rows(result, docket)
+    except Exception:
+        # A file that can't be read, or that isn't shaped like a saved docket (not a dictionary, or with entries
+        # missing their fields), is counted, so the user can be warned once everything is finished. Nothing is
+        # written for it, so the rest of the run carries on.
+        return {'errors': 1}
+
+    for table, columns in _table_columns().items():
+        if table == 'links':
+            rows = tables['links']
+        else:
+            rows = [[row[column] for column in columns] for row in tables.get(table, [])]
+        if not rows:
+            continue
+        shard, writer = _shard_writer(table)
+        writer.writerows(rows)
+        # We flush after every docket, because the pool's processes are stopped without a chance to close their files.
+        shard.flush()
+        counts[table] = len(rows)
+
+    return counts
+
+def _merge_shards(shard_directory, output_directory):
+    """
+    Joins every process's shards into one csv per table in the output directory, writing the column headers once.
+    """
+    for table, columns in _table_columns().items():
+        with open(os.path.join(output_directory, f"{table}.csv"), 'w', newline='', encoding='utf-8') as output:
+            csv.writer(output).writerow(columns)
+            for shard_name in sorted(os.listdir(shard_directory)):
+                if shard_name.startswith(f"{table}."):
+                    with open(os.path.join(shard_directory, shard_name), newline='', encoding='utf-8') as shard:
+                        shutil.copyfileobj(shard, output)
+
+def reprocess(input_directory=None, output_directory=None, processes=None):
+    """
+    Takes in a directory of JSON files saved by get_json (JSON_INPUT_OUTPUT_PATH by default),
+    a directory to save the results to, and optionally the number of processes to use (one per processor core by default).
+    Saves links.csv, along with docketInformation.csv, docketEntries.csv, parties.csv and attorneysAndFirms.csv
+    to the output directory.
+    Returns a dictionary counting the rows written to each table.
+    """
+    input_directory = input_directory or global_variables.JSON_INPUT_OUTPUT_PATH
+    output_directory = output_directory or input_directory
+    processes = processes or cpu_count()
+
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    paths = [entry.path for entry in os.scandir(input_directory) if entry.name.lower().endswith('.json')]
+
+    print(f"Reprocessing {len(paths)} JSON files with {processes} processes...")
+    start = time.perf_counter()
+    totals = {}
+
+    # The shards are written next to the output, so joining them is a copy on the same disk.
+    with tempfile.TemporaryDirectory(dir=output_directory) as shard_directory:
+        with Pool(processes, initializer=_start_worker, initargs=(shard_directory,)) as pool:
+            # Sending the files to the processes in chunks keeps the cost of passing work between processes small.
+            chunksize = max(1, min(64, len(paths) // (processes * 4)))
+            for counts in tqdm(pool.imap_unordered(process_json_file, paths, chunksize=chunksize), total=len(paths)):
+                for table, count in counts.items():
+                    totals[table] = totals.get(table, 0) + count
+        _merge_shards(shard_directory, output_directory)
+
+    finish = time.perf_counter()
+    print(f"Finished reprocessing in {round(finish - start)} seconds.")
+    if totals.get('errors'):
+        print(f"[WARNING] {totals['errors']} JSON files could not be read.")
+    return totals
@@ -0,0 +1,122 @@
+# Built-in Modules
+import os
+import re
+import json
+
+# This module lets a PDF download that fails partway pick up where it left off, instead of starting again from the
+# first byte. A PDF is written to '<name>.pdf.part' while it downloads, and only renamed to '<name>.pdf' once every
+# byte has arrived, so a file with the .pdf extension is always complete.
+# Next to the .part file, a small '<name>.pdf.part.json' file records the link, the server's ETag or Last-Modified
+# date for the document, and its full size. When the download is tried again, we ask the server for only the bytes
+# after the ones we have (with a Range header). The If-Range header makes the server send the whole document instead
+# if it has changed since, so pieces of two different versions are never joined together.
+
+# How many bytes are read from the server and written to the file at a time.
+CHUNK_SIZE = 64 * 1024
+
+def part_path(output_path):
+    return output_path + ".part"
+
+def _state_path(output_path):
+    return part_path(output_path) + ".json"
+
+def _read_state(output_path):
+    try:
+        with open(_state_path(output_path)) as stateFile:
+            return json.load(stateFile)
+    except (OSError, ValueError):
+        return None
+
+def discard(output_path):
+    """
+    Deletes the partial download of the file at output_path, if there is one.
+    """
+    for path in (part_path(output_path), _state_path(output_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def resume_headers(output_path, link):
+    """
+    Takes in the path a PDF will be saved to and its link.
+    Returns the headers to send to download the rest of a partial download, and the number of bytes already downloaded.
+    If there is nothing to resume, no headers are returned and the download starts from the beginning.
+    """
+    partial = part_path(output_path)
+    state = _read_state(output_path)
+    if not os.path.exists(partial) or not state or state.get("link") != link:
+        discard(output_path)
+        return {}, 0
+    validator = state.get("etag") or state.get("last_modified")
+    offset = os.path.getsize(partial)
+    if not validator or offset == 0:
+        # Without a way to tell whether the document changed, it isn't safe to join the pieces.
+        discard(output_path)
+        return {}, 0
+    return {"Range": f"bytes={offset}-", "If-Range": validator}, offset
+
+def complete_if_finished(output_path):
+    """
+    Checks for a partial download of the file at output_path that already has every byte (because the program stopped
+    just before renaming it). If there is one, it is renamed to output_path and True is returned.
+    """
+    state = _read_state(output_path)
+    partial = part_path(output_path)
+    if not state or state.get("total") is None or not os.path.exists(partial):
+        return False
+    if os.path.getsize(partial) != state["total"]:
+        return False
+    return finish(output_path, state["total"])
+
+def start_offset(response, offset):
+    """
+    Takes in the server's response to a request made with resume_headers(), and the bytes already downloaded.
+    Returns where the bytes in the response start: the offset if the server sent only the missing bytes,
+    or 0 if it sent the whole document (because it doesn't support ranges, or the document changed).
+    """
+    if offset and response.status_code == 206:
+        match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+        if match and int(match.group(1)) == offset:
+            return offset
+    return 0
+
+def total_size(response, start):
+    """
+    Returns the full size of the document in bytes, from the server's response, or None if the server didn't say.
+    """
+    match = re.match(r"bytes \d+-\d+/(\d+)", response.headers.get("Content-Range", ""))
+    if match:
+        return int(match.group(1))
+    length = response.headers.get("Content-Length")
+    # A response that was compressed for the transfer has a Content-Length that doesn't match the document's size.
+    if length and length.isdigit() and not response.headers.get("Content-Encoding"):
+        return start + int(length)
+    return None
+
+def save_state(output_path, link, response, total):
+    """
+    Records what is needed to resume the download of the file at output_path later.
+    """
+    # Ranges count the bytes as they were sent, so a transfer that was compressed on the way can't be resumed.
+    resumable = not response.headers.get("Content-Encoding")
+    state = {
+        "link": link,
+        "etag": response.headers.get("ETag") if resumable else None,
+        "last_modified": response.headers.get("Last-Modified") if resumable else None,
+        "total": total,
+    }
+    with open(_state_path(output_path), 'w') as stateFile:
+        json.dump(state, stateFile)
+
+def finish(output_path, total):
+    """
+    Checks that the partial download of the file at output_path has every byte, and if it does, renames it to
+    output_path. Returns True if the file is complete. An incomplete file is kept so it can be resumed.
+    """
+    partial = part_path(output_path)
+    size = os.path.getsize(partial)
+    if total is not None and size != total:
+        return False
+    os.replace(partial, output_path)
+    if os.path.exists(_state_path(output_path)):
+        os.remove(_state_path(output_path))
+    return True
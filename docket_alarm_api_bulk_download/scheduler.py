@@ -0,0 +1,129 @@
+# Built-in Modules
+import os
+import csv
+import datetime
+# Internal Modules
+import config
+import global_variables
+
+# This module decides which PDFs a download gets, and in what order.
+# Courts may charge a fee for each document, so on a pull limited by time or money the most valuable documents should
+# come first. The links found by get_pdfs.get_urls() are sorted by the rules in pdfPriority in config.py, and then cut
+# down to the caps set there (the most documents from one docket, the most documents in one run, and the most
+# estimated spend in one run). The links that were cut are saved to the log folder, so they can be pulled later.
+
+# The rules documents can be ordered by. Each one returns a sort key for a link; lower keys are downloaded first.
+# Links without the information a rule needs (like an entry date) are put after the links that have it.
+def _main_documents_first(link):
+    return link_value(link, "exhibit") is not None
+
+def _newest_first(link):
+    entryDate = link_value(link, "entryDate")
+    # Dates are in the YYYY-MM-DD format, so sorting the negated characters puts the newest first.
+    return (entryDate is None, tuple(-ord(character) for character in entryDate or ""))
+
+def _oldest_first(link):
+    entryDate = link_value(link, "entryDate")
+    return (entryDate is None, entryDate or "")
+
+def _lowest_entry_first(link):
+    entryNumber = link_value(link, "entryNumber")
+    try:
+        return (False, float(entryNumber))
+    except (TypeError, ValueError):
+        return (True, 0.0)
+
+RULES = {
+    "main_documents_first": _main_documents_first,
+    "newest_first": _newest_first,
+    "oldest_first": _oldest_first,
+    "lowest_entry_first": _lowest_entry_first,
+}
+
+def link_value(link, name):
+    """
+    Returns the value named from a link found by get_pdfs.get_urls(), or None if the link doesn't have it.
+    Plain tuples with only the 5 values download_from_link_list() needs are accepted too.
+    """
+    return getattr(link, name, None)
+
+def document_fee(link):
+    """
+    Returns the estimated fee for downloading the document at a link, from documentFeeEstimates in config.py.
+    """
+    return config.documentFeeEstimates.get(link_value(link, "court"), config.defaultDocumentFee)
+
+def schedule(link_list, priority=None, max_per_docket=None, max_documents=None, max_spend=None):
+    """
+    Takes in a list of links from get_pdfs.get_urls(), and optionally the rules to order them by and the caps to
+    apply (pdfPriority, maxDocumentsPerDocket, maxDocumentsPerRun and maxSpendPerRun in config.py by default).
+    Returns the links to download in the order to download them, and a list of the links that were left out.
+    With the default settings, every link is returned in the order it was found.
+    """
+    priority = config.pdfPriority if priority is None else priority
+    max_per_docket = config.maxDocumentsPerDocket if max_per_docket is None else max_per_docket
+    max_documents = config.maxDocumentsPerRun if max_documents is None else max_documents
+    max_spend = config.maxSpendPerRun if max_spend is None else max_spend
+
+    for rule in priority:
+        if rule not in RULES:
+            raise ValueError(f"Unknown PDF priority '{rule}'. Choose from: {', '.join(RULES)}")
+
+    # Python's sort keeps links with equal keys in the order they were found.
+    ordered = sorted(link_list, key=lambda link: tuple(RULES[rule](link) for rule in priority)) if priority else list(link_list)
+
+    selected = []
+    left_out = []
+    per_docket = {}
+    spend = 0.0
+    for link in ordered:
+        folderName = link[2]
+        fee = document_fee(link)
+        if max_per_docket is not None and per_docket.get(folderName, 0) >= max_per_docket:
+            left_out.append(link)
+            continue
+        if max_documents is not None and len(selected) >= max_documents:
+            left_out.append(link)
+            continue
+        if max_spend is not None and spend + fee > max_spend:
+            # A cheaper document further down the list may still fit, so we keep looking.
+            left_out.append(link)
+            continue
+        per_docket[folderName] = per_docket.get(folderName, 0) + 1
+        spend += fee
+        selected.append(link)
+    return selected, left_out
+
+def save_left_out(left_out, path=None):
+    """
+    Saves the links that schedule() left out to a csv file, in the log folder by default. Returns the path of the file.
+    """
+    if path is None:
+        timeNow = datetime.datetime.now().strftime("%I%M%p %B %d, %Y")
+        path = os.path.join(global_variables.LOG_PATH, f"documents not downloaded - {timeNow}.csv")
+    with open(path, 'w', newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(["link", "document", "docket", "court", "entry date", "exhibit", "estimated fee"])
+        for link in left_out:
+            writer.writerow([link[0], link[1], link[2], link_value(link, "court"), link_value(link, "entryDate"),
+                             link_value(link, "exhibit"), document_fee(link)])
+    return path
+
+def schedule_for_download(link_list):
+    """
+    Runs schedule() with the settings in config.py, tells the user what was left out and saves it to the log folder.
+    Returns the links to download, in order.
+    Ordering and capping need every link at once. Without any order or caps set, link_list is returned as it is,
+    so links read one at a time (see get_pdfs.iter_urls()) stay that way.
+    """
+    # A cap of 0 is still a cap (a maxSpendPerRun of 0 downloads only free documents), so caps are compared with None.
+    caps = (config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun)
+    if not config.pdfPriority and all(cap is None for cap in caps):
+        return link_list
+    link_list = list(link_list)
+    selected, left_out = schedule(link_list)
+    if left_out:
+        spend = sum(document_fee(link) for link in selected)
+        print(f"Downloading {len(selected)} of {len(link_list)} documents (estimated fees: {spend:.2f}).")
+        print(f"The other {len(left_out)} documents are listed in {save_left_out(left_out)}")
+    return selected
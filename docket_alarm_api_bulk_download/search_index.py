@@ -0,0 +1,103 @@
+# Built-in Modules
+import os
+import re
+import sqlite3
+# Internal Modules
+import config
+import global_variables
+import docket_store
+
+CURRENT_DIR = os.path.dirname(__file__)
+
+# This module searches the contents of the docket entries in the database built by docket_store, so finding an entry
+# in a docket you already downloaded doesn't need a new search on Docket Alarm (and doesn't cost an API call).
+# The entries are kept in an SQLite full-text index. Triggers on the docket_entries table keep the index up to date,
+# so every time docket_store loads new or changed dockets, only the entries that changed are re-indexed.
+
+# The full-text index and the triggers that keep it in step with the docket_entries table.
+# The index stores no copy of the text, it reads it from docket_entries when it's needed.
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS docket_entries_fts USING fts5(
+    contents,
+    content='docket_entries',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS docket_entries_fts_insert AFTER INSERT ON docket_entries BEGIN
+    INSERT INTO docket_entries_fts (rowid, contents) VALUES (new.id, new.contents);
+END;
+CREATE TRIGGER IF NOT EXISTS docket_entries_fts_delete AFTER DELETE ON docket_entries BEGIN
+    INSERT INTO docket_entries_fts (docket_entries_fts, rowid, contents) VALUES ('delete', old.id, old.contents);
+END;
+CREATE TRIGGER IF NOT EXISTS docket_entries_fts_update AFTER UPDATE ON docket_entries BEGIN
+    INSERT INTO docket_entries_fts (docket_entries_fts, rowid, contents) VALUES ('delete', old.id, old.contents);
+    INSERT INTO docket_entries_fts (rowid, contents) VALUES (new.id, new.contents);
+END;
+"""
+
+def create_index(connection):
+    """
+    Creates the full-text index in the docket database open on the connection specified, if it doesn't exist yet.
+    If the database already had entries in it before the index was created, they are all indexed.
+    """
+    existed = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'docket_entries_fts'").fetchone()
+    connection.executescript(SCHEMA)
+    if not existed:
+        connection.execute("INSERT INTO docket_entries_fts (docket_entries_fts) VALUES ('rebuild')")
+        connection.commit()
+
+def _quote_terms(query):
+    """
+    Turns a query into one where every word is searched for exactly as typed, for queries
+    that aren't valid full-text search syntax (like a docket number with dashes in it).
+    """
+    terms = re.findall(r'\S+', query)
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def search(query, database_path=None, limit=None):
+    """
+    Takes in a search query as a string, and optionally the path to the docket database
+    (dockets.sqlite3 in JSON_INPUT_OUTPUT_PATH by default) and the maximum number of results.
+    The query can use SQLite full-text syntax, like: motion AND dismiss, "summary judgment", or sanction*
+    Returns a list of dictionaries, one for each matching docket entry, with the best matches first.
+    """
+    database_path = database_path or docket_store.default_database_path()
+    limit = limit or config.searchResultsLimit
+    connection = docket_store.connect(database_path)
+
+    sql = """
+        SELECT dockets.court, dockets.docket_number, dockets.case_title, dockets.source_file,
+               docket_entries.entry_number, docket_entries.entry_date, docket_entries.link,
+               snippet(docket_entries_fts, 0, '[', ']', '...', 12)
+        FROM docket_entries_fts
+        JOIN docket_entries ON docket_entries.id = docket_entries_fts.rowid
+        JOIN dockets ON dockets.id = docket_entries.docket_id
+        WHERE docket_entries_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """
+    try:
+        try:
+            rows = connection.execute(sql, (query, limit)).fetchall()
+        except sqlite3.OperationalError:
+            # If the query isn't valid search syntax, we search for the words exactly as typed instead.
+            rows = connection.execute(sql, (_quote_terms(query), limit)).fetchall()
+    finally:
+        connection.close()
+
+    keys = ['court', 'docket', 'title', 'file', 'number', 'entry_date', 'link', 'snippet']
+    return [dict(zip(keys, row)) for row in rows]
+
+def print_results(results):
+    """
+    Prints the results of search() to the console.
+    """
+    if not results:
+        print("No matching docket entries found.")
+        return
+    for result in results:
+        print(f"\n{result['court']} | {result['docket']} | {result['title']}")
+        print(f"    Entry {result['number']} ({result['entry_date']}): {result['snippet']}")
+        if result['link']:
+            print(f"    {result['link']}")
+    print(f"\n{len(results)} matching docket entries.")
@@ -0,0 +1,207 @@
+# Built-in Modules
+import os
+import threading
+import concurrent.futures
+# Internal Modules
+import config
+
+# This module decides where downloaded dockets and PDFs are written. By default they are written to folders on this
+# computer, as they always have been. With storageBackend = "s3" in config.py, they are streamed straight to an
+# S3-compatible object store (Amazon S3, or a MinIO server given as s3EndpointUrl) without being saved locally first.
+# Large files are sent in parts (multipart uploads), several parts at a time, so only a few parts are in memory at once.
+# Each output folder gets its own storage. In S3, the folder's name becomes part of the key, like:
+# <s3Prefix>/json-output/<docket>.json and <s3Prefix>/pdf-output/<docket>/<document>.pdf
+# The S3 backend needs boto3, which isn't installed with the program: pip install boto3
+
+# S3 won't take parts smaller than 5MB, except for the last part of a file.
+MINIMUM_PART_SIZE = 5 * 1024 * 1024
+
+class LocalStorage:
+    """
+    Writes files to a folder on this computer.
+    """
+
+    # Partly downloaded files can be picked up where they stopped (see resumable.py), and files can be checked and
+    # archived after they are written, because they stay on disk.
+    local = True
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def open_write(self, name, append=False):
+        """
+        Returns a file to write the bytes of the file named name (a path inside the folder) to.
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, 'ab' if append else 'wb')
+
+    def write_text(self, name, text):
+        with open(self.path(name), 'w') as outputFile:
+            outputFile.write(text)
+
+    def read_bytes(self, name):
+        with open(self.path(name), 'rb') as inputFile:
+            return inputFile.read()
+
+    def names(self):
+        """
+        Yields the names of the files directly inside the folder.
+        """
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry.name
+
+class S3Storage:
+    """
+    Writes files to a bucket in an S3-compatible object store, under prefix.
+    """
+
+    local = False
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, part_size=None, concurrency=None, client=None):
+        if client is None:
+            try:
+                import boto3
+                import botocore.config
+            except ImportError:
+                raise ImportError("Saving to S3 needs boto3. Install it with: pip install boto3")
+            endpoint_url = endpoint_url or config.s3EndpointUrl
+            # Stores other than Amazon S3 are usually reached with the bucket in the path rather than in the host name.
+            client_config = botocore.config.Config(s3={"addressing_style": "path"}) if endpoint_url else None
+            client = boto3.client("s3", endpoint_url=endpoint_url, config=client_config)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.part_size = max(MINIMUM_PART_SIZE, part_size or config.s3PartSize)
+        self.concurrency = concurrency or config.s3UploadConcurrency
+        # The parts of every upload to this storage are sent by the same threads.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def key(self, name):
+        name = name.replace(os.sep, "/")
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def path(self, name):
+        return f"s3://{self.bucket}/{self.key(name)}"
+
+    def open_write(self, name, append=False):
+        """
+        Returns a file-like object that uploads what is written to it to the file named name.
+        The upload is finished when it is closed, and abandoned if the with block it is used in raises an exception.
+        Appending isn't supported, since objects in S3 can't be added to.
+        """
+        return MultipartUpload(self, self.key(name))
+
+    def write_text(self, name, text):
+        self.client.put_object(Bucket=self.bucket, Key=self.key(name), Body=text.encode("utf-8"))
+
+    def read_bytes(self, name):
+        return self.client.get_object(Bucket=self.bucket, Key=self.key(name))["Body"].read()
+
+    def names(self):
+        """
+        Yields the names of the files directly under the prefix, a page of them at a time.
+        """
+        prefix = f"{self.prefix}/" if self.prefix else ""
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix, Delimiter="/"):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(prefix):]
+
+class MultipartUpload:
+    """
+    Uploads the bytes written to it to one object, in parts of part_size sent by the storage's threads.
+    A file smaller than one part is sent in a single request.
+    At most as many parts as the storage sends at once are kept in memory, so writing waits if the uploads fall behind.
+    """
+
+    def __init__(self, storage, key):
+        self.storage = storage
+        self.key = key
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._slots = threading.BoundedSemaphore(storage.concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data):
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.storage.part_size:
+            part = bytes(self._buffer[:self.storage.part_size])
+            del self._buffer[:self.storage.part_size]
+            self._send_part(part)
+        return len(data)
+
+    def _send_part(self, part):
+        client, bucket = self.storage.client, self.storage.bucket
+        if self._upload_id is None:
+            self._upload_id = client.create_multipart_upload(Bucket=bucket, Key=self.key)["UploadId"]
+        number = len(self._parts) + 1
+
+        def upload():
+            try:
+                response = client.upload_part(Bucket=bucket, Key=self.key, UploadId=self._upload_id,
+                                              PartNumber=number, Body=part)
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                self._slots.release()
+
+        self._slots.acquire()
+        self._parts.append(self.storage._executor.submit(upload))
+
+    def close(self):
+        client, bucket = self.storage.client, self.storage.bucket
+        if self._upload_id is None:
+            # The whole file fit in one part.
+            client.put_object(Bucket=bucket, Key=self.key, Body=bytes(self._buffer))
+            return
+        if self._buffer:
+            self._send_part(bytes(self._buffer))
+            self._buffer.clear()
+        try:
+            parts = [future.result() for future in self._parts]
+        except Exception:
+            self.abort()
+            raise
+        client.complete_multipart_upload(Bucket=bucket, Key=self.key, UploadId=self._upload_id,
+                                         MultipartUpload={"Parts": parts})
+
+    def abort(self):
+        """
+        Abandons the upload, so the parts already sent aren't kept (and charged for) by the store.
+        """
+        if self._upload_id is None:
+            return
+        concurrent.futures.wait(self._parts)
+        self.storage.client.abort_multipart_upload(Bucket=self.storage.bucket, Key=self.key, UploadId=self._upload_id)
+        self._upload_id = None
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+def for_directory(directory):
+    """
+    Takes in an output folder, like JSON_INPUT_OUTPUT_PATH or PDF_OUTPUT_PATH.
+    Returns the storage that files for that folder are written to, set by storageBackend in config.py.
+    """
+    with _storages_lock:
+        key = (config.storageBackend, os.path.abspath(directory))
+        if key not in _storages:
+            if config.storageBackend == "s3":
+                prefix = "/".join(part for part in (config.s3Prefix.strip("/"), os.path.basename(os.path.normpath(directory))) if part)
+                _storages[key] = S3Storage(config.s3Bucket, prefix)
+            else:
+                _storages[key] = LocalStorage(directory)
+        return _storages[key]
@@ -0,0 +1,187 @@
+# Built-in Modules
+import sys
+import threading
+import weakref
+
+# A download can have millions of tasks waiting at once: one for every docket in the input csv, and one for every PDF
+# linked from the saved dockets. This module keeps each task as small as it can be.
+# Tasks are objects with __slots__ instead of tuples or dicts, so they have no per-task dictionary.
+# The values every task in a run shares (the output folder, the client matter, and whether dockets are cached) are kept
+# once in a RunContext that every task points to, instead of being repeated in each task.
+# Court names, docket folder names and entry dates repeat across many tasks, so they are interned: every task that has
+# the same one points at the same string.
+# The tasks still behave like the tuples they replaced. They can be unpacked, indexed and sliced, and compare equal to
+# tuples with the same values, so code that reads them as tuples keeps working.
+
+def intern(value):
+    """
+    Returns the shared copy of a string that many tasks have. Anything that isn't a string is returned as it is.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+class RunContext:
+    """
+    The values every task in a run shares: the folder files are saved to, the client matter, and (for dockets) whether
+    the cached version is downloaded. Made with run_context(), so runs with the same values share one.
+    """
+
+    __slots__ = ("outputPath", "clientMatter", "isCached", "__weakref__")
+
+    def __init__(self, outputPath, clientMatter, isCached=None):
+        self.outputPath = outputPath
+        self.clientMatter = clientMatter
+        self.isCached = isCached
+
+    def __repr__(self):
+        return f"RunContext(outputPath={self.outputPath!r}, clientMatter={self.clientMatter!r}, isCached={self.isCached!r})"
+
+# The tasks hold on to their RunContext, so it is kept only while some task still uses it. Once the last of them is
+# finished with, it is dropped from here too, so a long-running process doesn't keep one for every run it did.
+# This is why RunContext has a __weakref__ slot.
+_contexts = weakref.WeakValueDictionary()
+_contexts_lock = threading.Lock()
+
+def run_context(outputPath, clientMatter, isCached=None):
+    """
+    Returns the RunContext with these values, making it the first time they're asked for.
+    """
+    key = (outputPath, clientMatter, isCached)
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is None:
+            context = _contexts[key] = RunContext(outputPath, clientMatter, isCached)
+        return context
+
+class _Record:
+    """
+    The tuple-like behaviour shared by the task records. Each record lists its values, in tuple order, in _fields.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __iter__(self):
+        for field in self._fields:
+            yield getattr(self, field)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, field) for field in self._fields[index])
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, _Record)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={value!r}" for field, value in zip(self._fields, self))
+        return f"{type(self).__name__}({values})"
+
+    def __reduce__(self):
+        # Records are rebuilt from their values when they are pickled, like when they are sent to another process.
+        return (type(self), tuple(self))
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+class PdfLink(_Record):
+    """
+    A PDF to download, found by get_pdfs.get_urls().
+    The first 5 values are the arguments get_pdfs.download_from_link_list() needs: the link, the name the PDF is saved
+    as, the name of the docket's folder, the folder PDFs are saved to, and the client matter.
+    The rest describe the document, so the scheduler can decide which documents to download first: the date and number
+    of the docket entry, the exhibit number (None for a main document), and the court.
+    """
+
+    __slots__ = ("link", "fileName", "folderName", "context", "entryDate", "entryNumber", "exhibit", "court")
+    _fields = ("link", "fileName", "folderName", "outputPath", "clientMatter", "entryDate", "entryNumber", "exhibit", "court")
+
+    def __init__(self, link, fileName, folderName, outputPath, clientMatter, entryDate=None, entryNumber=None,
+                 exhibit=None, court=None, context=None):
+        self.link = link
+        self.fileName = fileName
+        self.folderName = intern(folderName)
+        self.context = context or run_context(outputPath, clientMatter)
+        self.entryDate = intern(entryDate)
+        self.entryNumber = entryNumber
+        self.exhibit = exhibit
+        self.court = intern(court)
+
+    @property
+    def outputPath(self):
+        return self.context.outputPath
+
+    @property
+    def clientMatter(self):
+        return self.context.clientMatter
+
+class JsonTask(_Record):
+    """
+    A docket to download, read from the input csv by get_json.iter_table_tuples().
+    It unpacks to the 6 arguments get_json.download_json_from_list_of_tuples() needs: the case name, the case number,
+    the court, the folder dockets are saved to, the client matter, and whether the cached version is downloaded.
+    """
+
+    __slots__ = ("caseName", "caseNo", "caseCourt", "context")
+    _fields = ("caseName", "caseNo", "caseCourt", "outputPath", "clientMatter", "isCached")
+
+    def __init__(self, caseName, caseNo, caseCourt, outputPath, clientMatter, isCached, context=None):
+        self.caseName = caseName
+        self.caseNo = caseNo
+        self.caseCourt = intern(caseCourt)
+        self.context = context or run_context(outputPath, clientMatter, isCached)
+
+    @property
+    def outputPath(self):
+        return self.context.outputPath
+
+    @property
+    def clientMatter(self):
+        return self.context.clientMatter
+
+    @property
+    def isCached(self):
+        return self.context.isCached
+
+class DocketLink(_Record):
+    """
+    A PDF linked from a docket, returned by user_tools.Docket.links().
+    Its values can be read like a dict, as link_record['link'], as well as by name, as link_record.link.
+    """
+
+    __slots__ = ("number", "name", "link", "exhibit")
+    _fields = __slots__
+
+    def __init__(self, number, name, link, exhibit=None):
+        self.number = number
+        self.name = name
+        self.link = link
+        self.exhibit = exhibit
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return super().__getitem__(key)
+
+    def __eq__(self, other):
+        # Docket.links() used to return dicts, so a record still equals the dict with the same values.
+        if isinstance(other, dict):
+            return self._asdict() == other
+        return super().__eq__(other)
+
+    __hash__ = _Record.__hash__
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
@@ -8,6 +8,11 @@ import pprint
 import re
 import json
 import get_pdfs
+import global_variables
+import metrics
+import profiling
+import task_records
+import api_session
 from retrying import retry
 
 
@@ -43,6 +48,7 @@ class Docket:
             self.info = docket['info']
             self.docket_report = docket['docket_report']
             self.parties = docket['parties']
+            self.related = docket.get('related', [])
         else:
             # If there is no exact result in docket alarm for what the user typed in. We run a docket alarm search to see if
             # there are similar results. If there is a single match, we get the data the result.
@@ -56,11 +62,13 @@ class Docket:
                 self.info = foundDocket['info']
                 self.docket_report = foundDocket['docket_report']
                 self.parties = foundDocket['parties']
+                self.related = foundDocket.get('related', [])
             else:
                 self.all = None
                 self.info = None
                 self.docket_report = None
                 self.parties = None
+                self.related = None
                 if len(search) < 1:
                     raise NameError("Exact match not found. Searched docket alarm for similar dockets. No dockets found.")
                 if len(search) > 1:
@@ -89,12 +97,8 @@ class Docket:
                 # The 'link' key contains a link to a PDF file associated with that item in the docket report.
                 link = item['link']
 
-                link_dict = {
-                    'number': docNum,
-                    'name': docName,
-                    'link': link,
-                    'exhibit': None,
-                }
+                # Each link is kept as a small record that can still be read like a dict, as link_dict['link'].
+                link_dict = task_records.DocketLink(docNum, docName, link, None)
                 # Add the found link to the list, which will ultimately be returned at the end of the function.
                 pdf_list.append(link_dict)
 
@@ -115,17 +119,12 @@ class Docket:
                         # If a link to a PDF does exist, we store it in a variable.
                         exhibitLink = exhibit['link']
                         
-                        exhibit_link_dict = {
-                            'number':docNum,
-                            'name':docName,
-                            'link': exhibitLink,
-                            'exhibit': exhibitNumber,
-                        }
+                        exhibit_link_dict = task_records.DocketLink(docNum, docName, exhibitLink, exhibitNumber)
 
                         pdf_list.append(exhibit_link_dict)
         return pdf_list
 
-@retry
+@retry(retry_on_exception=metrics.count_retries("search"))
 def search_docket_alarm(auth_tuple, query_string, limit=10, result_order=None):
     """
     Args:
@@ -134,7 +133,7 @@ def search_docket_alarm(auth_tuple, query_string, limit=10, result_order=None):
     (optional) limit - the number of results you want to display (Default 10) (Max 50).
     """
     limit = str(limit)
-    endpoint = "https://www.docketalarm.com/api/v1/search/"
+    endpoint = global_variables.API_URL + "search/"
 
     if result_order != None:
         parameters = {
@@ -149,31 +148,27 @@ def search_docket_alarm(auth_tuple, query_string, limit=10, result_order=None):
         "q": query_string,
         "limit": limit,
         }
-    result = requests.get(endpoint, params=parameters,timeout=60).json()
+    with metrics.timed_request("search"), profiling.stage("fetch"):
+        response = api_session.shared().get(endpoint, params=parameters,timeout=60)
+    metrics.record_bytes_received("search", len(response.content))
+    result = response.json()
     search_results = result['search_results']
     return search_results
 
-@retry
+@retry(retry_on_exception=metrics.count_retries("login"))
 def authenticate(auth_tuple):
     """
     Takes in a username, followed by a password in a tuple as an argument.
     Returns the authentication token used to authenticate API calls.
+    The token is shared by every call for the same user until it is due to be renewed, so this only logs in when it
+    has to (see api_session.py).
     """
     username, password = auth_tuple
-    login_url = "https://www.docketalarm.com/api/v1/login/"
-    data = {
-        'username': username,
-        'password': password,
-        }
-    result = requests.post(login_url, data=data, timeout=60)
-    result.raise_for_status()
-    result_json = result.json()
-    login_token = result_json['login_token']
-    return login_token
+    return api_session.shared().login_token(username, password)
 
-@retry
+@retry(retry_on_exception=metrics.count_retries("getdocket"))
 def get_docket(auth_token, docket_number, court_name, client_matter="", cached=True, normalize=True):
-    endpoint = "https://www.docketalarm.com/api/v1/getdocket/"
+    endpoint = global_variables.API_URL + "getdocket/"
     params = {
         'login_token':auth_token,
         'client_matter':client_matter,
@@ -182,5 +177,17 @@ def get_docket(auth_token, docket_number, court_name, client_matter="", cached=T
         'cached':cached,
         'normalize':normalize,
     }
-    result = requests.get(endpoint, params, timeout=60).json()
+    with metrics.timed_request("getdocket"), profiling.stage("fetch"):
+        response = api_session.shared().get(endpoint, params, timeout=60)
+    if api_session.is_token_error(response):
+        # The token was turned down before it was due to be renewed, so we log in again and try once more.
+        params['login_token'] = api_session.shared().renew_token(auth_token)
+        if params['login_token'] is not None:
+            with metrics.timed_request("getdocket"), profiling.stage("fetch"):
+                response = api_session.shared().get(endpoint, params, timeout=60)
+    metrics.record_bytes_received("getdocket", len(response.content))
+    with profiling.stage("parse"):
+        result = response.json()
+    if result.get('success') == False:
+        metrics.record_error("getdocket")
     return result
\ No newline at end of file
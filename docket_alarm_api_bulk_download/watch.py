@@ -0,0 +1,257 @@
+# Built-in Modules
+import os
+import random
+import sqlite3
+import time
+import datetime
+# Third-party Modules
+from tqdm import tqdm
+# Internal Modules
+import config
+import global_variables
+import jobs
+import metrics
+import host_queue
+import storage
+import task_records
+import cache_policy
+
+# Watching a list of dockets means downloading each one again from time to time, to catch new filings. Rather than
+# downloading every docket every night, the watch list gives each docket its own wait between polls, which follows how
+# busy the docket is: when a poll finds new entries the wait is halved, and when it finds none the wait is doubled,
+# between watchMinHours and watchMaxHours (in config.py). Most dockets on a long watch list are quiet most of the time,
+# so most of them end up polled every few weeks, and the calls go to the dockets that are actually moving.
+#
+# The watch list is kept in an SQLite file (watch.sqlite3 in the JSON folder by default), with the newest entry seen on
+# each docket. Each poll saves the docket's JSON again, and downloads the PDFs of only the entries newer than that.
+# The first poll of a docket only records its entries. Use the download command for the documents already filed.
+
+class WatchList:
+    """
+    The dockets being watched, stored in an SQLite file. Takes in the path to the file, creating it if it doesn't exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS dockets (
+                key TEXT PRIMARY KEY,
+                case_name TEXT NOT NULL,
+                docket TEXT NOT NULL,
+                court TEXT NOT NULL,
+                last_number REAL,
+                last_date TEXT,
+                polled REAL,
+                next_poll REAL NOT NULL,
+                wait REAL NOT NULL,
+                last_new REAL,
+                failures INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS dockets_by_next_poll ON dockets (next_poll);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def sync(self, dockets, now=None):
+        """
+        Takes in an iterable of (case name, docket number, court), like the rows of the input csv.
+        Adds the dockets that aren't watched yet, to be polled straight away, and stops watching dockets that aren't in it.
+        Returns the number of dockets added and removed.
+        """
+        now = time.time() if now is None else now
+        keys = set()
+        rows = []
+        for caseName, caseNo, caseCourt, *_ in dockets:
+            key = docket_key(caseNo, caseCourt)
+            if key not in keys:
+                keys.add(key)
+                rows.append((key, str(caseName), str(caseNo), str(caseCourt), now, config.watchStartHours * 3600))
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO dockets (key, case_name, docket, court, next_poll, wait) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            added = self.connection.total_changes - before
+            removed = [key for (key,) in self.connection.execute("SELECT key FROM dockets") if key not in keys]
+            self.connection.executemany("DELETE FROM dockets WHERE key = ?", ((key,) for key in removed))
+        return added, len(removed)
+
+    def due(self, now=None, limit=None):
+        """
+        Returns a list of the rows of the dockets due to be polled, the ones waiting longest first.
+        Each row is (key, case name, docket number, court, last number, last date, polled).
+        """
+        now = time.time() if now is None else now
+        return self.connection.execute(
+            "SELECT key, case_name, docket, court, last_number, last_date, polled FROM dockets "
+            "WHERE next_poll <= ? ORDER BY next_poll LIMIT ?", (now, -1 if limit is None else limit)).fetchall()
+
+    def next_poll(self):
+        """
+        Returns the time the next docket is due to be polled, or None if nothing is watched.
+        """
+        return self.connection.execute("SELECT MIN(next_poll) FROM dockets").fetchone()[0]
+
+    def record(self, key, succeeded, newest=(None, None), new_entries=None, now=None):
+        """
+        Records a poll of the docket specified: whether it succeeded, the (number, date) of its newest entry, and how
+        many entries were new (None for the docket's first poll). Sets when the docket is polled next.
+        """
+        now = time.time() if now is None else now
+        wait, failures = self.connection.execute("SELECT wait, failures FROM dockets WHERE key = ?", (key,)).fetchone()
+        if not succeeded:
+            # A failed poll is tried again after the shortest wait, without changing how busy the docket looks.
+            with self.connection:
+                self.connection.execute("UPDATE dockets SET failures = ?, next_poll = ? WHERE key = ?",
+                                        (failures + 1, now + config.watchMinHours * 3600, key))
+            return
+        if new_entries is not None:
+            wait = next_wait(wait, new_entries)
+        # A little randomness keeps dockets added together from staying due together.
+        next_poll = now + wait * random.uniform(1.0, 1.1)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE dockets SET last_number = COALESCE(?, last_number), last_date = COALESCE(?, last_date), "
+                "polled = ?, next_poll = ?, wait = ?, last_new = CASE WHEN ? THEN ? ELSE last_new END, failures = 0 "
+                "WHERE key = ?", (newest[0], newest[1], now, next_poll, wait, new_entries, now, key))
+
+def docket_key(caseNo, caseCourt):
+    """
+    Returns the key a docket is watched by, which is the same however the docket number and court are spaced or capitalized.
+    """
+    return f"{' '.join(str(caseCourt).split()).lower()}|{' '.join(str(caseNo).split()).lower()}"
+
+def next_wait(wait, new_entries):
+    """
+    Takes in a docket's wait between polls in seconds, and how many new entries its latest poll found.
+    Returns its next wait: half as long if there were new entries, twice as long if not.
+    """
+    wait = wait / 2 if new_entries else wait * 2
+    return min(max(wait, config.watchMinHours * 3600), config.watchMaxHours * 3600)
+
+def entry_number(number):
+    """
+    Returns a docket entry number as a float, or None if the entry has no number.
+    """
+    try:
+        return float(number)
+    except (TypeError, ValueError):
+        return None
+
+def is_new_entry(number, date, last_number, last_date):
+    """
+    Takes in an entry's number and date, and the number and date of the newest entry seen before.
+    Returns True if the entry is newer. Entries are compared by number, or by date if they don't have numbers.
+    """
+    number = entry_number(number)
+    if number is not None:
+        return last_number is None or number > last_number
+    return bool(date) and (last_date is None or str(date) > last_date)
+
+def newest_entry(docket_json):
+    """
+    Takes in a docket's JSON as a dictionary. Returns the highest entry number and the latest entry date in it.
+    """
+    numbers = [entry_number(item.get("number")) for item in docket_json.get("docket_report") or []]
+    dates = [str(item["entry_date"]) for item in docket_json.get("docket_report") or [] if item.get("entry_date")]
+    numbers = [number for number in numbers if number is not None]
+    return (max(numbers) if numbers else None, max(dates) if dates else None)
+
+def default_state_path(job):
+    """
+    Returns where the job's watch list is kept: watch.sqlite3 in its JSON folder, or in the log folder if the JSON is
+    saved to S3.
+    """
+    folder = job.jsonOutputPath if storage.for_directory(job.jsonOutputPath).local else global_variables.LOG_PATH
+    return os.path.join(folder, "watch.sqlite3")
+
+def poll_once(job=None, pdfs=False, state_path=None, now=None):
+    """
+    Polls the dockets of the job given (see jobs.py), or by default the ones set in the menus, that are due.
+    Optionally downloads the PDFs of the new entries found, and takes in the path to the watch list file.
+    Returns a dictionary with how many dockets were polled, how many failed, how many had new entries, and the number
+    of new entries and PDFs.
+    """
+    # We import the download modules here rather than at the top of the module, because they load the GUI modules.
+    import get_json, get_pdfs
+
+    job = jobs.current(job)
+    now = time.time() if now is None else now
+    if storage.for_directory(job.jsonOutputPath).local:
+        os.makedirs(job.jsonOutputPath, exist_ok=True)
+    watchlist = WatchList(state_path or default_state_path(job))
+    added, removed = watchlist.sync(get_json.iter_table_tuples(job), now)
+    if added or removed:
+        print(f"Watching {added} new dockets, and stopped watching {removed}.")
+    due = watchlist.due(now, config.watchMaxPollsPerRound)
+    summary = {"polled": len(due), "failed": 0, "active": 0, "new_entries": 0, "pdfs": 0}
+    print(f"Polling {len(due)} dockets...")
+    context = job.json_context()
+
+    def poll(row):
+        key, caseName, caseNo, caseCourt, last_number, last_date, polled = row
+        found = {}
+        def on_docket(docket_json):
+            found["newest"] = newest_entry(docket_json)
+            if polled is None:
+                # The first poll only records where the docket is up to.
+                found["entries"], found["links"] = None, []
+                return
+            found["entries"] = sum(1 for item in docket_json.get("docket_report") or []
+                                   if is_new_entry(item.get("number"), item.get("entry_date"), last_number, last_date))
+            links = get_pdfs.get_urls_from_docket(docket_json, f"{caseName} {caseNo}", job.pdfOutputPath, job.clientMatter) if pdfs else []
+            found["links"] = [link for link in links if is_new_entry(link.entryNumber, link.entryDate, last_number, last_date)]
+        task = task_records.JsonTask(caseName, caseNo, caseCourt, job.jsonOutputPath, job.clientMatter, job.isCached,
+                                     context=context)
+        saved = get_json.download_json_from_list_of_tuples(task, on_docket=on_docket)
+        return key, saved and "newest" in found, found
+
+    new_links = []
+    progress = tqdm(total=len(due))
+    job.start_stage("json", len(due))
+
+    # This runs in this thread as each poll finishes, so the watch list is only written from one thread.
+    def done(result):
+        key, succeeded, found = result
+        progress.update()
+        job.task_done("json", succeeded)
+        watchlist.record(key, succeeded, found.get("newest", (None, None)), found.get("entries"), now)
+        if not succeeded:
+            summary["failed"] += 1
+            return
+        summary["active"] += 1 if found["entries"] else 0
+        summary["new_entries"] += found["entries"] or 0
+        new_links.extend(found["links"])
+
+    cache_counts = cache_policy.counts()
+    host_queue.run_windowed(metrics.track_queue(poll, "json", len(due)), due, on_done=done)
+    progress.close()
+    cache_policy.print_report(cache_counts)
+    summary["pdfs"] = len(new_links)
+    print(f"{summary['active']} dockets had {summary['new_entries']} new entries, with {len(new_links)} new PDFs.")
+    if new_links:
+        get_pdfs.thread_download_pdfs(new_links, job)
+    next_poll = watchlist.next_poll()
+    watchlist.close()
+    if next_poll is not None:
+        print(f"The next docket is due at {datetime.datetime.fromtimestamp(next_poll).strftime('%I:%M%p %B %d, %Y')}.")
+    return summary
+
+def watch(job=None, pdfs=False, state_path=None):
+    """
+    Polls the job's dockets as they come due, until stopped with Ctrl+C. Changes to the csv are picked up each round.
+    """
+    job = jobs.current(job)
+    state_path = state_path or default_state_path(job)
+    metrics.start_server()
+    try:
+        while True:
+            poll_once(job, pdfs, state_path)
+            watchlist = WatchList(state_path)
+            next_poll = watchlist.next_poll()
+            watchlist.close()
+            # We check the csv at least every hour, so dockets added to it don't wait for the next one due.
+            time.sleep(min(max((next_poll or 0) - time.time(), 1), 3600))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
@@ -0,0 +1,366 @@
+# Built-in Modules
+import os
+import json
+import sqlite3
+import socket
+import threading
+import time
+import uuid
+import concurrent.futures
+# Third-party Modules
+from tqdm import tqdm
+# Internal Modules
+import config
+import global_variables
+import jobs
+import metrics
+import scheduler
+
+CURRENT_DIR = os.path.dirname(__file__)
+
+# This module lets several machines split one bulk pull between them.
+# One machine seeds a queue file (an SQLite database kept on a volume every worker can reach) with the dockets
+# from the input csv. Every worker then leases small batches of work from that file, keeps its leases alive
+# with a heartbeat while it downloads, and marks each task as done or hands it back if it failed.
+# A lease that is not renewed (because the worker crashed or lost its connection) expires, and another worker picks it up.
+# When a docket's JSON is saved, the worker queues that docket's PDF links in the same file, so PDF downloads are
+# spread across every worker as well. Tasks are unique per docket and per link, so nothing is downloaded twice.
+
+# The two kinds of tasks stored in the queue.
+JSON_TASK = "json"
+PDF_TASK = "pdf"
+
+# The states a task moves through.
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+class WorkQueue:
+    """
+    A work queue stored in an SQLite file that can be shared between several worker machines.
+    Takes in the path to the queue file as a string.
+    Optionally takes in an id for this worker (the host name and process id are used by default),
+    and the number of seconds a lease lasts before another worker is allowed to take it over.
+    """
+
+    def __init__(self, path, worker_id=None, lease_seconds=None):
+        self.path = path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or config.queueLeaseSeconds
+        # SQLite connections can't be shared between threads, so every thread that touches the queue gets its own.
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    UNIQUE (kind, key)
+                );
+                CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (kind, status, lease_expires);
+                CREATE TABLE IF NOT EXISTS settings (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def _connect(self):
+        """
+        Returns the SQLite connection for the current thread, opening one if needed.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # The timeout lets a worker wait for another worker's write to finish instead of failing straight away.
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        """
+        Starts a write transaction. BEGIN IMMEDIATE takes the write lock up front, so two workers can never
+        lease the same rows.
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        return connection
+
+    def set_settings(self, settings):
+        """
+        Stores a dictionary of run settings (output paths, client matter, cached) in the queue,
+        so that every worker downloads with the same options as the machine that seeded it.
+        """
+        connection = self._transaction()
+        try:
+            for name, value in settings.items():
+                connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get_settings(self):
+        """
+        Returns the run settings stored in the queue as a dictionary.
+        """
+        rows = self._connect().execute("SELECT name, value FROM settings").fetchall()
+        return {name: json.loads(value) for name, value in rows}
+
+    def add_tasks(self, kind, keyed_payloads):
+        """
+        Takes in the kind of task, and an iterable of (key, payload) tuples.
+        The payload is any value that can be stored as JSON.
+        Tasks whose key is already in the queue are skipped, so adding the same work twice is harmless.
+        Returns the number of tasks that were added.
+        """
+        connection = self._transaction()
+        try:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload) VALUES (?, ?, ?)",
+                ((kind, key, json.dumps(payload)) for key, payload in keyed_payloads))
+            added = connection.total_changes - before
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(self, kind, batch_size):
+        """
+        Leases up to batch_size tasks of the kind specified to this worker.
+        Tasks that are pending, or whose lease has expired, can be leased.
+        Returns a list of (task id, payload) tuples.
+        """
+        now = time.time()
+        connection = self._transaction()
+        try:
+            rows = connection.execute(
+                "SELECT id, payload FROM tasks WHERE kind = ? AND (status = ? OR (status = ? AND lease_expires < ?)) ORDER BY id LIMIT ?",
+                (kind, PENDING, LEASED, now, batch_size)).fetchall()
+            connection.executemany(
+                "UPDATE tasks SET status = ?, owner = ?, lease_expires = ? WHERE id = ?",
+                ((LEASED, self.worker_id, now + self.lease_seconds, task_id) for task_id, _ in rows))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return [(task_id, json.loads(payload)) for task_id, payload in rows]
+
+    def heartbeat(self, task_ids):
+        """
+        Extends the lease on the tasks specified, as long as this worker still owns them.
+        """
+        self._update_owned(task_ids, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, task_ids):
+        """
+        Marks the tasks specified as done.
+        """
+        self._update_owned(task_ids, "status = ?, lease_expires = NULL", (DONE,))
+
+    def release(self, task_ids, error=None):
+        """
+        Hands the tasks specified back to the queue after a failure so another worker can try them.
+        Once a task has failed config.queueMaxAttempts times, it is marked as failed and is not retried again.
+        """
+        self._update_owned(
+            task_ids,
+            "attempts = attempts + 1, last_error = ?, lease_expires = NULL, status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END",
+            (None if error is None else str(error), config.queueMaxAttempts, FAILED, PENDING))
+
+    def _update_owned(self, task_ids, assignments, values):
+        """
+        Runs an UPDATE on the leased tasks specified that are still owned by this worker.
+        """
+        if not task_ids:
+            return
+        connection = self._transaction()
+        try:
+            connection.executemany(
+                f"UPDATE tasks SET {assignments} WHERE id = ? AND owner = ? AND status = ?",
+                (tuple(values) + (task_id, self.worker_id, LEASED) for task_id in task_ids))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def counts(self, kind):
+        """
+        Returns a dictionary with the number of tasks of the kind specified in each state.
+        """
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM tasks WHERE kind = ? GROUP BY status", (kind,)).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        """
+        Closes this thread's connection to the queue file.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+class Heartbeat:
+    """
+    Keeps the leases on a batch of tasks alive from a background thread while the batch is being worked on.
+    Use it in a with statement around the work.
+    """
+
+    def __init__(self, queue, task_ids):
+        self.queue = queue
+        self.task_ids = list(task_ids)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        # We renew the leases a few times per lease period, so one late heartbeat doesn't lose the batch.
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            try:
+                self.queue.heartbeat(self.task_ids)
+            except sqlite3.Error:
+                # If the queue file is busy, we simply try again at the next beat.
+                pass
+        self.queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+def seed_queue(queue_path, job=None):
+    """
+    Takes in the path to a queue file, creating it if it doesn't exist yet, and optionally the job to queue (see jobs.py).
+    Adds every docket from the job's csv (CSV_INPUT_PATH by default) to the queue, and stores the job's output paths,
+    client matter and cached setting (the ones chosen in the menus by default) so the workers use them too.
+    The JSON and PDF output paths should be on a volume that every worker can reach.
+    Returns the number of dockets that were added.
+    """
+    # We import get_json here rather than at the top of the module, because it loads the GUI modules.
+    import get_json
+
+    job = jobs.current(job)
+    queue = WorkQueue(queue_path)
+    queue.set_settings({
+        "JSON_INPUT_OUTPUT_PATH": job.jsonOutputPath,
+        "PDF_OUTPUT_PATH": job.pdfOutputPath,
+        "CLIENT_MATTER": job.clientMatter,
+        "IS_CACHED": job.isCached,
+    })
+    # Each docket is keyed by its court and docket number, so a docket listed twice is only downloaded once.
+    keyed_payloads = (
+        (f"{caseCourt}|{caseNo}", [caseName, caseNo, caseCourt])
+        for caseName, caseNo, caseCourt, *_ in get_json.table_to_list_of_tuples(job)
+    )
+    added = queue.add_tasks(JSON_TASK, keyed_payloads)
+    queue.close()
+    return added
+
+def _run_batch(queue, function, leased, arguments_for):
+    """
+    Runs the function specified on every task in a leased batch in its own thread, while a heartbeat keeps the leases alive.
+    Tasks that finish successfully are marked as done. Failed tasks are handed back to the queue.
+    Returns a list of (payload, succeeded) tuples.
+    """
+    results = []
+    with Heartbeat(queue, [task_id for task_id, _ in leased]):
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = {executor.submit(function, arguments_for(payload)): (task_id, payload) for task_id, payload in leased}
+            for future in concurrent.futures.as_completed(futures):
+                task_id, payload = futures[future]
+                try:
+                    succeeded = bool(future.result())
+                    error = None if succeeded else "Download failed. See log/log.txt"
+                except Exception as e:
+                    succeeded, error = False, e
+                if succeeded:
+                    queue.complete([task_id])
+                else:
+                    queue.release([task_id], error)
+                results.append((payload, succeeded))
+    return results
+
+def run_worker(queue_path, batch_size=None, poll_seconds=None):
+    """
+    Takes in the path to a queue file that was created with seed_queue().
+    Leases batches of dockets and PDF links from the queue and downloads them until no work is left.
+    Several workers, on the same machine or on different machines, can run against the same queue file at once.
+    Returns a dictionary with the number of JSON and PDF tasks in each state when the worker finished.
+    """
+    # We import the download modules here rather than at the top of the module, because they load the GUI modules.
+    import get_json, get_pdfs
+
+    batch_size = batch_size or config.queueBatchSize
+    # Several workers can't add to the same shards and archives, so workers always save separate files.
+    config.outputMode = "files"
+    poll_seconds = poll_seconds or config.queuePollSeconds
+
+    queue = WorkQueue(queue_path)
+    settings = queue.get_settings()
+    JSON_INPUT_OUTPUT_PATH = settings["JSON_INPUT_OUTPUT_PATH"]
+    PDF_OUTPUT_PATH = settings["PDF_OUTPUT_PATH"]
+    CLIENT_MATTER = settings["CLIENT_MATTER"]
+    IS_CACHED = settings["IS_CACHED"]
+
+    print(f"Worker {queue.worker_id} started.")
+    # If metricsPort is set in config.py, the timings of this worker's downloads can be watched while it runs.
+    metrics.start_server()
+    progress = tqdm(unit=" tasks")
+
+    while True:
+        # The queue depth in the metrics is the number of tasks in the shared queue that no worker has claimed yet.
+        metrics.REGISTRY.set_gauge("queue_depth", queue.counts(PDF_TASK)[PENDING], stage=PDF_TASK)
+        metrics.REGISTRY.set_gauge("queue_depth", queue.counts(JSON_TASK)[PENDING], stage=JSON_TASK)
+        # PDF links are leased first, so the documents from dockets that are already downloaded don't wait behind the rest of the csv.
+        leased = queue.lease(PDF_TASK, batch_size)
+        if leased:
+            _run_batch(queue, get_pdfs.download_from_link_list, leased,
+                       lambda payload: (payload[0], payload[1], payload[2], PDF_OUTPUT_PATH, CLIENT_MATTER))
+            progress.update(len(leased))
+            continue
+
+        leased = queue.lease(JSON_TASK, batch_size)
+        if leased:
+            results = _run_batch(queue, get_json.download_json_from_list_of_tuples, leased,
+                                 lambda payload: (payload[0], payload[1], payload[2], JSON_INPUT_OUTPUT_PATH, CLIENT_MATTER, IS_CACHED))
+            # Every docket that was saved has its PDF links added to the queue, keyed by the link so no document is queued twice.
+            for payload, succeeded in results:
+                if not succeeded:
+                    continue
+                caseName, caseNo, caseCourt = payload
+                path = os.path.join(JSON_INPUT_OUTPUT_PATH, f"{caseName} {caseNo}.json")
+                link_list = get_pdfs.get_urls_from_json_file(path, PDF_OUTPUT_PATH, CLIENT_MATTER)
+                # The order and the per-docket cap set in config.py are applied to each docket's links. Caps on the whole
+                # run aren't, because each worker only sees its own share of the run.
+                link_list, _ = scheduler.schedule(link_list, max_documents=float("inf"), max_spend=float("inf"))
+                queue.add_tasks(PDF_TASK, ((link, [link, fileName, folderName]) for link, fileName, folderName, *_ in link_list))
+            progress.update(len(leased))
+            continue
+
+        # If there's nothing left to lease, we check whether other workers still hold leases. Their tasks may yet add
+        # PDF links, or be handed back after a failure, so we wait for them before finishing.
+        if queue.counts(JSON_TASK)[LEASED] == 0 and queue.counts(PDF_TASK)[LEASED] == 0:
+            break
+        time.sleep(poll_seconds)
+
+    progress.close()
+    summary = {JSON_TASK: queue.counts(JSON_TASK), PDF_TASK: queue.counts(PDF_TASK)}
+    queue.close()
+    print(f"Worker {queue.worker_id} finished.")
+    if config.saveMetricsSummary:
+        print(f"Timings saved to {metrics.save_summary()}")
+    for kind, counts in summary.items():
+        print(f"{kind.upper()} tasks: {counts[DONE]} done, {counts[FAILED]} failed, {counts[PENDING] + counts[LEASED]} remaining.")
+    return summary
@@ -0,0 +1,90 @@
+# Built-in Modules
+import math
+import numbers
+import datetime
+# Third-party Modules
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+# DataFrame.to_excel() builds the whole workbook in memory, cell by cell, before it writes anything, which takes a lot
+# of memory and time for a large table. XlsxWriter writes .xlsx files with openpyxl's write-only mode instead: each row
+# is written out as it is given, so memory use stays the same however many rows there are.
+# It is used like csv.DictWriter, so code that writes csv files row by row can write .xlsx files the same way.
+
+# The most rows a sheet can hold, counting its header. Rows past this go on to a new sheet, with the header repeated.
+MAX_ROWS_PER_SHEET = 1048576
+
+def cell_value(value):
+    """
+    Returns a value as it can be stored in a cell. Empty values (None and NaN) are left blank, and characters a
+    spreadsheet can't hold (like control characters in scraped text) are removed.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    if isinstance(value, (numbers.Number, datetime.date, datetime.time)):
+        return value
+    return str(value)
+
+class XlsxWriter:
+    """
+    Writes rows to an .xlsx file as they are given.
+    Takes in the path to save to, and the column names. Rows can be dictionaries with the column names as keys (like
+    csv.DictWriter) or sequences of values in the same order as the columns.
+    The file is saved when close() is called, or at the end of a with block.
+    """
+
+    def __init__(self, path, fieldnames, sheet_name="Sheet1"):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.sheet_name = sheet_name
+        self._workbook = Workbook(write_only=True)
+        self._sheets = 0
+        self._rows = 0
+        self._header = False
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        title = self.sheet_name if self._sheets == 1 else f"{self.sheet_name} ({self._sheets})"
+        self._sheet = self._workbook.create_sheet(title)
+        self._rows = 0
+        if self._header:
+            self._append(self.fieldnames)
+
+    def _append(self, values):
+        if self._rows == MAX_ROWS_PER_SHEET:
+            self._new_sheet()
+        self._sheet.append([cell_value(value) for value in values])
+        self._rows += 1
+
+    def writeheader(self):
+        self._header = True
+        self._append(self.fieldnames)
+
+    def writerow(self, row):
+        if isinstance(row, dict):
+            row = [row.get(name) for name in self.fieldnames]
+        self._append(row)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def close(self):
+        self._workbook.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def save_dataframe(dataframe, path):
+    """
+    Saves a pandas DataFrame as an .xlsx file without its index, like DataFrame.to_excel(path, index=False), one row at a time.
+    """
+    with XlsxWriter(path, [str(column) for column in dataframe.columns]) as writer:
+        writer.writeheader()
+        writer.writerows(dataframe.itertuples(index=False, name=None))
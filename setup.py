@@ -20,18 +20,23 @@ setup(name='docket-alarm-api-bulk-download',
     package_dir = {'docket_alarm_api_bulk_download':'docket_alarm_api_bulk_download'},
     package_data = {'docket_alarm_api_bulk_download':['docket_alarm_api_bulk_download/csv/input.sample.csv','docket_alarm_api_bulk_download/docs/.gitkeep','docket_alarm_api_bulk_download/json-output/.gitkeep','docket_alarm_api_bulk_download/log/.gitkeep','docket_alarm_api_bulk_download/pdf-output/.gitkeep', 'docket_alarm_api_bulk_download/sav/.gitkeep']},
     include_package_data=True,
+    python_requires='>=3.11',
     install_requires=[
-'stdiomask',
-'colorama',
-'progress',
-'pandas',
-'tqdm',
-'requests',
-'retrying',
-'PyPDF2',
-'PySimpleGUI',
-'openpyxl',
+'stdiomask>=0.0.6',
+'colorama>=0.4.6',
+'progress>=1.6.1',
+'pandas>=3.0.6',
+'tqdm>=4.70.1',
+'requests>=2.34.2',
+'retrying>=1.4.2',
+'PyPDF2>=3.0.1',
+'PySimpleGUI>=6.3.0.1',
+'openpyxl>=3.1.5',
     ],
+    extras_require={
+        's3':['boto3'],
+        'test':['pytest>=9.1.1'],
+    },
     entry_points={
         'console_scripts':['docket-alarm-api-bulk-download=docket_alarm_api_bulk_download.__main__:run'],
     }
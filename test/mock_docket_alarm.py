@@ -0,0 +1,266 @@
+# Built-in Modules
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+
+# A local stand-in for the Docket Alarm API, used by the tests and the benchmarks so they never touch the real API.
+# It answers /login/, /getdocket/, /search/, /searchdirect/ and /searchpacer/ under /api/v1/, and serves the PDF links
+# it hands out in docket reports. How slow it is, how often it fails and how big its answers are can all be set.
+
+class MockDocketAlarm:
+    """
+    A mock Docket Alarm server running in a background thread.
+    Optional arguments:
+    latency - seconds every request waits before it is answered.
+    jitter - extra seconds, chosen at random up to this amount, added to the latency.
+    error_rate - the share of requests (0 to 1) answered with a 500 error. Logging in never fails.
+    entries - the number of entries in each docket report. Every entry has a link to a PDF.
+    exhibits - the number of exhibits, each with its own PDF link, attached to every entry.
+    pdf_bytes - the size of each PDF served.
+    search_results - the most results a search returns.
+    drop_rate - the share of PDF downloads (0 to 1) where the connection is closed after half of the PDF is sent.
+    ranges - whether PDFs can be requested in parts with a Range header, to resume downloads.
+    pdf_pages - the number of pages in each PDF.
+    html_rate - the share of PDF downloads (0 to 1) answered with an HTML error page instead, with a 200 status.
+    related - a dictionary of docket number to the (docket number, court) of each docket related to it.
+    docket_entries - a dictionary of docket number to the number of entries in its docket report, in place of entries.
+    missing_links - a dictionary of docket number to the entry numbers that have no link in its cached docket report.
+    They have their links when the docket is pulled uncached.
+    updated - a dictionary of docket number to the date Docket Alarm last updated it, shown in the docket's info.
+    Every login gets a new token. Tokens added to expired_tokens are turned down with a 401 error, like tokens Docket
+    Alarm has logged out.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, entries=10, exhibits=0, pdf_bytes=50000, search_results=50,
+                 drop_rate=0.0, ranges=True, pdf_pages=1, html_rate=0.0, related=None, docket_entries=None,
+                 missing_links=None, updated=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.entries = entries
+        self.exhibits = exhibits
+        self.pdf_bytes = pdf_bytes
+        self.search_results = search_results
+        self.drop_rate = drop_rate
+        self.ranges = ranges
+        self.pdf_pages = pdf_pages
+        self.html_rate = html_rate
+        self.related = related or {}
+        self.docket_entries = docket_entries or {}
+        self.missing_links = missing_links or {}
+        self.updated = updated or {}
+        self.logins = 0
+        self.expired_tokens = set()
+        # The paths of PDFs that get an HTML error page the first time they are requested, and the PDF after that.
+        self.html_once = set()
+        # The number of bytes of PDFs sent, counting only what was actually written to the connection.
+        self.pdf_bytes_sent = 0
+        # Counts of the requests made to each endpoint.
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """
+        The address of the server, like http://127.0.0.1:PORT/
+        """
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    @property
+    def api_url(self):
+        """
+        The address to use in place of https://www.docketalarm.com/api/v1/
+        """
+        return self.url + "api/v1/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def pdf_content(self, path):
+        """
+        Returns the bytes of the PDF served at the path specified. Every PDF is a readable PDF with pdf_pages blank
+        pages, padded with a comment to about pdf_bytes in size.
+        """
+        kids = " ".join(f"{number + 3} 0 R" for number in range(self.pdf_pages))
+        objects = [
+            b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+            f"2 0 obj\n<< /Type /Pages /Kids [{kids}] /Count {self.pdf_pages} >>\nendobj\n".encode("ascii"),
+        ] + [
+            f"{number + 3} 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>\nendobj\n".encode("ascii")
+            for number in range(self.pdf_pages)
+        ]
+        header = b"%PDF-1.4\n% " + path.encode("utf-8") + b"\n"
+        padding = max(0, self.pdf_bytes - len(header) - sum(len(pdf_object) for pdf_object in objects) - 60 * len(objects) - 120)
+        content = header + b"%" + b"0" * padding + b"\n"
+        offsets = []
+        for pdf_object in objects:
+            offsets.append(len(content))
+            content += pdf_object
+        xref = len(content)
+        content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+        content += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+        content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+        return content
+
+    def docket(self, court, docket, cached=True):
+        """
+        Returns the getdocket response for the court and docket number specified.
+        """
+        # The court and docket number are quoted so they can be used in the links' paths.
+        link_base = f"{self.url}pdf/{quote(court)}/{quote(docket)}"
+        report = []
+        for number in range(1, self.docket_entries.get(docket, self.entries) + 1):
+            entry = {
+                "number": number,
+                "entry_date": f"2020-{(number % 12) + 1:02d}-{(number % 28) + 1:02d}",
+                "contents": f"<span>Motion number {number} filed in {docket}</span>",
+                "link": f"{link_base}/{number}.pdf",
+            }
+            if self.exhibits:
+                entry["exhibits"] = [
+                    {"exhibit": exhibit, "link": f"{link_base}/{number}-{exhibit}.pdf"}
+                    for exhibit in range(1, self.exhibits + 1)
+                ]
+            if cached and number in self.missing_links.get(docket, ()):
+                del entry["link"]
+            report.append(entry)
+        info = {"title": f"Mock case {docket}", "court": court, "docket_number": docket}
+        if docket in self.updated:
+            info["updated"] = self.updated[docket]
+        return {
+            "success": True,
+            "info": info,
+            "docket_report": report,
+            "parties": [
+                {"name": "Mock Petitioner", "type": "Petitioner", "counsel": [{"name": "Mock Counsel", "firm": "Mock LLP"}]},
+                {"name": "Mock Respondent", "type": "Respondent"},
+            ],
+            "related": [{"docket": number, "court": related_court, "relationship": "Related"}
+                        for number, related_court in self.related.get(docket, [])],
+        }
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                # We keep the server quiet, so it doesn't flood the test output.
+                pass
+
+            def _parameters(self):
+                parameters = parse_qs(urlparse(self.path).query)
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    parameters.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+                return {key: values[-1] for key, values in parameters.items()}
+
+            def _send(self, status, body, content_type="application/json"):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _answer(self):
+                path = urlparse(self.path).path
+                endpoint = "pdf" if path.startswith("/pdf/") else path.replace("/api/v1/", "").strip("/")
+                parameters = self._parameters()
+                with mock._lock:
+                    mock.requests[endpoint] = mock.requests.get(endpoint, 0) + 1
+                    fail = endpoint != "login" and mock._random.random() < mock.error_rate
+                    delay = mock.latency + mock._random.random() * mock.jitter
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    return self._send(500, {"success": False, "error": "Mock server error."})
+
+                if endpoint == "login":
+                    with mock._lock:
+                        mock.logins += 1
+                        token = f"mock-login-token-{mock.logins}"
+                    return self._send(200, {"success": True, "login_token": token})
+                if parameters.get("login_token") in mock.expired_tokens:
+                    return self._send(401, {"success": False, "error": "Invalid login_token. Please log in again."})
+                if endpoint == "getdocket":
+                    return self._send(200, mock.docket(parameters.get("court", ""), parameters.get("docket", ""),
+                                                       cached=parameters.get("cached") != "False"))
+                if endpoint == "search":
+                    limit = min(int(parameters.get("limit", 10)), mock.search_results)
+                    results = [{"court": "Mock Court", "docket": f"S-{number}", "title": f"Mock case S-{number}"} for number in range(limit)]
+                    return self._send(200, {"success": True, "search_results": results, "count": limit})
+                if endpoint in ("searchdirect", "searchpacer"):
+                    if "court" not in parameters and "court_region" not in parameters:
+                        return self._send(200, {"success": True, "courts": ["Mock Court"]})
+                    docket = parameters.get("docketnum", parameters.get("docket_num", ""))
+                    court = parameters.get("court", parameters.get("court_region", ""))
+                    return self._send(200, {"success": True, "search_results": [{"court": court, "docket": docket}]})
+                if endpoint == "pdf":
+                    return self._send_pdf(path)
+                return self._send(404, {"success": False, "error": "Unknown endpoint."})
+
+            def _send_pdf(self, path):
+                with mock._lock:
+                    html = path in mock.html_once or mock._random.random() < mock.html_rate
+                    mock.html_once.discard(path)
+                if html:
+                    # Some servers answer with an error page, but a 200 status, when a document isn't available.
+                    return self._send(200, b"<html><body>Document temporarily unavailable</body></html>", content_type="text/html")
+                content = mock.pdf_content(path)
+                etag = f'"{len(content)}-{abs(hash(path))}"'
+                status, start = 200, 0
+                requested = self.headers.get("Range", "")
+                if mock.ranges and requested.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+                    start = int(requested[len("bytes="):].split("-")[0])
+                    if start >= len(content):
+                        return self._send(416, {"success": False, "error": "Range not satisfiable."})
+                    status = 206
+                body = content[start:]
+                with mock._lock:
+                    drop = mock._random.random() < mock.drop_rate
+                self.send_response(status)
+                self.send_header("Content-Type", "application/pdf")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                if mock.ranges:
+                    self.send_header("Accept-Ranges", "bytes")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+                self.end_headers()
+                if self.command == "HEAD":
+                    return
+                if drop:
+                    # We send half of the PDF and then close the connection, like a network that fails partway.
+                    body = body[:len(body) // 2]
+                    self.close_connection = True
+                self.wfile.write(body)
+                with mock._lock:
+                    mock.pdf_bytes_sent += len(body)
+
+            do_GET = _answer
+            do_POST = _answer
+            do_HEAD = _answer
+
+        return Handler
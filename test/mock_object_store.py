@@ -0,0 +1,184 @@
+# Built-in Modules
+import hashlib
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ElementTree
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote, unquote
+from xml.sax.saxutils import escape
+
+# A local stand-in for an S3-compatible object store (like MinIO), used by the tests so they never touch a real one.
+# It understands the few requests storage.S3Storage makes, with path-style addresses (http://127.0.0.1:PORT/bucket/key):
+# putting and getting objects, listing a bucket, and starting, sending parts of, finishing and abandoning multipart
+# uploads. Signatures aren't checked. Objects are kept in memory.
+
+class MockObjectStore:
+    """
+    A mock object store running in a background thread. Every bucket exists.
+    Optional arguments:
+    part_latency - seconds every part upload waits before it is answered, so parts sent at once overlap.
+    """
+
+    def __init__(self, part_latency=0.0):
+        self.part_latency = part_latency
+        # The objects stored, by (bucket, key).
+        self.objects = {}
+        # The parts of each multipart upload that hasn't been finished, by upload id.
+        self.uploads = {}
+        self.completed_uploads = 0
+        self.aborted_uploads = 0
+        self.parts_received = 0
+        # The most part uploads that were in progress at the same time.
+        self.most_parts_at_once = 0
+        self._parts_in_progress = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=None):
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _body(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if "aws-chunked" in self.headers.get("Content-Encoding", "") or \
+                        self.headers.get("x-amz-content-sha256", "").startswith("STREAMING-"):
+                    body = self._unchunk(body)
+                return body
+
+            @staticmethod
+            def _unchunk(body):
+                # Newer clients send bodies in chunks of "<size in hex>[;signature]\r\n<bytes>\r\n", ending with a
+                # chunk of size 0 followed by trailing checksums.
+                data = bytearray()
+                position = 0
+                while True:
+                    line_end = body.index(b"\r\n", position)
+                    size = int(body[position:line_end].split(b";")[0], 16)
+                    if size == 0:
+                        return bytes(data)
+                    data.extend(body[line_end + 2:line_end + 2 + size])
+                    position = line_end + 2 + size + 2
+
+            def _address(self):
+                parsed = urlparse(self.path)
+                bucket, _, key = parsed.path.lstrip("/").partition("/")
+                return unquote(bucket), unquote(key), {name: values[0] for name, values in parse_qs(parsed.query, keep_blank_values=True).items()}
+
+            def do_PUT(self):
+                bucket, key, query = self._address()
+                body = self._body()
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if "uploadId" in query:
+                    with store._lock:
+                        store._parts_in_progress += 1
+                        store.most_parts_at_once = max(store.most_parts_at_once, store._parts_in_progress)
+                    time.sleep(store.part_latency)
+                    with store._lock:
+                        store._parts_in_progress -= 1
+                        if query["uploadId"] not in store.uploads:
+                            return self._send(404, "<Error><Code>NoSuchUpload</Code></Error>")
+                        store.uploads[query["uploadId"]][int(query["partNumber"])] = (etag, body)
+                        store.parts_received += 1
+                else:
+                    with store._lock:
+                        store.objects[(bucket, key)] = body
+                self._send(200, headers={"ETag": etag})
+
+            def do_POST(self):
+                bucket, key, query = self._address()
+                body = self._body()
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    with store._lock:
+                        store.uploads[upload_id] = {}
+                    return self._send(200, f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{escape(key)}</Key>"
+                                           f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+                upload_id = query.get("uploadId")
+                namespace = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+                requested = [int(element.text) for element in ElementTree.fromstring(body).iter()
+                             if element.tag in ("PartNumber", namespace + "PartNumber")]
+                with store._lock:
+                    parts = store.uploads.pop(upload_id, None)
+                    if parts is None or any(number not in parts for number in requested):
+                        return self._send(400, "<Error><Code>InvalidPart</Code></Error>")
+                    store.objects[(bucket, key)] = b"".join(parts[number][1] for number in sorted(requested))
+                    store.completed_uploads += 1
+                self._send(200, f"<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{escape(key)}</Key>"
+                                f"<ETag>\"done\"</ETag></CompleteMultipartUploadResult>")
+
+            def do_DELETE(self):
+                bucket, key, query = self._address()
+                with store._lock:
+                    if "uploadId" in query:
+                        if store.uploads.pop(query["uploadId"], None) is not None:
+                            store.aborted_uploads += 1
+                    else:
+                        store.objects.pop((bucket, key), None)
+                self._send(204)
+
+            def do_GET(self):
+                bucket, key, query = self._address()
+                if not key:
+                    return self._list(bucket, query)
+                with store._lock:
+                    body = store.objects.get((bucket, key))
+                if body is None:
+                    return self._send(404, "<Error><Code>NoSuchKey</Code></Error>")
+                self._send(200, body, {"Content-Type": "application/octet-stream"})
+
+            def _list(self, bucket, query):
+                prefix, delimiter = query.get("prefix", ""), query.get("delimiter", "")
+                with store._lock:
+                    keys = sorted(key for stored_bucket, key in store.objects if stored_bucket == bucket and key.startswith(prefix))
+                # Clients usually ask for the keys to be URL encoded, so any character can be sent in the XML.
+                encode = (lambda key: quote(key)) if query.get("encoding-type") == "url" else escape
+                contents, prefixes = [], set()
+                for key in keys:
+                    rest = key[len(prefix):]
+                    if delimiter and delimiter in rest:
+                        prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+                    else:
+                        contents.append(f"<Contents><Key>{encode(key)}</Key><Size>{len(store.objects[(bucket, key)])}</Size></Contents>")
+                common = "".join(f"<CommonPrefixes><Prefix>{encode(name)}</Prefix></CommonPrefixes>" for name in sorted(prefixes))
+                self._send(200, f"<ListBucketResult><Name>{bucket}</Name><Prefix>{encode(prefix)}</Prefix><KeyCount>{len(contents)}</KeyCount>"
+                                f"<IsTruncated>false</IsTruncated>{''.join(contents)}{common}</ListBucketResult>")
+
+        return Handler
@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import csv
+import json
+import tarfile
+import zipfile
+import config, global_variables, login, jobs, archives, get_json, get_pdfs
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestArchives(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(entries=3).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, global_variables.JSON_INPUT_OUTPUT_PATH, global_variables.PDF_OUTPUT_PATH,
+                     login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.outputMode, config.archiveFormat, config.archiveBatchSize)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.outputMode = "archive"
+
+    @classmethod
+    def tearDownClass(cls):
+        (global_variables.API_URL, global_variables.JSON_INPUT_OUTPUT_PATH, global_variables.PDF_OUTPUT_PATH,
+         login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.outputMode, config.archiveFormat, config.archiveBatchSize) = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def read_index(self, directory):
+        with open(os.path.join(directory, archives.INDEX_NAME), newline='') as indexFile:
+            return list(csv.DictReader(indexFile))
+
+    def test_json_shards(self):
+        directory = os.path.join(self.tempdir.name, "json-shards")
+        os.makedirs(directory)
+        writer = archives.JsonShardWriter(directory, shard_size=2)
+        for number in range(3):
+            writer.write(f"docket {number}", f'{{"number": {number}}}')
+        writer.close()
+
+        self.assertEqual(sorted(name for name in os.listdir(directory) if name.endswith(".gz")),
+                         ["dockets-00001.jsonl.gz", "dockets-00002.jsonl.gz"])
+        self.assertEqual([(row["docket"], row["shard"], row["line"]) for row in self.read_index(directory)],
+                         [("docket 0", "dockets-00001.jsonl.gz", "0"), ("docket 1", "dockets-00001.jsonl.gz", "1"),
+                          ("docket 2", "dockets-00002.jsonl.gz", "0")])
+        self.assertEqual(list(archives.iter_shard_dockets(directory)),
+                         [(f"docket {number}", {"number": number}) for number in range(3)])
+        self.assertEqual(archives.count_shard_dockets(directory), 3)
+
+    def test_docket_saved_twice(self):
+        # A docket saved again, in the same shard and in a later one, is only read back once, as it was saved last.
+        directory = os.path.join(self.tempdir.name, "json-resaved")
+        os.makedirs(directory)
+        writer = archives.JsonShardWriter(directory, shard_size=3)
+        for name, version in [("docket 0", 1), ("docket 1", 1), ("docket 0", 2), ("docket 0", 3)]:
+            writer.write(name, json.dumps({"docket_report": [{"number": 1, "contents": "Order", "link": f"http://x/{version}.pdf"}]}))
+        writer.close()
+
+        self.assertEqual([(name, docket["docket_report"][0]["link"]) for name, docket in archives.iter_shard_dockets(directory)],
+                         [("docket 1", "http://x/1.pdf"), ("docket 0", "http://x/3.pdf")])
+        self.assertEqual(archives.count_shard_dockets(directory), 2)
+        # So each PDF is only queued once.
+        job = jobs.Job(jsonOutputPath=directory, pdfOutputPath=os.path.join(self.tempdir.name, "pdf-resaved"))
+        self.assertEqual(sorted(link.link for link in get_pdfs.iter_urls(directory, job)), ["http://x/1.pdf", "http://x/3.pdf"])
+
+    def test_download_to_archives(self):
+        for archive_format, batch_size in [("zip", None), ("tar", 2)]:
+            config.archiveFormat, config.archiveBatchSize = archive_format, batch_size
+            global_variables.JSON_INPUT_OUTPUT_PATH = os.path.join(self.tempdir.name, f"json-{archive_format}")
+            global_variables.PDF_OUTPUT_PATH = os.path.join(self.tempdir.name, f"pdf-{archive_format}")
+            os.makedirs(global_variables.JSON_INPUT_OUTPUT_PATH)
+            os.makedirs(global_variables.PDF_OUTPUT_PATH)
+
+            get_json.download_json_from_list_of_tuples(("test", "17-645", "Supreme Court of the United States",
+                                                        global_variables.JSON_INPUT_OUTPUT_PATH, "", True))
+            archives.close_all()
+            self.assertFalse(os.path.exists(os.path.join(global_variables.JSON_INPUT_OUTPUT_PATH, "test 17-645.json")))
+
+            # The links are read from the shard, and the PDFs end up in archives rather than in a folder per docket.
+            link_list = get_pdfs.get_urls(global_variables.JSON_INPUT_OUTPUT_PATH)
+            self.assertEqual(len(link_list), 3)
+            get_pdfs.thread_download_pdfs(link_list)
+
+            rows = self.read_index(global_variables.PDF_OUTPUT_PATH)
+            self.assertEqual(sorted(row["file"] for row in rows), sorted(f"{link.fileName}.pdf" for link in link_list))
+            self.assertEqual(len({row["archive"] for row in rows}), 1 if batch_size is None else 2)
+            for row in rows:
+                path = os.path.join(global_variables.PDF_OUTPUT_PATH, row["archive"])
+                if archive_format == "zip":
+                    with zipfile.ZipFile(path) as archive:
+                        content = archive.read(row["member"])
+                else:
+                    with tarfile.open(path) as archive:
+                        content = archive.extractfile(row["member"]).read()
+                self.assertEqual(len(content), int(row["bytes"]))
+                self.assertTrue(content.startswith(b"%PDF-"))
+            self.assertEqual(os.listdir(os.path.join(global_variables.PDF_OUTPUT_PATH, archives.STAGING_FOLDER, "test 17-645")), [])
+
+if __name__ == "__main__":
+    unittest.main()
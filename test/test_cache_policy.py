@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import datetime
+import config, global_variables, login, jobs, get_json, cache_policy
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestCachePolicy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The mock's docket entries are all from 2020. 17-645 says it was last updated in 2020 too, and 18-100 doesn't say.
+        cls.mock = MockDocketAlarm(entries=3, updated={"17-645": "2020-06-01T10:00:00"}).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload,
+                     config.uncachedAfterDays, config.uncachedUseEntryDates)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.ingestAfterDownload = False
+
+    @classmethod
+    def tearDownClass(cls):
+        (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload,
+         config.uncachedAfterDays, config.uncachedUseEntryDates) = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def download(self, name, uncachedAfterDays, uncachedUseEntryDates=False):
+        config.uncachedAfterDays, config.uncachedUseEntryDates = uncachedAfterDays, uncachedUseEntryDates
+        json_dir = os.path.join(self.tempdir.name, name)
+        os.makedirs(json_dir)
+        job = jobs.Job(jsonOutputPath=json_dir, isCached=True,
+                       dockets=[(name, "17-645", "Supreme Court of the United States"), (name, "18-100", "Supreme Court of the United States")])
+        self.mock.requests.clear()
+        before = cache_policy.counts()
+        self.assertEqual(get_json.thread_download_json(job), 2)
+        after = cache_policy.counts()
+        return self.mock.requests["getdocket"], {outcome: after[outcome] - before[outcome] for outcome in after}
+
+    def test_only_stale_dockets_are_downloaded_uncached(self):
+        # Only 17-645 says how old its cached copy is. 18-100 is kept, even though its entries are old.
+        calls, outcomes = self.download("stale", 30)
+        self.assertEqual(calls, 3)
+        self.assertEqual(outcomes, {"fresh": 0, "refreshed": 1, "unknown": 1})
+        calls, outcomes = self.download("fresh", 100000)
+        self.assertEqual(calls, 2)
+        self.assertEqual(outcomes, {"fresh": 1, "refreshed": 0, "unknown": 1})
+        # When asked to, dockets that don't say are judged by their newest entry.
+        calls, outcomes = self.download("entry_dates", 30, uncachedUseEntryDates=True)
+        self.assertEqual(calls, 4)
+        self.assertEqual(outcomes, {"fresh": 0, "refreshed": 2, "unknown": 0})
+        # With no age set, dockets aren't checked at all.
+        calls, outcomes = self.download("off", None)
+        self.assertEqual(calls, 2)
+        self.assertEqual(outcomes, {"fresh": 0, "refreshed": 0, "unknown": 0})
+
+    def test_last_updated(self):
+        docket = {"info": {"updated": "2021-05-06T10:00:00"}, "docket_report": [{"entry_date": "2021-01-01"}]}
+        self.assertEqual(cache_policy.last_updated(docket), datetime.date(2021, 5, 6))
+        docket = {"info": {}, "docket_report": [{"entry_date": "01/02/2021"}, {"entry_date": "2020-12-31"}, {}]}
+        self.assertIsNone(cache_policy.last_updated(docket))
+        self.assertEqual(cache_policy.last_updated(docket, use_entry_dates=True), datetime.date(2021, 1, 2))
+        self.assertIsNone(cache_policy.last_updated({"info": {}, "docket_report": []}))
+
+if __name__ == "__main__":
+    unittest.main()
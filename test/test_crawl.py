@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import config, global_variables, login, jobs, crawl
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+SCOTUS = "Supreme Court of the United States"
+APPEALS = "Court of Appeals, Ninth Circuit"
+
+class TestCrawl(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 17-645 was appealed from 16-100, which was consolidated with 16-101. 16-101 lists 17-645 back, and 16-100
+        # (written differently) too, so the crawl has to notice it has seen them.
+        related = {
+            "17-645": [("16-100", APPEALS)],
+            "16-100": [("16-101", None)],
+            "16-101": [("17-645", SCOTUS), (" 16-100", APPEALS.upper())],
+        }
+        cls.mock = MockDocketAlarm(entries=1, related=related).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.ingestAfterDownload = False
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def make_job(self, name):
+        json_dir = os.path.join(self.tempdir.name, name)
+        os.makedirs(json_dir)
+        return jobs.Job(jsonOutputPath=json_dir, clientMatter=name, dockets=[("Family", "17-645", SCOTUS), ("Family", "17-645", SCOTUS)])
+
+    def test_related_dockets_are_followed_once(self):
+        job = self.make_job("deep")
+        self.mock.requests.clear()
+        self.assertEqual(crawl.crawl(job, depth=5), 3)
+        self.assertEqual(sorted(os.listdir(job.jsonOutputPath)), ["Family 16-100.json", "Family 16-101.json", "Family 17-645.json"])
+        # Every docket was downloaded once, however many times it was listed.
+        self.assertEqual(self.mock.requests["getdocket"], 3)
+        self.assertEqual(job.progress_summary()["json"]["done"], 3)
+
+    def test_depth_and_limit(self):
+        self.assertEqual(crawl.crawl(self.make_job("shallow"), depth=1), 2)
+        self.assertEqual(crawl.crawl(self.make_job("csv_only"), depth=0), 1)
+        self.assertEqual(crawl.crawl(self.make_job("limited"), depth=5, max_related=1), 2)
+
+if __name__ == "__main__":
+    unittest.main()
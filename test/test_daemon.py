@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import time
+import requests
+import config, global_variables, login, daemon
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestDaemon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(entries=2).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.validatePdfs = False
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def wait_for(self, url):
+        for _ in range(200):
+            status = requests.get(url).json()
+            if status["status"] in ("finished", "failed"):
+                return status
+            time.sleep(0.05)
+        self.fail(f"The job at {url} didn't finish.")
+
+    def test_jobs_are_taken_over_http(self):
+        with daemon.Daemon(port=0, max_jobs=2) as running:
+            ids = []
+            for name, dockets in [("first", [["first", "17-645", "Court A"], ["first", "18-100", "Court A"]]),
+                                  ("second", [["second", "19-200", "Court B"]])]:
+                response = requests.post(running.url + "/jobs", json={
+                    "dockets": dockets, "json_dir": os.path.join(self.tempdir.name, name, "json"),
+                    "pdf_dir": os.path.join(self.tempdir.name, name, "pdf"), "client_matter": name, "pdfs": True})
+                self.assertEqual(response.status_code, 202)
+                ids.append(response.json()["id"])
+
+            first, second = [self.wait_for(f"{running.url}/jobs/{id}") for id in ids]
+            self.assertEqual((first["status"], first["dockets_saved"]), ("finished", 2))
+            self.assertEqual(first["progress"], {"json": {"total": 2, "done": 2, "failed": 0},
+                                                 "pdf": {"total": None, "done": 4, "failed": 0}})
+            self.assertEqual((second["status"], second["progress"]["pdf"]["done"]), ("finished", 2))
+            self.assertEqual(len(requests.get(running.url + "/jobs").json()["jobs"]), 2)
+
+            # A request that doesn't describe a pull is turned away.
+            response = requests.post(running.url + "/jobs", json={"csv": "missing.csv", "dockets": []})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(requests.get(running.url + "/jobs/99").status_code, 404)
+
+        # The daemon logged in once, when it started, and every pull used that token.
+        self.assertEqual(self.mock.requests["login"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+import json
+# Internal Modules
+import docket_store
+import search_index
+
+def make_docket(entries):
+    return {
+        'success': True,
+        'info': {'title': 'Smith v. Jones', 'court': 'Texas State, Supreme Court', 'docket_number': '20-0001'},
+        'docket_report': [{'number': number, 'entry_date': f'2020-01-0{number}', 'contents': f'Entry {number}'} for number in entries],
+        'parties': [{'name': 'Smith', 'type': 'Petitioner'}],
+    }
+
+class TestDocketStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "Smith 20-0001.json")
+        self.database = os.path.join(self.tempdir.name, "dockets.sqlite3")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, docket):
+        with open(self.path, 'w') as fp:
+            json.dump(docket, fp)
+
+    def test_incremental_ingest(self):
+        self.write(make_docket([1, 2, 3]))
+        summary = docket_store.ingest_directory(self.tempdir.name, self.database)
+        self.assertEqual(summary['dockets loaded'], 1)
+
+        # Loading the same files again changes nothing.
+        summary = docket_store.ingest_directory(self.tempdir.name, self.database)
+        self.assertEqual(summary['dockets skipped'], 1)
+        self.assertEqual(summary['rows added'], 0)
+
+        # Only the entries that changed are written after a re-pull.
+        self.write(make_docket([2, 3, 4]))
+        summary = docket_store.ingest_directory(self.tempdir.name, self.database)
+        self.assertEqual((summary['rows added'], summary['rows removed']), (1, 1))
+
+        connection = docket_store.connect(self.database)
+        numbers = [row[0] for row in connection.execute("SELECT entry_number FROM docket_entries ORDER BY entry_date")]
+        self.assertEqual(numbers, ['2', '3', '4'])
+        self.assertEqual(connection.execute("SELECT court, docket_number FROM dockets").fetchall(), [('Texas State, Supreme Court', '20-0001')])
+        connection.close()
+
+    def test_search_follows_reloads(self):
+        self.write(make_docket([1, 2]))
+        docket_store.ingest_directory(self.tempdir.name, self.database)
+        self.assertEqual([result['number'] for result in search_index.search("entry 2", self.database)], ['2'])
+
+        # Entries removed by a re-pull drop out of the index, and new ones are added.
+        self.write(make_docket([1, 3]))
+        docket_store.ingest_directory(self.tempdir.name, self.database)
+        self.assertEqual(search_index.search("entry 2", self.database), [])
+        self.assertEqual([result['number'] for result in search_index.search("entry 3", self.database)], ['3'])
+        # Queries that aren't valid search syntax are searched for as typed.
+        self.assertEqual(len(search_index.search('20-0001 "entry', self.database)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+# Internal Modules
+import filters
+import get_pdfs
+
+DOCKET = {'info': {'court': 'Court A'}, 'docket_report': [
+    {'number': 1, 'entry_date': '2019-12-30', 'contents': '<span>Complaint</span>', 'link': 'l1'},
+    {'number': 2, 'entry_date': '2020-02-01', 'contents': '<span>ORDER granting motion</span>', 'link': 'l2',
+     'exhibits': [{'exhibit': 1, 'link': 'l2e'}]},
+    {'number': 3, 'entry_date': '2020-03-01', 'contents': '<span>Final Judgment</span>', 'link': 'l3'},
+    {'number': 4, 'contents': '<span>Order without a date</span>', 'link': 'l4'},
+]}
+
+def links(expression):
+    return [link[0] for link in get_pdfs.get_urls_from_docket(DOCKET, "docket", "", "", filters.compile_filter(expression))]
+
+class TestFilters(unittest.TestCase):
+
+    def test_empty_filter_keeps_everything(self):
+        self.assertEqual(links(""), ["l1", "l2", "l2e", "l3", "l4"])
+
+    def test_terms(self):
+        self.assertEqual(links("after:2020-01-01"), ["l2", "l2e", "l3"])
+        self.assertEqual(links("before:2020-02-01"), ["l1", "l2", "l2e"])
+        self.assertEqual(links('contents:"order|judgment"'), ["l2", "l2e", "l3", "l4"])
+        self.assertEqual(links("contents:span"), [])
+        self.assertEqual(links("exclude:motion"), ["l1", "l3", "l4"])
+        self.assertEqual(links("number:1,3-4"), ["l1", "l3", "l4"])
+        self.assertEqual(links("exhibits:no"), ["l1", "l2", "l3", "l4"])
+        self.assertEqual(links("exhibits:only"), ["l2e"])
+        self.assertEqual(links('after:2020-01-01 contents:"order|judgment" exhibits:no'), ["l2", "l3"])
+
+    def test_bad_expressions(self):
+        for expression in ["date:2020", "after:yesterday", "contents:(", "number:one", "exhibits:maybe", 'contents:"open']:
+            with self.assertRaises(filters.FilterError):
+                filters.DocumentFilter(expression)
+
+if __name__ == '__main__':
+    unittest.main()
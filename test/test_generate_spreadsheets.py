@@ -0,0 +1,66 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+import json
+import csv
+# Internal Modules
+import generate_spreadsheets
+
+DOCKET = {
+    'success': True,
+    'info': {'title': 'Smith v. Jones', 'court': 'Texas State, Supreme Court', 'docket_number': '20-0001'},
+    'docket_report': [
+        {'number': 1, 'entry_date': '2020-01-02', 'contents': '<b>Petition</b> filed'},
+        {'number': 2, 'entry_date': '2020-02-03', 'contents': 'Order'},
+    ],
+    'parties': [
+        {'name': 'Smith', 'type': 'Petitioner', 'counsel': [{'name': 'Ann Lawyer', 'firm': 'Firm LLP'}]},
+        {'name': 'Jones', 'type': 'Respondent'},
+    ],
+}
+
+class TestGenerateSpreadsheets(unittest.TestCase):
+
+    def test_result_from_saved_docket(self):
+        result = generate_spreadsheets.result_from_saved_docket(DOCKET, "Smith 20-0001")
+        self.assertEqual(result, {'docket': '20-0001', 'court': 'Texas State, Supreme Court', 'title': 'Smith v. Jones'})
+
+    def test_rows(self):
+        result = generate_spreadsheets.result_from_saved_docket(DOCKET, "Smith 20-0001")
+        self.assertEqual(len(generate_spreadsheets.docketInformation_rows(result, DOCKET)), 3)
+        entries = generate_spreadsheets.docketEntries_rows(result, DOCKET)
+        self.assertEqual([row['Docket Entry Numbers'] for row in entries], [1, 2])
+        self.assertEqual(entries[0]['Docket Entry Contents'], ' Petition  filed')
+        self.assertEqual([row['Party Name'] for row in generate_spreadsheets.parties_rows(result, DOCKET)], ['Smith', 'Jones'])
+        self.assertEqual([row['Attorney Name'] for row in generate_spreadsheets.attorneysAndFirms_rows(result, DOCKET)], ['Ann Lawyer'])
+
+    def test_directory_to_tables(self):
+        with tempfile.TemporaryDirectory() as input_directory, tempfile.TemporaryDirectory() as output_path:
+            for number in range(3):
+                with open(os.path.join(input_directory, f"Smith 20-000{number}.json"), 'w') as fp:
+                    json.dump(DOCKET, fp)
+            with open(os.path.join(input_directory, "notes.json"), 'w') as fp:
+                fp.write("not json")
+            output_directory = generate_spreadsheets.directory_to_tables(input_directory, output_path)
+            with open(os.path.join(output_directory, "docketEntries.csv"), newline='') as fp:
+                rows = list(csv.DictReader(fp))
+            self.assertEqual(len(rows), 6)
+            self.assertEqual(list(rows[0].keys()), generate_spreadsheets.docketEntries_columns)
+
+    def test_directory_to_tables_as_xlsx(self):
+        import openpyxl
+        with tempfile.TemporaryDirectory() as input_directory, tempfile.TemporaryDirectory() as output_path:
+            for number in range(3):
+                with open(os.path.join(input_directory, f"Smith 20-000{number}.json"), 'w') as fp:
+                    json.dump(DOCKET, fp)
+            output_directory = generate_spreadsheets.directory_to_tables(input_directory, output_path, output_format="xlsx")
+            self.assertEqual(sorted(os.listdir(output_directory)), ["attorneysAndFirms.xlsx", "docketEntries.xlsx", "docketInformation.xlsx", "parties.xlsx"])
+            rows = list(openpyxl.load_workbook(os.path.join(output_directory, "docketEntries.xlsx")).active.values)
+            self.assertEqual(list(rows[0]), generate_spreadsheets.docketEntries_columns)
+            self.assertEqual(len(rows), 7)
+
+if __name__ == '__main__':
+    unittest.main()
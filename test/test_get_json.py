@@ -1,34 +1,61 @@
 # Built-in Modules
 import sys
-sys.path.insert(0,".")
-import unittest
 import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import unittest
+import tempfile
 # Internal Modules
-from modules import global_variables, get_json
+import global_variables, get_json, login, user_tools
+from mock_docket_alarm import MockDocketAlarm
 
 
 global_variables.JSON_INPUT_OUTPUT_PATH = global_variables.JSON_INPUT_OUTPUT_PATH
 
 class TestGetJson(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # The tests run against a local mock of the Docket Alarm API, with login information that only the tests use.
+        cls.mock = MockDocketAlarm().start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, global_variables.JSON_INPUT_OUTPUT_PATH, login.CREDENTIALS_PATH)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.JSON_INPUT_OUTPUT_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, global_variables.JSON_INPUT_OUTPUT_PATH, login.CREDENTIALS_PATH = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
     def test_write_to_json_file(self):
-        get_json.write_to_json_file("test", {'test':'yes'})
-        bool_ = os.path.isfile(os.path.join(global_variables.JSON_INPUT_OUTPUT_PATH,'test.json'))
+        get_json.download_json_from_list_of_tuples(("test", "17-645", "Supreme Court of the United States", global_variables.JSON_INPUT_OUTPUT_PATH, "", True))
+        bool_ = os.path.isfile(os.path.join(global_variables.JSON_INPUT_OUTPUT_PATH,'test 17-645.json'))
         self.assertTrue(bool_)
-        os.remove(os.path.join(global_variables.JSON_INPUT_OUTPUT_PATH, 'test.json'))
+        os.remove(os.path.join(global_variables.JSON_INPUT_OUTPUT_PATH, 'test 17-645.json'))
 
     def test_authenticate(self):
-        result = get_json.authenticate()
+        result = login.Credentials().authenticate()
         self.assertTrue((len(result) > 10) and (isinstance(result, str)))
 
     def test_get_docket(self):
-        result = get_json.get_docket("17-645","Supreme Court of the United States")
+        result = user_tools.get_docket(login.Credentials().authenticate(), "17-645","Supreme Court of the United States")
         self.assertTrue(result['success'])
 
-    def test_format_case_number(self):
-        result = get_json.format_case_number("16-2013-CF-006932-AXXX-MA")
-        self.assertEqual(result, "2013-CF-006932")
-
+    def test_get_docket_with_expired_token(self):
+        # Docket Alarm logged the token out before it was due to be renewed, so the call logs in again and still works.
+        token = login.Credentials().authenticate()
+        self.mock.expired_tokens.add(token)
+        logins = self.mock.logins
+        result = user_tools.get_docket(token, "17-645", "Supreme Court of the United States")
+        self.assertTrue(result["success"])
+        self.assertEqual(self.mock.logins, logins + 1)
+        # The new token is used from then on.
+        self.assertNotEqual(login.Credentials().authenticate(), token)
+        self.assertEqual(self.mock.logins, logins + 1)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
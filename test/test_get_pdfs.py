@@ -1,11 +1,31 @@
 import sys
-sys.path.insert(0,".")
-from modules import get_pdfs
-import unittest
 import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import get_pdfs, global_variables, login, resumable
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+import requests
 
 class TestGetPDFs(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # The tests run against a local mock of the Docket Alarm API, with login information that only the tests use.
+        cls.mock = MockDocketAlarm().start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH)
+        global_variables.API_URL = cls.mock.api_url
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
     def test_cleanhtml(self):
         testString1 = "<span> DECLARATION of Matthew Ambros & William Seymour in ... </span>"
         testString2 = "<span>***NOTE TO ATTORNEY TO RE-FILE DOCUMENT - NON-ECF DOCUMENT ERROR. Note to ... </span>"
@@ -21,17 +41,69 @@ class TestGetPDFs(unittest.TestCase):
         self.assertEqual(result4, "MOTION_TO_DECLARE_SECTION_9211417_FLA_STAT_UNCONSTITUTIONAL_AND_REQUEST_FOR_PROFFER_OF_VICTIM_IMPACT_TESTIMONY_AND_PRETRIAL_RULING_ON_WHETHER_THE_DANGER_OF_UNFAIR_PREJUDICE_OF_THAT_EVIDENCE_OUTWEIGHS_ITS_PROBATIVE_VALUE_ANDOR_OTHERWISE_DENI")
 
     def test_download_from_link_list(self):
-        get_pdfs.download_from_link_list("https://www.nasa.gov/pdf/390539main_Athlete%20Fact%20Sheet.pdf","test_pdf","pdf_test", "test")
-        bool_ = os.path.isfile(os.path.join('test',"pdf_test",'test_pdf.pdf'))
+        outputPath = self.tempdir.name
+        get_pdfs.download_from_link_list((self.mock.url + "pdf/test.pdf","test_pdf","pdf_test", outputPath, ""))
+        bool_ = os.path.isfile(os.path.join(outputPath,"pdf_test",'test_pdf.pdf'))
         self.assertTrue(bool_)
-        os.remove(os.path.join("test","pdf_test", 'test_pdf.pdf'))
-        os.rmdir(os.path.join("test","pdf_test"))
-
-    def test_add_path_to_list_of_tuples(self):
-        testInput = [("eggs", "milk"), ("onions", "flour"), ("toothpaste", "orange juice")]
-        expectedResult = [("eggs", "milk", "sand"), ("onions", "flour","sand"), ("toothpaste", "orange juice", "sand")]
-        actualResult = get_pdfs.add_path_to_list_of_tuples(testInput, "sand")
-        self.assertEqual(expectedResult,actualResult)
+        os.remove(os.path.join(outputPath,"pdf_test", 'test_pdf.pdf'))
+        os.rmdir(os.path.join(outputPath,"pdf_test"))
+
+    def test_download_with_expired_token(self):
+        outputPath = self.tempdir.name
+        self.mock.expired_tokens.add(login.Credentials().authenticate())
+        logins = self.mock.logins
+        self.assertTrue(get_pdfs.download_from_link_list((self.mock.url + "pdf/expired.pdf", "expired_pdf", "expired_test", outputPath, "")))
+        self.assertTrue(os.path.isfile(os.path.join(outputPath, "expired_test", "expired_pdf.pdf")))
+        self.assertEqual(self.mock.logins, logins + 1)
+
+    def test_resume_download(self):
+        outputPath = self.tempdir.name
+        link = self.mock.url + "pdf/resume.pdf"
+        outputFilePath = os.path.join(outputPath, "resume_test", "resume_pdf.pdf")
+        content = self.mock.pdf_content("/pdf/resume.pdf")
+        head = requests.head(link)
+
+        for etag, expected_bytes_sent in [(head.headers["ETag"], len(content) - 1000), ('"changed"', len(content))]:
+            # A download that stopped after 1000 bytes, of a document whose ETag was etag.
+            os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+            with open(resumable.part_path(outputFilePath), "wb") as partFile:
+                partFile.write(content[:1000])
+            head.headers["ETag"] = etag
+            resumable.save_state(outputFilePath, link, head, len(content))
+
+            self.mock.pdf_bytes_sent = 0
+            self.assertTrue(get_pdfs.download_from_link_list((link, "resume_pdf", "resume_test", outputPath, "")))
+            with open(outputFilePath, "rb") as pdfFile:
+                self.assertEqual(pdfFile.read(), content)
+            # Only the missing bytes were sent, unless the document changed since the first part was downloaded.
+            self.assertEqual(self.mock.pdf_bytes_sent, expected_bytes_sent)
+            self.assertFalse(os.path.exists(resumable.part_path(outputFilePath)))
+
+    def test_resume_past_the_end(self):
+        # A partial download longer than the document, so the server can't send the rest (416), like when the
+        # document was replaced by a shorter one with the same ETag.
+        outputPath = self.tempdir.name
+        link = self.mock.url + "pdf/too_long.pdf"
+        outputFilePath = os.path.join(outputPath, "too_long_test", "too_long_pdf.pdf")
+        content = self.mock.pdf_content("/pdf/too_long.pdf")
+        head = requests.head(link)
+        os.makedirs(os.path.dirname(outputFilePath), exist_ok=True)
+        with open(resumable.part_path(outputFilePath), "wb") as partFile:
+            partFile.write(content + b"extra bytes")
+        resumable.save_state(outputFilePath, link, head, None)
+
+        self.assertTrue(get_pdfs.download_from_link_list((link, "too_long_pdf", "too_long_test", outputPath, "")))
+        with open(outputFilePath, "rb") as pdfFile:
+            self.assertEqual(pdfFile.read(), content)
+        self.assertFalse(os.path.exists(resumable.part_path(outputFilePath)))
+
+    def test_get_urls_from_docket(self):
+        docket = {'info': {'court': 'butter'}, 'docket_report': [{'number': 1, 'contents': 'eggs', 'entry_date': '2020-01-02', 'link': 'milk', 'exhibits': [{'exhibit': 2, 'link': 'flour'}]}]}
+        expectedResult = [("milk", "1 - eggs", "onions", "sand", ""), ("flour", "Exhibit 2 - 1 - eggs", "onions", "sand", "")]
+        actualResult = get_pdfs.get_urls_from_docket(docket, "onions", "sand", "")
+        self.assertEqual(expectedResult,[link[:5] for link in actualResult])
+        self.assertEqual([(link.entryDate, link.entryNumber, link.exhibit, link.court) for link in actualResult],
+                         [('2020-01-02', 1, None, 'butter'), ('2020-01-02', 1, '2', 'butter')])
 
 if __name__ == '__main__':
     unittest.main()
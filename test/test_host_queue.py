@@ -0,0 +1,75 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import threading
+import time
+# Internal Modules
+import host_queue
+
+class TestHostQueue(unittest.TestCase):
+
+    def test_per_host_limit_and_fairness(self):
+        # 20 slow documents from one host are listed before 5 fast documents from another.
+        tasks = [(f"http://slow.example.com/{number}.pdf",) for number in range(20)]
+        tasks += [(f"http://fast.example.com/{number}.pdf",) for number in range(5)]
+        lock = threading.Lock()
+        running = {"slow.example.com": 0, "fast.example.com": 0}
+        most_running = dict(running)
+        finished = []
+
+        def download(task):
+            host = host_queue.host_of(task[0])
+            with lock:
+                running[host] += 1
+                most_running[host] = max(most_running[host], running[host])
+            time.sleep(0.02 if host.startswith("slow") else 0.001)
+            with lock:
+                running[host] -= 1
+                finished.append(task[0])
+            return task[0] != "http://fast.example.com/4.pdf"
+
+        results, stats = host_queue.run_by_host(download, tasks, max_workers=4, max_per_host=2)
+
+        self.assertEqual(results, [True] * 24 + [False])
+        self.assertEqual(most_running, {"slow.example.com": 2, "fast.example.com": 2})
+        # The fast host didn't have to wait for the slow host's documents, even though they were listed first.
+        self.assertEqual(set(finished[:5]), {task[0] for task in tasks[20:]})
+        self.assertEqual(stats["slow.example.com"].documents, 20)
+        self.assertEqual(stats["fast.example.com"].failures, 1)
+
+    def test_tasks_are_read_as_needed(self):
+        # Tasks given as an iterator are only read a window at a time, however many there are.
+        counts = {"read": 0, "finished": 0, "most_ahead": 0}
+        lock = threading.Lock()
+
+        def tasks():
+            for number in range(500):
+                with lock:
+                    counts["read"] += 1
+                    counts["most_ahead"] = max(counts["most_ahead"], counts["read"] - counts["finished"])
+                yield (f"http://host{number % 3}.example.com/{number}.pdf",)
+
+        def download(task):
+            with lock:
+                counts["finished"] += 1
+            return True
+
+        results, stats = host_queue.run_by_host(download, tasks(), max_workers=4, max_per_host=2, window=20)
+        self.assertIsNone(results)
+        self.assertEqual(sum(host_stats.documents for host_stats in stats.values()), 500)
+        self.assertLessEqual(counts["most_ahead"], 21)
+
+        counts.update({"read": 0, "finished": 0, "most_ahead": 0})
+        self.assertEqual(host_queue.run_windowed(download, tasks(), max_workers=4, window=20), 500)
+        self.assertLessEqual(counts["most_ahead"], 21)
+
+    def test_errors_are_raised(self):
+        def download(task):
+            raise FileExistsError(task[0])
+        with self.assertRaises(FileExistsError):
+            host_queue.run_by_host(download, [("http://a/1",), ("http://b/2",)], max_workers=2, max_per_host=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import threading
+import config, global_variables, login, jobs, get_json, get_pdfs
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestJobs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(entries=2).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.validatePdfs = False
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def make_job(self, name, dockets):
+        directory = os.path.join(self.tempdir.name, name)
+        os.makedirs(os.path.join(directory, "json"))
+        csv_path = os.path.join(directory, "dockets.csv")
+        with open(csv_path, "w") as csvFile:
+            csvFile.write("Case Name,Case Number,Court\n")
+            for docket in dockets:
+                csvFile.write(f"{name},{docket},Supreme Court of the United States\n")
+        return jobs.Job(csvInputPath=csv_path, jsonOutputPath=os.path.join(directory, "json"),
+                        pdfOutputPath=os.path.join(directory, "pdf"), clientMatter=name)
+
+    def test_jobs_run_at_the_same_time(self):
+        first = self.make_job("first", ["17-645", "18-100"])
+        second = self.make_job("second", ["19-200"])
+        saved = {}
+
+        def run(job):
+            saved[job.clientMatter] = get_json.thread_download_json(job)
+            get_pdfs.thread_download_pdfs(get_pdfs.iter_urls(job.jsonOutputPath, job), job)
+
+        threads = [threading.Thread(target=run, args=(job,)) for job in (first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Each job saved its own dockets and PDFs, to its own folders.
+        self.assertEqual(saved, {"first": 2, "second": 1})
+        json_files = lambda job: sorted(name for name in os.listdir(job.jsonOutputPath) if name.endswith(".json"))
+        self.assertEqual(json_files(first), ["first 17-645.json", "first 18-100.json"])
+        self.assertEqual(json_files(second), ["second 19-200.json"])
+        self.assertEqual(sorted(os.listdir(first.pdfOutputPath)), ["first 17-645", "first 18-100"])
+        self.assertEqual(len(os.listdir(os.path.join(second.pdfOutputPath, "second 19-200"))), 2)
+        # Both jobs logged in once between them, and used the same token for every docket and PDF.
+        self.assertEqual(self.mock.requests["login"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import json
+import urllib.request
+# Third-party Modules
+from retrying import retry
+# Internal Modules
+import metrics
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def test_timed_request(self):
+        with metrics.timed_request("getdocket"):
+            pass
+        with self.assertRaises(ValueError):
+            with metrics.timed_request("getdocket"):
+                raise ValueError()
+        metrics.record_bytes_received("getdocket", 120)
+        summary = metrics.REGISTRY.summary()
+        self.assertEqual(summary["timings"]["request_seconds endpoint=getdocket"]["count"], 2)
+        self.assertEqual(summary["counters"]["request_errors_total endpoint=getdocket"], 1)
+        self.assertEqual(summary["counters"]["bytes_received_total endpoint=getdocket"], 120)
+        self.assertEqual(summary["gauges"]["in_flight endpoint=getdocket"], 0)
+
+    def test_count_retries(self):
+        attempts = []
+        @retry(retry_on_exception=metrics.count_retries("pdf"))
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise IOError()
+            return True
+        self.assertTrue(flaky())
+        self.assertEqual(metrics.REGISTRY.summary()["counters"]["retries_total endpoint=pdf"], 2)
+
+    def test_prometheus_server(self):
+        with metrics.timed_write("json"):
+            pass
+        download = metrics.track_queue(lambda task: task, "json", 3)
+        download("task")
+        server = metrics.start_server(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            text = urllib.request.urlopen(url + "/metrics").read().decode("utf-8")
+            self.assertIn('docket_alarm_file_write_seconds_count{kind="json"} 1', text)
+            self.assertIn('docket_alarm_file_write_seconds_bucket{kind="json",le="+Inf"} 1', text)
+            self.assertIn('docket_alarm_queue_depth{stage="json"} 2', text)
+            summary = json.loads(urllib.request.urlopen(url + "/metrics.json").read())
+            self.assertEqual(summary["gauges"]["queue_depth stage=json"], 2)
+        finally:
+            metrics.stop_server()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import csv
+import get_pdfs, global_variables, login, pdf_validation
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestPdfValidation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(pdf_pages=3).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH)
+        global_variables.API_URL = cls.mock.api_url
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tempdir.name, name)
+        with open(path, "wb") as pdfFile:
+            pdfFile.write(content)
+        return path
+
+    def test_validate_pdf(self):
+        content = self.mock.pdf_content("/pdf/valid.pdf")
+        result = pdf_validation.validate_pdf(self.write("valid.pdf", content))
+        self.assertTrue(result["valid"])
+        self.assertEqual((result["pages"], result["bytes"]), (3, len(content)))
+
+        result = pdf_validation.validate_pdf(self.write("error.pdf", b"<html><body>Not found</body></html>"))
+        self.assertFalse(result["valid"])
+        self.assertTrue(result["problem"].startswith("Not a PDF"))
+
+        result = pdf_validation.validate_pdf(self.write("truncated.pdf", content[:len(content) // 2]))
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["problem"], "Incomplete PDF (no end of file marker)")
+
+    def test_download_and_validate(self):
+        outputPath = os.path.join(self.tempdir.name, "validated")
+        link_list = [get_pdfs.PdfLink(self.mock.url + f"pdf/{number}.pdf", f"{number} - entry", "docket", outputPath, "")
+                     for number in range(4)]
+        # The server sends an error page, with a 200 status, the first time the second PDF is requested.
+        self.mock.html_once.add("/pdf/1.pdf")
+
+        results, _ = get_pdfs.download_and_validate(get_pdfs.download_from_link_list, link_list)
+
+        self.assertEqual(results, [True] * 4)
+        self.assertNotIn("/pdf/1.pdf", self.mock.html_once)
+        with open(os.path.join(outputPath, pdf_validation.MANIFEST_NAME), newline='') as manifestFile:
+            rows = list(csv.DictReader(manifestFile))
+        # The error page was checked, and then the PDF downloaded in its place. The last row for a file is the latest.
+        self.assertEqual([row["valid"] for row in rows if row["file"] == "1 - entry.pdf"], ["False", "True"])
+        latest = {row["file"]: (row["pages"], row["valid"]) for row in rows}
+        self.assertEqual(latest, {f"{number} - entry.pdf": ("3", "True") for number in range(4)})
+    def test_missing_pdf_is_downloaded_again(self):
+        outputPath = os.path.join(self.tempdir.name, "missing")
+        link_list = [get_pdfs.PdfLink(self.mock.url + f"pdf/{number}.pdf", f"{number} - entry", "docket", outputPath, "")
+                     for number in range(2)]
+        removed = []
+
+        def download(link_tuple):
+            # The first PDF goes missing after its first download (for example, another program moved it).
+            result = get_pdfs.download_from_link_list(link_tuple)
+            if link_tuple is link_list[0] and not removed:
+                removed.append(link_tuple)
+                os.remove(get_pdfs.output_file_path(link_tuple))
+            return result
+
+        results, _ = get_pdfs.download_and_validate(download, link_list)
+
+        self.assertEqual(results, [True, True])
+        self.assertTrue(os.path.exists(get_pdfs.output_file_path(link_list[0])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import config, global_variables, login, jobs, get_json, get_pdfs, planner
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+class TestPlanner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(entries=3, exhibits=1, pdf_bytes=20000).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs,
+                     config.ingestAfterDownload)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.validatePdfs = False
+        config.ingestAfterDownload = False
+
+    @classmethod
+    def tearDownClass(cls):
+        (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs,
+         config.ingestAfterDownload) = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def test_plan_and_run_it(self):
+        job = jobs.Job(jsonOutputPath=os.path.join(self.tempdir.name, "json"), pdfOutputPath=os.path.join(self.tempdir.name, "pdf"),
+                       clientMatter="plan", dockets=[("Plan", "17-645", "Supreme Court of the United States"), ("Plan", "18-100", "Mock Court")])
+        os.makedirs(job.jsonOutputPath)
+        get_json.thread_download_json(job)
+
+        self.mock.requests.clear()
+        plan = planner.make_plan(get_pdfs.iter_urls(job.jsonOutputPath, job), job)
+        # Every document's size was asked for, and nothing was downloaded.
+        self.assertEqual(self.mock.pdf_bytes_sent, 0)
+        self.assertEqual(self.mock.requests["pdf"], 12)
+        self.assertEqual(plan["summary"]["documents"], 12)
+        self.assertEqual(plan["summary"]["sizes_known"], 12)
+        self.assertEqual(plan["summary"]["estimated_bytes"], sum(size for *_, size in plan["documents"]))
+        self.assertEqual(sorted((docket["docket"], docket["documents"]) for docket in plan["dockets"]), [("Plan 17-645", 6), ("Plan 18-100", 6)])
+
+        # The download is run from the saved plan, without the JSON.
+        loaded_job, link_list = planner.load_plan(planner.save_plan(plan))
+        self.assertEqual((loaded_job.pdfOutputPath, loaded_job.clientMatter, len(link_list)), (job.pdfOutputPath, "plan", 12))
+        get_pdfs.thread_download_pdfs(link_list, loaded_job)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(job.pdfOutputPath)), 12)
+
+    def test_estimate_seconds(self):
+        documents = [("a", 2000000, 0.0)] * 8 + [("b", 2000000, 0.0)] * 2
+        # The threads share the work...
+        self.assertEqual(planner.estimate_seconds(documents, threads=5, per_host=8, megabytes_per_second=2), 2.0)
+        # ...but one host can only be sent so many downloads at once.
+        self.assertEqual(planner.estimate_seconds(documents, threads=10, per_host=2, megabytes_per_second=2), 4.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+import time
+import pstats
+import concurrent.futures
+# Internal Modules
+import profiling
+
+def fetch(seconds):
+    with profiling.stage("fetch"):
+        time.sleep(seconds)
+    return seconds
+
+def run():
+    with profiling.stage("csv_read"):
+        time.sleep(0.01)
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        return list(executor.map(fetch, [0.02] * 8))
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile_run(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            result = profiling.profile_run(run, output_directory=output_directory)
+            self.assertEqual(len(result), 8)
+            names = sorted(os.listdir(output_directory))
+            self.assertEqual([os.path.splitext(name)[1] for name in names], [".folded", ".prof", ".txt"])
+
+            # The functions run in the thread pool are in the profile along with the main thread.
+            stats = pstats.Stats(os.path.join(output_directory, names[1]))
+            self.assertIn("fetch", {function for (_, _, function) in stats.stats})
+
+            with open(os.path.join(output_directory, names[2])) as reportFile:
+                report = reportFile.read()
+            self.assertRegex(report, r"csv_read\s+1\s")
+            self.assertRegex(report, r"fetch\s+8\s")
+
+    def test_stage_is_free_when_not_profiling(self):
+        profiling._stage_counts.clear()
+        with profiling.stage("fetch"):
+            pass
+        self.assertNotIn("fetch", profiling._stage_counts)
+
+if __name__ == '__main__':
+    unittest.main()
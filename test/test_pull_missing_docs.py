@@ -0,0 +1,115 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import config, global_variables, login, jobs, archives, get_json, pull_missing_docs
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+import threading
+import io
+import contextlib
+
+SCOTUS = "Supreme Court of the United States"
+DISTRICT = "U.S. District Court, Northern District of California"
+
+class TestPullMissingDocs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 17-645 was saved without links for entries 2 and 3, and 18-100 without one for entry 1. They have them
+        # when the dockets are pulled again uncached.
+        cls.mock = MockDocketAlarm(entries=4, missing_links={"17-645": [2, 3], "18-100": [1]}).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.ingestAfterDownload = False
+
+    @classmethod
+    def tearDownClass(cls):
+        global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.ingestAfterDownload = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def make_job(self, name):
+        json_dir = os.path.join(self.tempdir.name, name, "json")
+        os.makedirs(json_dir)
+        job = jobs.Job(jsonOutputPath=json_dir, pdfOutputPath=os.path.join(self.tempdir.name, name, "pdf"), isCached=True,
+                       dockets=[("Family", "17-645", SCOTUS), ("Family", "18-100", DISTRICT), ("Family", "19-200", SCOTUS)])
+        get_json.thread_download_json(job)
+        return job
+
+    def test_missing_documents_are_recovered_and_downloaded(self):
+        job = self.make_job("download")
+        self.mock.requests.clear()
+        pull_missing_docs.thread_download_missing_pdfs(job)
+        # Each docket is searched for in its court's own system, and only the dockets with missing entries are pulled again.
+        self.assertEqual(self.mock.requests["searchdirect"], 1)
+        self.assertEqual(self.mock.requests["searchpacer"], 1)
+        self.assertEqual(self.mock.requests["getdocket"], 2)
+        self.assertEqual(self.mock.requests["pdf"], 3)
+        folders = [name for name in os.listdir(job.pdfOutputPath) if os.path.isdir(os.path.join(job.pdfOutputPath, name))]
+        self.assertEqual(sorted(folders), ["Family 17-645", "Family 18-100"])
+
+        # The dockets pulled again were saved, so the next run has nothing left to look up.
+        self.mock.requests.clear()
+        self.assertEqual(list(pull_missing_docs.scan_missing(job.jsonOutputPath)), [])
+        pull_missing_docs.thread_download_missing_pdfs(job)
+        self.assertEqual(self.mock.requests, {})
+
+    def test_recovered_dockets_replace_their_shard_copies(self):
+        saved = config.outputMode
+        config.outputMode = "archive"
+        try:
+            job = self.make_job("archive")
+            self.assertEqual(len(list(pull_missing_docs.iter_recovered_links(job))), 3)
+            archives.close_all(job.jsonOutputPath)
+        finally:
+            config.outputMode = saved
+        self.assertEqual(list(pull_missing_docs.scan_missing(job.jsonOutputPath)), [])
+
+    def test_only_the_missing_entries_are_recovered(self):
+        links = list(pull_missing_docs.iter_recovered_links(self.make_job("links")))
+        self.assertEqual(sorted((link.folderName, link.entryNumber) for link in links),
+                         [("Family 17-645", 2), ("Family 17-645", 3), ("Family 18-100", 1)])
+
+    def test_stopping_early(self):
+        # The download stops after the first link, while the lookups still have links waiting for room in the queue.
+        job = self.make_job("stopped")
+        saved = config.taskWindow
+        config.taskWindow = 1
+        try:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                links = pull_missing_docs.iter_recovered_links(job)
+                next(links)
+                closing = threading.Thread(target=links.close)
+                closing.start()
+                closing.join(timeout=30)
+        finally:
+            config.taskWindow = saved
+        # Closing waited for the lookups to stop, and still reported what they found.
+        self.assertFalse(closing.is_alive())
+        self.assertIn("3 entries in 2 dockets were missing their documents.", output.getvalue())
+
+    def test_missing_entries(self):
+        docket = {"docket_report": [{"number": 1, "contents": "Order", "link": "x"}, {"number": 2, "contents": "Motion"}]}
+        self.assertEqual(pull_missing_docs.missing_entries(docket), [2])
+        self.assertEqual(pull_missing_docs.missing_entries({}), [])
+
+    def test_is_pacer_court(self):
+        for court in [DISTRICT, "U.S. Court of Appeals, Ninth Circuit", "Court of Appeals, Ninth Circuit",
+                      "U.S. Bankruptcy Court, District of Delaware", "U.S. Court of Federal Claims"]:
+            self.assertTrue(pull_missing_docs.is_pacer_court(court), court)
+        # State appeals and circuit courts, and federal courts and agencies outside PACER, are searched directly.
+        for court in [SCOTUS, "Texas State, 1st Court of Appeals", "California State Court of Appeals, First District",
+                      "Missouri State, Court of Appeals, Eastern District", "Arkansas State, Pulaski County, Circuit Court",
+                      "Florida State, First District Court of Appeal", "District Of Columbia, Court of Appeals",
+                      "U.S. Patent Application", "Patent Trial and Appeal Board", "", None]:
+            self.assertFalse(pull_missing_docs.is_pacer_court(court), court)
+
+if __name__ == "__main__":
+    unittest.main()
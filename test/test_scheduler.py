@@ -0,0 +1,74 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+# Internal Modules
+import config
+import global_variables
+import scheduler
+from get_pdfs import PdfLink
+
+LINKS = [
+    PdfLink("a1", "1 - Petition", "Docket A", "", "", "2020-01-01", 1, None, "Court A"),
+    PdfLink("a1e", "Exhibit 1 - 1 - Petition", "Docket A", "", "", "2020-01-01", 1, "1", "Court A"),
+    PdfLink("a2", "2 - Order", "Docket A", "", "", "2021-06-01", 2, None, "Court A"),
+    PdfLink("b1", "1 - Complaint", "Docket B", "", "", "2019-03-01", 1, None, "Court B"),
+    ("c1", "1 - Motion", "Docket C", "", ""),
+]
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = config.documentFeeEstimates, config.defaultDocumentFee
+        config.documentFeeEstimates, config.defaultDocumentFee = {"Court A": 3.0}, 1.0
+
+    def tearDown(self):
+        config.documentFeeEstimates, config.defaultDocumentFee = self.saved
+
+    def test_default_keeps_everything_in_order(self):
+        selected, left_out = scheduler.schedule(LINKS, [], None, None, None)
+        self.assertEqual(selected, LINKS)
+        self.assertEqual(left_out, [])
+
+    def test_priority(self):
+        selected, _ = scheduler.schedule(LINKS, ["main_documents_first", "newest_first"], None, None, None)
+        self.assertEqual([link[0] for link in selected], ["a2", "a1", "b1", "c1", "a1e"])
+
+    def test_caps(self):
+        selected, left_out = scheduler.schedule(LINKS, ["newest_first"], 1, None, None)
+        self.assertEqual([link[0] for link in selected], ["a2", "b1", "c1"])
+        selected, _ = scheduler.schedule(LINKS, [], None, 2, None)
+        self.assertEqual([link[0] for link in selected], ["a1", "a1e"])
+        # Court A documents cost 3.0 and the rest 1.0, so after a1 only the cheaper documents fit in 5.0.
+        selected, left_out = scheduler.schedule(LINKS, [], None, None, 5.0)
+        self.assertEqual([link[0] for link in selected], ["a1", "b1", "c1"])
+        self.assertEqual([link[0] for link in left_out], ["a1e", "a2"])
+
+    def test_zero_caps(self):
+        saved = (config.pdfPriority, config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun,
+                 global_variables.LOG_PATH)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                global_variables.LOG_PATH = directory
+                # Only c1 has no court, and so no fee.
+                config.documentFeeEstimates[None] = 0.0
+                config.pdfPriority = []
+                config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun = None, None, 0
+                # With no money to spend, only the free documents are downloaded.
+                self.assertEqual([link[0] for link in scheduler.schedule_for_download(iter(LINKS))], ["c1"])
+                config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun = None, 0, None
+                self.assertEqual(scheduler.schedule_for_download(iter(LINKS)), [])
+                config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun = 0, None, None
+                self.assertEqual(scheduler.schedule_for_download(iter(LINKS)), [])
+        finally:
+            (config.pdfPriority, config.maxDocumentsPerDocket, config.maxDocumentsPerRun, config.maxSpendPerRun,
+             global_variables.LOG_PATH) = saved
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            scheduler.schedule(LINKS, ["cheapest_first"], None, None, None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import json
+import unittest
+import tempfile
+import config, global_variables, login, storage, jobs, get_json, get_pdfs
+from mock_docket_alarm import MockDocketAlarm
+from mock_object_store import MockObjectStore
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+class TestLocalStorage(unittest.TestCase):
+
+    def test_local_storage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = storage.LocalStorage(directory)
+            store.write_text("docket.json", '{"success": true}')
+            with store.open_write(os.path.join("docket", "document.pdf")) as outputFile:
+                outputFile.write(b"%PDF-")
+            with store.open_write(os.path.join("docket", "document.pdf"), append=True) as outputFile:
+                outputFile.write(b"1.4")
+            self.assertEqual(list(store.names()), ["docket.json"])
+            self.assertEqual(store.read_bytes(os.path.join("docket", "document.pdf")), b"%PDF-1.4")
+
+@unittest.skipIf(boto3 is None, "boto3 is not installed.")
+class TestS3Storage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = MockObjectStore(part_latency=0.1).start()
+        cls.saved_environment = {name: os.environ.get(name) for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_DEFAULT_REGION")}
+        os.environ.update({"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test", "AWS_DEFAULT_REGION": "us-east-1"})
+        cls.saved_config = (config.storageBackend, config.s3Bucket, config.s3Prefix, config.s3EndpointUrl)
+        config.s3EndpointUrl = cls.store.url
+
+    @classmethod
+    def tearDownClass(cls):
+        config.storageBackend, config.s3Bucket, config.s3Prefix, config.s3EndpointUrl = cls.saved_config
+        for name, value in cls.saved_environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        cls.store.stop()
+
+    def test_multipart_upload(self):
+        s3 = storage.S3Storage("bucket", "uploads", part_size=storage.MINIMUM_PART_SIZE, concurrency=3)
+        content = os.urandom(storage.MINIMUM_PART_SIZE * 4 + 1000)
+        with s3.open_write("large.pdf") as upload:
+            for start in range(0, len(content), 64 * 1024):
+                upload.write(content[start:start + 64 * 1024])
+
+        self.assertEqual(self.store.objects[("bucket", "uploads/large.pdf")], content)
+        self.assertEqual(self.store.parts_received, 5)
+        # The parts were sent several at a time, but never more than the concurrency allows.
+        self.assertTrue(1 < self.store.most_parts_at_once <= 3)
+
+        # An upload that fails partway is abandoned rather than finished.
+        with self.assertRaises(ValueError):
+            with s3.open_write("broken.pdf") as upload:
+                upload.write(content)
+                raise ValueError("The download stopped.")
+        self.assertNotIn(("bucket", "uploads/broken.pdf"), self.store.objects)
+        self.assertEqual(self.store.aborted_uploads, 1)
+
+    def test_download_to_object_store(self):
+        config.storageBackend, config.s3Bucket, config.s3Prefix = "s3", "dockets", "pull"
+        with MockDocketAlarm(entries=2) as mock, tempfile.TemporaryDirectory() as directory:
+            saved = (global_variables.API_URL, login.CREDENTIALS_PATH)
+            global_variables.API_URL = mock.api_url
+            login.CREDENTIALS_PATH = os.path.join(directory, "credentials.pickle")
+            login.store_user_info_locally("test@example.com", "test")
+            try:
+                json_directory = os.path.join(directory, "json-output")
+                self.assertTrue(get_json.download_json_from_list_of_tuples(
+                    ("test", "17-645", "Supreme Court of the United States", json_directory, "", True)))
+                link_list = get_pdfs.get_urls_from_json_file(os.path.join(json_directory, "test 17-645.json"),
+                                                             os.path.join(directory, "pdf-output"), "")
+                for link_tuple in link_list:
+                    self.assertTrue(get_pdfs.download_from_link_list(link_tuple))
+            finally:
+                global_variables.API_URL, login.CREDENTIALS_PATH = saved
+
+            # Nothing was saved locally. The docket and its PDFs are in the bucket, under the prefix and folder name.
+            self.assertFalse(os.path.exists(json_directory))
+            docket = json.loads(self.store.objects[("dockets", "pull/json-output/test 17-645.json")])
+            self.assertTrue(docket["success"])
+            for link_tuple in link_list:
+                content = self.store.objects[("dockets", f"pull/pdf-output/test 17-645/{link_tuple.fileName}.pdf")]
+                self.assertEqual(content, mock.pdf_content(link_tuple.link.split(mock.url.rstrip("/"))[1].split("?")[0]))
+    def test_json_pull_to_object_store(self):
+        # A whole pull with the default settings, which load the dockets into the database after the download.
+        config.storageBackend, config.s3Bucket, config.s3Prefix = "s3", "dockets", "pull"
+        self.assertTrue(config.ingestAfterDownload)
+        with MockDocketAlarm(entries=2) as mock, tempfile.TemporaryDirectory() as directory:
+            saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH)
+            global_variables.API_URL = mock.api_url
+            global_variables.LOG_PATH = directory
+            login.CREDENTIALS_PATH = os.path.join(directory, "credentials.pickle")
+            login.store_user_info_locally("test@example.com", "test")
+            try:
+                json_directory = os.path.join(directory, "json-pull")
+                job = jobs.Job(jsonOutputPath=json_directory, dockets=[("test", "17-645", "Supreme Court of the United States")])
+                self.assertEqual(get_json.thread_download_json(job), 1)
+            finally:
+                global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH = saved
+            self.assertFalse(os.path.exists(json_directory))
+            self.assertIn(("dockets", "pull/json-pull/test 17-645.json"), self.store.objects)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import gc
+import pickle
+import unittest
+# Internal Modules
+import task_records
+
+class TestTaskRecords(unittest.TestCase):
+
+    def test_pdf_link_reads_like_a_tuple(self):
+        link = task_records.PdfLink("https://example.com/1.pdf", "1 - Petition", "Docket A", "/tmp/pdfs", "matter",
+                                    "2020-01-01", 1, None, "Court A")
+        link, fileName, folderName, outputPath, clientMatter = link[:5]
+        self.assertEqual((fileName, outputPath, clientMatter), ("1 - Petition", "/tmp/pdfs", "matter"))
+
+        link = task_records.PdfLink("https://example.com/1.pdf", "1 - Petition", "Docket A", "/tmp/pdfs", "matter")
+        self.assertEqual(link, ("https://example.com/1.pdf", "1 - Petition", "Docket A", "/tmp/pdfs", "matter",
+                                None, None, None, None))
+        self.assertEqual(pickle.loads(pickle.dumps(link)), link)
+        self.assertFalse(hasattr(link, "__dict__"))
+
+    def test_tasks_share_their_run_context_and_strings(self):
+        first = task_records.JsonTask("Case", "1-1", "".join(["Court ", "A"]), "/tmp/json", "matter", True)
+        second = task_records.JsonTask("Case", "1-2", "".join(["Court ", "A"]), "/tmp/json", "matter", True)
+        self.assertIs(first.context, second.context)
+        self.assertIs(first.caseCourt, second.caseCourt)
+        self.assertEqual(tuple(second), ("Case", "1-2", "Court A", "/tmp/json", "matter", True))
+
+    def test_run_context_is_dropped_with_its_tasks(self):
+        task = task_records.JsonTask("Case", "1-1", "Court A", "/tmp/finished", "matter", True)
+        self.assertIs(task_records.run_context("/tmp/finished", "matter", True), task.context)
+        del task
+        gc.collect()
+        self.assertNotIn(("/tmp/finished", "matter", True), task_records._contexts)
+
+    def test_docket_link_reads_like_a_dict(self):
+        record = task_records.DocketLink(3, "Order", "https://example.com/3.pdf")
+        self.assertEqual(record["link"], "https://example.com/3.pdf")
+        self.assertEqual(record, {"number": 3, "name": "Order", "link": "https://example.com/3.pdf", "exhibit": None})
+        self.assertEqual(dict(record)["name"], "Order")
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+sys.path.insert(0, os.path.dirname(__file__))
+import config, global_variables, login, jobs, watch
+from mock_docket_alarm import MockDocketAlarm
+import unittest
+import tempfile
+
+SCOTUS = "Supreme Court of the United States"
+HOUR = 3600
+
+class TestWatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockDocketAlarm(entries=2).start()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.saved = (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs,
+                     config.ingestAfterDownload)
+        global_variables.API_URL = cls.mock.api_url
+        global_variables.LOG_PATH = cls.tempdir.name
+        login.CREDENTIALS_PATH = os.path.join(cls.tempdir.name, "credentials.pickle")
+        login.store_user_info_locally("test@example.com", "test")
+        config.validatePdfs = False
+        config.ingestAfterDownload = False
+
+    @classmethod
+    def tearDownClass(cls):
+        (global_variables.API_URL, login.CREDENTIALS_PATH, global_variables.LOG_PATH, config.validatePdfs,
+         config.ingestAfterDownload) = cls.saved
+        cls.mock.stop()
+        cls.tempdir.cleanup()
+
+    def test_busy_dockets_are_polled_more_often(self):
+        job = jobs.Job(jsonOutputPath=os.path.join(self.tempdir.name, "json"), pdfOutputPath=os.path.join(self.tempdir.name, "pdf"),
+                       dockets=[("Busy", "1-1", SCOTUS), ("Quiet", "2-2", SCOTUS)])
+        start = 1000000.0
+
+        # The first poll only records where each docket is up to.
+        summary = watch.poll_once(job, pdfs=True, now=start)
+        self.assertEqual((summary["polled"], summary["new_entries"], summary["pdfs"]), (2, 0, 0))
+        self.assertFalse(os.path.exists(job.pdfOutputPath))
+        # Nothing is due again until the first wait is over.
+        self.assertEqual(watch.poll_once(job, pdfs=True, now=start + HOUR)["polled"], 0)
+
+        # One new entry is filed on the busy docket. Only its PDF is downloaded.
+        self.mock.docket_entries["1-1"] = 3
+        summary = watch.poll_once(job, pdfs=True, now=start + config.watchStartHours * 1.2 * HOUR)
+        self.assertEqual((summary["polled"], summary["active"], summary["new_entries"], summary["pdfs"]), (2, 1, 1, 1))
+        self.assertEqual(os.listdir(os.path.join(job.pdfOutputPath, "Busy 1-1")), ["3 - Motion_number_3_filed_in_1-1.pdf"])
+
+        # The busy docket now waits half as long as before, and the quiet one twice as long.
+        watchlist = watch.WatchList(watch.default_state_path(job))
+        waits = dict(watchlist.connection.execute("SELECT docket, wait FROM dockets"))
+        watchlist.close()
+        self.assertEqual(waits, {"1-1": config.watchStartHours / 2 * HOUR, "2-2": config.watchStartHours * 2 * HOUR})
+
+    def test_new_entries(self):
+        self.assertTrue(watch.is_new_entry("12", "2020-01-01", 11.0, "2021-01-01"))
+        self.assertFalse(watch.is_new_entry(11, "2022-01-01", 11.0, "2021-01-01"))
+        # Entries without numbers are compared by date.
+        self.assertTrue(watch.is_new_entry(None, "2021-01-02", 11.0, "2021-01-01"))
+        self.assertFalse(watch.is_new_entry(None, None, 11.0, "2021-01-01"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# Built-in Modules
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+import time
+# Internal Modules
+import config
+import work_queue
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_add_tasks_skips_duplicates(self):
+        queue = work_queue.WorkQueue(self.path)
+        self.assertEqual(queue.add_tasks("json", [("a", 1), ("b", 2)]), 2)
+        self.assertEqual(queue.add_tasks("json", [("a", 1), ("c", 3)]), 1)
+        self.assertEqual(queue.counts("json")["pending"], 3)
+        queue.close()
+
+    def test_workers_never_lease_the_same_task(self):
+        first = work_queue.WorkQueue(self.path, worker_id="first")
+        second = work_queue.WorkQueue(self.path, worker_id="second")
+        first.add_tasks("pdf", [(str(n), n) for n in range(5)])
+        leased_first = first.lease("pdf", 3)
+        leased_second = second.lease("pdf", 3)
+        self.assertEqual(len(leased_first), 3)
+        self.assertEqual(len(leased_second), 2)
+        self.assertFalse({task_id for task_id, _ in leased_first} & {task_id for task_id, _ in leased_second})
+        first.close()
+        second.close()
+
+    def test_expired_lease_is_taken_over(self):
+        crashed = work_queue.WorkQueue(self.path, worker_id="crashed", lease_seconds=0.01)
+        crashed.add_tasks("json", [("a", ["name", "1", "court"])])
+        [(task_id, _)] = crashed.lease("json", 1)
+        time.sleep(0.05)
+        survivor = work_queue.WorkQueue(self.path, worker_id="survivor")
+        self.assertEqual(survivor.lease("json", 1), [(task_id, ["name", "1", "court"])])
+        # The worker that lost the lease can no longer complete the task.
+        crashed.complete([task_id])
+        self.assertEqual(survivor.counts("json")["leased"], 1)
+        survivor.complete([task_id])
+        self.assertEqual(survivor.counts("json")["done"], 1)
+        crashed.close()
+        survivor.close()
+
+    def test_release_retries_then_fails(self):
+        queue = work_queue.WorkQueue(self.path)
+        queue.add_tasks("json", [("a", 1)])
+        for attempt in range(config.queueMaxAttempts):
+            [(task_id, _)] = queue.lease("json", 1)
+            queue.release([task_id], "error")
+        self.assertEqual(queue.counts("json")["failed"], 1)
+        self.assertEqual(queue.lease("json", 1), [])
+        queue.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docket_alarm_api_bulk_download"))
+import unittest
+import tempfile
+import openpyxl
+import xlsx_export
+from log_errors_to_table import ErrorTable
+
+class TestXlsxExport(unittest.TestCase):
+
+    def test_error_table(self):
+        table = ErrorTable()
+        table.append_error_table("404", "Smith 20-0001", "1 - Order")
+        table.append_error_table("Incomplete download", "Smith 20-0001", None)
+        table.append_error_table("Invalid PDF: \x00empty", "Jones 20-0002", "2 - Motion")
+        self.assertEqual(len(table), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "errors.xlsx")
+            table.error_excel_save(path)
+            rows = list(openpyxl.load_workbook(path).active.values)
+        # Characters a spreadsheet can't hold are dropped, rather than failing the save.
+        self.assertEqual(rows, [("error", "docket", "document"), ("404", "Smith 20-0001", "1 - Order"),
+                                ("Invalid PDF: empty", "Jones 20-0002", "2 - Motion")])
+        self.assertEqual(list(table.df.columns), ["error", "docket", "document"])
+
+    def test_rows_past_the_end_of_a_sheet_go_on_a_new_one(self):
+        saved = xlsx_export.MAX_ROWS_PER_SHEET
+        xlsx_export.MAX_ROWS_PER_SHEET = 3
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "rows.xlsx")
+                with xlsx_export.XlsxWriter(path, ["number", "empty"]) as writer:
+                    writer.writeheader()
+                    writer.writerows({"number": number, "empty": float("nan")} for number in range(5))
+                workbook = openpyxl.load_workbook(path)
+                sheets = [list(sheet.values) for sheet in workbook.worksheets]
+        finally:
+            xlsx_export.MAX_ROWS_PER_SHEET = saved
+        self.assertEqual(workbook.sheetnames, ["Sheet1", "Sheet1 (2)", "Sheet1 (3)"])
+        self.assertEqual(sheets[0], [("number", "empty"), (0, None), (1, None)])
+        self.assertEqual(sheets[2], [("number", "empty"), (4, None)])
+
+if __name__ == '__main__':
+    unittest.main()